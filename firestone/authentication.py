@@ -8,10 +8,11 @@ is authenticated and who the authenticated user is.
 
 In other cases, we implement the whole logic in the authentication mixin.
 """
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.core import signing
-from django.contrib.auth import get_user_model
-User = get_user_model()
+from django.utils.functional import SimpleLazyObject
+from django.utils.functional import empty
 from collections import OrderedDict
 import itsdangerous
 import urllib
@@ -27,7 +28,45 @@ class Authentication(object):
     used as a mixin(superclass) by the handler, therefore inheriting its
     functionality.
     """
-    pass
+    @classmethod
+    def may_authenticate(cls, request):
+        """
+        Cheap check of whether ``request`` carries what this authentication
+        method needs, e.g. a specific header. It's used by the ``Proxy``, to
+        skip handlers that could never authenticate the request, without
+        instantiating them.
+        It should never return False for a request that ``is_authenticated``
+        would accept.
+
+        Returns:
+            False if the request can't be authenticated by this method, True
+            otherwise.
+        """
+        return True
+
+    def get_cache_scope(self):
+        """
+        Used by the handler's response cache(see ``cache_responses``), so
+        that responses are only shared among requests of the same
+        authenticated user, or among anonymous requests.
+
+        Returns:
+            String
+        """
+        user = getattr(self.request, 'user', None)
+        if user is not None and user.is_authenticated():
+            return 'user:%s' % user.pk
+        return 'anonymous'
+
+    def get_cache_ignored_params(self):
+        """
+        Used by the handler's response cache(see ``cache_responses``).
+
+        Returns:
+            Querystring parameters that are specific to the authentication
+            method, and don't affect the response.
+        """
+        return ()
 
 
 class NoAuthentication(Authentication):
@@ -51,6 +90,22 @@ class SessionAuthentication(Authentication):
     So, all we have to do here is check whether the ``request.user``
     is authenticated.
     """
+    @classmethod
+    def may_authenticate(cls, request):
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return True
+
+        # Without a session cookie, a ``request.user`` that the
+        # ``AuthenticationMiddleware`` has not resolved yet, can only resolve
+        # to an ``AnonymousUser``. A user set by other means(or already
+        # resolved) has to be checked.
+        user = getattr(request, 'user', None)
+        if user is None:
+            return False
+        if type(user) is SimpleLazyObject and user._wrapped is empty:
+            return False
+        return True
+
     def is_authenticated(self):
         if hasattr(self.request, 'user'):
             return self.request.user.is_authenticated()
@@ -68,6 +123,14 @@ class SignatureAuthentication(Authentication):
     Makes use of the handler class parameters ``signer``, ``sig_param``, and
     ``max_age_param``
     """
+    @classmethod
+    def may_authenticate(cls, request):
+        return cls.sig_param in request.GET
+
+    def get_cache_ignored_params(self):
+        # Every signed URL has its own signature and max_age
+        return (self.sig_param, self.max_age_param)
+
     def is_authenticated(self):
         """
         Strictly speaking, this is not an authentication check, since we don't
@@ -184,6 +247,12 @@ class SignatureAuthentication(Authentication):
 
 
 class JWTAuthentication(Authentication):
+    @classmethod
+    def may_authenticate(cls, request):
+        # The header is split on any whitespace, as ``_get_token`` does
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        return authorization.split(None, 1)[:1] == ['JWT']
+
     def is_authenticated(self):
         """
         Retrieves the token from the ``Authorization`` header, verifies it,
@@ -197,7 +266,10 @@ class JWTAuthentication(Authentication):
 
         s = self.jwt_signer
         try:
-            payload = s.loads(token)
+            if self.jwt_token_cache is None:
+                payload = s.loads(token)
+            else:
+                payload = self.jwt_token_cache.loads(s, token)
         except itsdangerous.BadSignature:
             return False
 
@@ -218,20 +290,19 @@ class JWTAuthentication(Authentication):
 
         This method assumes that the ``iss`` payload parameter contains the
         User id, and sets the ``self.request.user`` to that corresponding User
-        instance.
+        instance, as resolved by the handler's ``jwt_user_resolver``.
         Override in the handler class if the ``payload`` contains different
         data.
         """
-        user = AnonymousUser()
+        user = None
 
         user_id = payload.get('iss', None)
         if user_id:
-            try:
-                user = User.objects.get(id=user_id)
-            except User.DoesNotExist:
-                pass
+            user = self.jwt_user_resolver.resolve(
+                user_id, max_age=getattr(self.jwt_signer, 'expires_in', None)
+            )
 
-        return user
+        return user or AnonymousUser()
 
     def _get_token(self):
         """
@@ -0,0 +1,65 @@
+"""
+The ``binary_formats`` module encodes python data structures to, and decodes
+them from, the compact binary formats MessagePack and CBOR. They are used by
+``serializers.SerializerMixin`` and by the deserializers, when their libraries
+(``msgpack``, ``cbor2``) are installed.
+
+Like the ``json_backends``, they follow the encoding semantics of Django's
+``DateTimeAwareJSONEncoder``: datetimes, dates, times, Decimals and UUIDs are
+encoded as strings, so that consumers get the same values in every format.
+"""
+from json_backends import _default
+from json_backends import _prepare
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+
+MSGPACK = 'application/msgpack'
+CBOR = 'application/cbor'
+
+# Media types of each format, in order of preference. Clients still commonly
+# use the unregistered ``x-`` type of MessagePack
+MSGPACK_TYPES = (MSGPACK, 'application/x-msgpack')
+CBOR_TYPES = (CBOR, )
+
+
+def msgpack_dumps(data):
+    # ``str`` and ``unicode`` strings are both encoded as the MessagePack
+    # string type, rather than ``str`` as binary.
+    return msgpack.packb(data, default=_default, use_bin_type=False)
+
+
+def msgpack_loads(data):
+    """
+    Returns the python data structures of the MessagePack ``data``.
+    Raises ValueError if ``data`` is not valid MessagePack.
+    """
+    try:
+        return msgpack.unpackb(data, raw=False)
+    except Exception, e:
+        raise ValueError(str(e))
+
+
+def cbor_dumps(data):
+    # ``cbor2`` encodes datetimes and Decimals natively(as tagged values), so
+    # the data are prepared beforehand.
+    return cbor2.dumps(_prepare(data))
+
+
+def cbor_loads(data):
+    """
+    Returns the python data structures of the CBOR ``data``.
+    Raises ValueError if ``data`` is not valid CBOR.
+    """
+    try:
+        return cbor2.loads(data)
+    except Exception, e:
+        raise ValueError(str(e))
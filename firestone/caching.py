@@ -0,0 +1,106 @@
+"""
+This module implements the invalidation of the server-side response cache of
+handlers(see ``BaseHandler.cache_responses``).
+
+Every model that a cached response depends on, has a generation counter,
+stored in the same cache backend as the responses. The cache key of a response
+includes the generations of all its models, and the ``post_save``,
+``post_delete`` and ``m2m_changed`` signals of a model bump its generation. So
+a change to any of the models makes all the related responses unreachable,
+without having to find and delete them. They are evicted by the cache backend
+when they expire.
+
+Since the counters live in the cache backend, invalidation works across
+processes, as long as the backend is shared(e.g. memcached, redis).
+"""
+from django.core.cache import caches
+from django.db.models import signals
+import time
+
+
+# Cache aliases of each model's cached responses
+_registry = {}
+
+
+def _get_key(model):
+    opts = model._meta.concrete_model._meta
+    return 'firestone.generation.%s.%s' % (opts.app_label, opts.model_name)
+
+
+def _initial():
+    # A fresh, time-based value, so that a counter which was evicted from the
+    # cache never returns to a value of an earlier generation
+    return int(time.time() * 1000)
+
+
+def get_generations(models, alias='default'):
+    """
+    Returns the current generations of ``models``, in the same order.
+    """
+    cache = caches[alias]
+    keys = [_get_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, _initial(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump(model):
+    """
+    Invalidates the cached responses that depend on ``model``.
+    """
+    key = _get_key(model)
+    for alias in _registry.get(model._meta.concrete_model, ()):
+        cache = caches[alias]
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial(), None)
+
+
+def _receiver(sender, **kwargs):
+    bump(sender)
+
+
+def _m2m_receiver(sender, instance, action, model, **kwargs):
+    # ``sender`` is the intermediate model. Both ends of the relation change.
+    if action.startswith('post_'):
+        bump(instance.__class__)
+        bump(model)
+
+
+def has_other_receivers(signal, model, ignored=()):
+    """
+    Returns whether ``signal`` has receivers for ``model``, other than the
+    invalidation ones of this module and the ``ignored`` ones.
+    """
+    ignored = (_receiver,) + tuple(ignored)
+    return any(
+        receiver not in ignored
+        for receiver in signal._live_receivers(model)
+    )
+
+
+def register(models, alias='default'):
+    """
+    Connects the invalidation signals of ``models``, for the responses cached
+    in cache ``alias``.
+    """
+    for model in models:
+        model = model._meta.concrete_model
+        _registry.setdefault(model, set()).add(alias)
+        uid = 'firestone.caching.%s' % _get_key(model)
+        signals.post_save.connect(
+            _receiver, sender=model, weak=False, dispatch_uid=uid
+        )
+        signals.post_delete.connect(
+            _receiver, sender=model, weak=False, dispatch_uid=uid
+        )
+        for field in model._meta.many_to_many:
+            through = field.rel.through
+            signals.m2m_changed.connect(
+                _m2m_receiver, sender=through, weak=False,
+                dispatch_uid='firestone.caching.%s' % _get_key(through),
+            )
@@ -0,0 +1,54 @@
+"""
+This module defines the helpers of the count strategies that
+``ModelHandler.count_data`` uses for the pagination metadata:
+
+    exact:      ``SELECT COUNT(*)`` on every request.
+    cached:     The exact count, cached in a Django cache backend for a while,
+                per handler and filtering/ordering querystring parameters.
+    estimated:  The planner's row estimate, on backends that expose it
+                (PostgreSQL, MySQL), or the exact count for small results.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+import json
+
+
+EXACT = 'exact'
+CACHED = 'cached'
+ESTIMATED = 'estimated'
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator whose total number of items is given, instead of counted.
+    """
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super(CountedPaginator, self).__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+
+def estimate_count(queryset):
+    """
+    Returns the query planner's estimate of the number of rows of
+    ``queryset``, or None if the database backend doesn't expose one.
+    """
+    connection = connections[queryset.db]
+    vendor = connection.vendor
+    if vendor not in ('postgresql', 'mysql'):
+        return None
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, basestring):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+
+        cursor.execute('EXPLAIN ' + sql, params)
+        columns = [column[0] for column in cursor.description]
+        row = cursor.fetchone()
+        if row is None or 'rows' not in columns:
+            return None
+        return int(row[columns.index('rows')] or 0)
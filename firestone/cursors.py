@@ -0,0 +1,190 @@
+"""
+This module implements the keyset(cursor) pagination of querysets, used by
+``ModelHandler.paginate_cursor``.
+
+Instead of skipping ``OFFSET`` rows, every page is fetched with a condition on
+the ordering columns, relative to the last(or first) item of the previous
+page, e.g. for ordering ``('-created', 'pk')``:
+
+    WHERE created <= x AND (created < x OR (created = x AND id > y))
+
+so that the database can seek into an index on the ordering columns, and the
+latency doesn't depend on how deep the page is.
+
+A cursor is an opaque, URL-safe string that holds the direction of the page
+and the values of the ordering columns of its boundary item.
+"""
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.fields.related import ForeignObjectRel
+from django.core.exceptions import FieldDoesNotExist
+from decimal import Decimal
+import datetime
+import base64
+import json
+import uuid
+
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def get_ordering(queryset):
+    """
+    Returns the ordering of ``queryset`` as a list of ``(lookup, descending,
+    field)`` tuples, with the primary key appended as a tie-breaker. Returns
+    None if the ordering can't be used for keyset pagination: it's random, it
+    includes expressions or ``extra`` ordering, or any of its columns is
+    nullable or a relation.
+    """
+    query = queryset.query
+    if query.extra_order_by:
+        return None
+    if query.order_by:
+        order_by = list(query.order_by)
+    elif query.default_ordering:
+        order_by = list(queryset.model._meta.ordering)
+    else:
+        order_by = []
+
+    model = queryset.model
+    pk = model._meta.pk
+    ordering = []
+    for item in order_by:
+        if not isinstance(item, basestring) or item == '?':
+            return None
+        descending = item.startswith('-')
+        lookup = item.lstrip('-+')
+        field = _resolve(model, lookup)
+        if field is None:
+            return None
+        ordering.append((lookup, descending, field))
+
+    if not any(field == pk for _, _, field in ordering):
+        ordering.append(('pk', False, pk))
+    return ordering
+
+
+def _resolve(model, lookup):
+    """
+    Returns the non-nullable, non-relational field that ``lookup`` refers to,
+    starting from ``model``, or None.
+    """
+    parts = lookup.split(LOOKUP_SEP)
+    field = None
+    for i, part in enumerate(parts):
+        if part == 'pk':
+            part = model._meta.pk.name
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if isinstance(field, ForeignObjectRel) or field.null \
+                or field.many_to_many:
+            return None
+        if field.is_relation:
+            if i == len(parts) - 1:
+                return None
+            model = field.related_model
+    return field
+
+
+def get_values(item, ordering):
+    """
+    Returns the values of the ordering columns of model instance ``item``.
+    """
+    values = []
+    for lookup, _, field in ordering:
+        value = item
+        for part in lookup.split(LOOKUP_SEP)[:-1]:
+            value = getattr(value, part)
+        values.append(getattr(value, field.attname))
+    return values
+
+
+def encode(direction, values):
+    """
+    Returns the cursor of the page in ``direction``(``NEXT`` or
+    ``PREVIOUS``), whose boundary item has the ordering column ``values``.
+    """
+    values = [_encode_value(value) for value in values]
+    text = json.dumps([direction] + values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(text).rstrip('=')
+
+
+def decode(cursor, ordering):
+    """
+    Returns the ``(direction, values)`` of ``cursor``.
+
+    Raises:
+        InvalidCursor
+    """
+    try:
+        cursor = str(cursor)
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(text)
+        direction, values = data[0], data[1:]
+    except (TypeError, ValueError, IndexError, UnicodeError):
+        raise InvalidCursor
+    if direction not in (NEXT, PREVIOUS) or len(values) != len(ordering):
+        raise InvalidCursor
+
+    try:
+        values = [
+            field.to_python(value)
+            for value, (_, _, field) in zip(values, ordering)
+        ]
+    except Exception:
+        raise InvalidCursor
+    if None in values:
+        raise InvalidCursor
+    return direction, values
+
+
+def _encode_value(value):
+    """
+    Encodes ``value`` losslessly to a JSON compatible value, that the
+    ``to_python`` method of its field can decode.
+    """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def seek(queryset, ordering, values, reverse=False):
+    """
+    Returns ``queryset`` filtered to the items that come after the ones with
+    ordering column ``values``(or before them, if ``reverse`` is True).
+    """
+    conditions = Q()
+    for i in reversed(range(len(ordering))):
+        lookup, descending, _ = ordering[i]
+        operator = 'lt' if descending != reverse else 'gt'
+        condition = Q(**{'%s__%s' % (lookup, operator): values[i]})
+        if i < len(ordering) - 1:
+            condition |= Q(**{lookup: values[i]}) & conditions
+        conditions = condition
+
+    # Redundant bound on the first column, so that the database can seek to
+    # the start of the page with an index range scan
+    lookup, descending, _ = ordering[0]
+    operator = 'lte' if descending != reverse else 'gte'
+    return queryset.filter(
+        Q(**{'%s__%s' % (lookup, operator): values[0]}) & conditions
+    )
+
+
+def order(queryset, ordering, reverse=False):
+    """
+    Returns ``queryset`` ordered by ``ordering``, or by its reverse.
+    """
+    return queryset.order_by(*[
+        ('-' if descending != reverse else '') + lookup
+        for lookup, descending, _ in ordering
+    ])
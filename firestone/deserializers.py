@@ -3,14 +3,21 @@ The ``deserializers`` module exposes the classes responsible for
 deserializing the request bodies of incoming requests to python deta
 structures, according to the ``Content-type`` header
 """
+from django.conf import settings
 import exceptions
-import json
+import json_backends
+import binary_formats
+import streams
 import urlparse
+from StringIO import StringIO
+import codecs
 
 
 def _json_deserializer(data):
+    # Decoded by the backend selected with the ``FIRESTONE_JSON_BACKEND``
+    # setting
     try:
-        return json.loads(data)
+        return json_backends.get_backend().loads(data)
     except ValueError:
         raise
 
@@ -27,48 +34,295 @@ def _form_encoded_data_deserializer(data):
     # vaule of each key
     return {key: value[0] for key, value in dic.iteritems()}
 
+
+def _ndjson_deserializer(data):
+    # List of the values of the lines
+    return list(streams.iter_ndjson(StringIO(data).read))
+
+
 MAPPER = {
     'application/json': _json_deserializer,
     'application/x-www-form-urlencoded': _form_encoded_data_deserializer,
+    streams.NDJSON: _ndjson_deserializer,
+}
+# Binary formats, if their libraries are installed
+if binary_formats.msgpack is not None:
+    MAPPER.update(dict.fromkeys(
+        binary_formats.MSGPACK_TYPES, binary_formats.msgpack_loads
+    ))
+if binary_formats.cbor2 is not None:
+    MAPPER.update(dict.fromkeys(
+        binary_formats.CBOR_TYPES, binary_formats.cbor_loads
+    ))
+
+
+# Media type -> incremental parser of the request stream, for the bodies that
+# may be streamed(see ``stream_request_body``)
+STREAM_MAPPER = {
+    'application/json': streams.parse_json,
+    streams.NDJSON: streams.iter_ndjson,
 }
 
 
+# Structured syntax suffixes(RFC 6839) -> media type whose deserializer
+# handles them, e.g. ``application/vnd.api+json`` -> ``application/json``
+SUFFIXES = {
+    'json': 'application/json',
+    'msgpack': binary_formats.MSGPACK,
+    'cbor': binary_formats.CBOR,
+}
+
+# Raw ``Content-Type`` header -> (media type, parameters). A plain
+# dictionary, rather than an ``LRUCache``, since lookups without locking are
+# cheaper than reparsing. It's emptied whenever it grows past
+# ``FIRESTONE_CONTENT_TYPE_CACHE_SIZE`` entries(256 by default), which real
+# traffic, with its handful of distinct headers, never reaches.
+_parsed = {}
+
+
+def parse_content_type(content_type):
+    """
+    Parses the ``Content-Type`` header ``content_type``, e.g.
+    ``application/json; charset=utf-8``.
+
+    Returns:
+        ``(media type, parameters)``, with the media type lowercased and the
+        parameters in a dictionary keyed by their lowercased names. The
+        result is cached, and should not be modified.
+    """
+    parsed = _parsed.get(content_type)
+    if parsed is not None:
+        return parsed
+
+    parts = content_type.split(';')
+    params = {}
+    for param in parts[1:]:
+        key, _, value = param.partition('=')
+        key = key.strip().lower()
+        if key:
+            params[key] = value.strip().strip('"')
+
+    parsed = parts[0].strip().lower(), params
+    if len(_parsed) >= getattr(settings, 'FIRESTONE_CONTENT_TYPE_CACHE_SIZE',
+                               256):
+        _parsed.clear()
+    _parsed[content_type] = parsed
+    return parsed
+
+
+def get_deserializer(media_type, mapper=None):
+    """
+    Returns the deserializer of ``media_type``, a lowercased media type
+    without parameters, looked up in ``mapper`` and then in ``MAPPER``, or
+    None. Media types with a structured syntax suffix, like ``+json``,
+    fall back to the deserializer of their suffix(see ``SUFFIXES``).
+    """
+    for mapping in (mapper or {}, MAPPER):
+        if media_type in mapping:
+            return mapping[media_type]
+
+    _, plus, suffix = media_type.rpartition('+')
+    if plus and suffix in SUFFIXES:
+        return get_deserializer(SUFFIXES[suffix], mapper)
+
+    return None
+
+
 def _get_deserializer(content_type):
     """
     Get the deserializer for the given ``content_type``
     """
-    content_type = content_type.lower()
+    return get_deserializer(parse_content_type(content_type)[0])
 
-    for key, value in MAPPER.items():
-        if content_type.startswith(key):
-            return value
 
-    return None
+# Text codecs that are not character encodings of documents
+NON_CHARSET_CODECS = frozenset([
+    'idna', 'punycode', 'unicode-escape', 'raw-unicode-escape',
+    'string-escape', 'unicode-internal',
+])
 
 
-def deserialize(data, content_type):
+def lookup_charset(charset):
     """
-    Deserialized ``data``, according to ``content_type``
+    Returns the ``codecs.CodecInfo`` of the ``charset`` parameter of a
+    ``Content-Type`` header. Only character encodings are accepted, and not
+    codecs like ``zlib`` or ``base64``, which would let a small request body
+    decode to an arbitrarily large one.
+
+    Raises:
+        exceptions.UnsupportedMediaType: Unknown ``charset``, or not a
+        character encoding
+    """
+    try:
+        codec = codecs.lookup(charset)
+    except LookupError:
+        raise exceptions.UnsupportedMediaType
+
+    if not getattr(codec, '_is_text_encoding', True) \
+            or codec.name in NON_CHARSET_CODECS:
+        raise exceptions.UnsupportedMediaType
+    return codec
+
+
+def _transcode(data, charset):
+    """
+    Returns ``data``, encoded in ``charset``, re-encoded in UTF-8, which is
+    what the deserializers expect.
+
+    Raises:
+        exceptions.UnsupportedMediaType: Unknown ``charset``(see
+        ``lookup_charset``)
+        exceptions.BadRequest: ``data`` is not valid in ``charset``
+    """
+    codec = lookup_charset(charset)
+    if codec.name in ('utf-8', 'ascii'):
+        return data
+
+    try:
+        return data.decode(codec.name).encode('utf-8')
+    except UnicodeError:
+        raise exceptions.BadRequest('Invalid data')
+
+
+def deserialize(data, content_type, mapper=None):
+    """
+    Deserialized ``data``, according to ``content_type``. The deserializers
+    of ``mapper``(media type -> deserializer) take precedence over the ones
+    of ``MAPPER``.
     """
     if not content_type:
         raise exceptions.UnsupportedMediaType
 
-    ds = _get_deserializer(content_type)
+    media_type, params = parse_content_type(content_type)
+    ds = get_deserializer(media_type, mapper)
     if not ds:
         raise exceptions.UnsupportedMediaType
 
+    if 'charset' in params:
+        data = _transcode(data, params['charset'])
+
     try:
         return ds(data)
     except ValueError:
         raise exceptions.BadRequest('Invalid data')
 
 
-def deserialize_request_body(request, *args, **kwargs):
+def deserialize_request_body(request, mapper=None):
     """
     Deserializes the request body, according to its Content-Type header
     """
     try:
         return deserialize(request.body,
-                           request.META.get('CONTENT_TYPE', None))
+                           request.META.get('CONTENT_TYPE', None),
+                           mapper)
     except (exceptions.UnsupportedMediaType, exceptions.BadRequest):
         raise
+
+
+def get_stream_parser(media_type, mapper=None):
+    """
+    Returns the incremental parser of ``media_type``(see ``STREAM_MAPPER``),
+    or None if it can't be streamed, or if ``mapper`` overrides its
+    deserializer.
+    """
+    if media_type in (mapper or {}):
+        return None
+    if media_type in STREAM_MAPPER:
+        return STREAM_MAPPER[media_type]
+
+    _, plus, suffix = media_type.rpartition('+')
+    if plus and suffix in SUFFIXES:
+        return get_stream_parser(SUFFIXES[suffix], mapper)
+
+    return None
+
+
+def _transcoding_reader(read, charset):
+    """
+    Returns a ``read`` function that re-encodes the data of ``read``, encoded
+    in ``charset``, in UTF-8. Like ``_transcode``, for streams.
+    """
+    codec = lookup_charset(charset)
+    if codec.name in ('utf-8', 'ascii'):
+        return read
+    decoder = codec.incrementaldecoder()
+
+    def transcode(size):
+        while True:
+            data = read(size)
+            text = decoder.decode(data, not data)
+            # Data that end in the middle of a character are decoded with
+            # the next read
+            if text or not data:
+                return text.encode('utf-8')
+
+    return transcode
+
+
+class StreamedBody(object):
+    """
+    Iterable of the items of a request body, that are parsed from the request
+    stream as it's iterated. It can only be iterated once.
+    """
+    def __init__(self, items):
+        self.items = items
+        # Number of items read so far
+        self.count = 0
+
+    def __iter__(self):
+        try:
+            for item in self.items:
+                self.count += 1
+                yield item
+        except (ValueError, UnicodeError):
+            raise exceptions.BadRequest('Invalid data')
+
+    def chunks(self, size):
+        """
+        Yields ``(offset, items)`` for lists of up to ``size`` consecutive
+        items, where ``offset`` is the position of the first one in the body.
+        """
+        chunk = []
+        offset = 0
+        for item in self:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield offset, chunk
+                offset += size
+                chunk = []
+        if chunk:
+            yield offset, chunk
+
+
+def stream_request_body(request, mapper=None):
+    """
+    Deserializes the request body, according to its Content-Type header, like
+    ``deserialize_request_body``. JSON arrays and NDJSON bodies are parsed
+    incrementally, from the request stream.
+
+    Returns:
+        ``StreamedBody`` of the items of the body, if it's streamed, or else
+        the deserialized body.
+    """
+    content_type = request.META.get('CONTENT_TYPE', None)
+    if not content_type:
+        raise exceptions.UnsupportedMediaType
+
+    media_type, params = parse_content_type(content_type)
+    parser = get_stream_parser(media_type, mapper)
+    if parser is None:
+        return deserialize_request_body(request, mapper)
+
+    read = request.read
+    if 'charset' in params:
+        read = _transcoding_reader(read, params['charset'])
+
+    try:
+        data = parser(read)
+    except (ValueError, UnicodeError):
+        raise exceptions.BadRequest('Invalid data')
+
+    # A JSON document other than an array is decoded in full
+    if not hasattr(data, 'next'):
+        return data
+    return StreamedBody(data)
@@ -27,6 +27,23 @@ class APIException(Exception):
         raise NotImplementedError
 
 
+class NotModified(APIException):
+    """
+    When a conditional GET request's preconditions(``If-None-Match``,
+    ``If-Modified-Since``) show that the client already holds the current
+    representation.
+    """
+    def __init__(self, headers=None):
+        self.status = 304
+        self.headers = headers or {}
+
+    def get_response(self, request):
+        res = http.HttpResponseNotModified()
+        for key, value in self.headers.items():
+            res[key] = value
+        return res
+
+
 class MethodNotAllowed(APIException):
     def __init__(self, allowed_methods=()):
         self.status = 405
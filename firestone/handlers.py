@@ -1,17 +1,231 @@
 from authentication import Authentication
 from authentication import NoAuthentication
 from serializers import SerializerMixin
-from preserialize import serialize as preserializer
+from serializers import StreamedData
+from preserialize.utils import parse_selectors
+import plans
+import cursors
+import counts
+import caching
+import users
 import deserializers
 import exceptions
 from django.conf import settings
 from django.db import connection
+from django.db import connections
+from django.db import router
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import signals
+from django.db.models.deletion import Collector
+from django.db.models.query import QuerySet
+from django.core.exceptions import FieldDoesNotExist
 from django.core.exceptions import ImproperlyConfigured
 from django.core.exceptions import ValidationError
+from django.core.cache import caches
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core.signing import TimestampSigner
 from endless_pagination.paginators import LazyPaginator
+from django.utils.http import http_date
+from django.utils.http import parse_http_date_safe
 from itsdangerous import TimedJSONWebSignatureSerializer
+import calendar
+import copy
+import datetime
+import hashlib
+import itertools
+
+
+def _get_related_lookups(model, template, prefix='', prefetch=False,
+                         path=()):
+    """
+    Walks ``template``, the ``django-preserialize`` template of ``model``,
+    and returns the lookups that fetch the related objects its serialization
+    will access, as a list of ``(field, kind, lookup)`` tuples. ``field`` is
+    the template field(output name) the lookup serves, and ``kind`` is
+    either ``select_related``(forward foreign keys and one-to-one fields) or
+    ``prefetch_related``(reverse relations and many-to-many fields, and
+    everything nested under them).
+    """
+    # Accessor name -> relation field, including reverse relations
+    relations = {}
+    for field in model._meta.get_fields():
+        if not field.is_relation or not field.related_model:
+            continue
+        if field.concrete:
+            relations[field.name] = field
+        else:
+            relations[field.get_accessor_name()] = field
+
+    aliases = template.get('aliases', {})
+    related = template.get('related', {})
+    fields = parse_selectors(
+        model, template.get('fields', None), template.get('exclude', None)
+    )
+
+    lookups = []
+    for alias in fields:
+        accessor = aliases.get(alias, alias)
+        field = relations.get(accessor, None)
+        if field is None:
+            continue
+
+        options = related.get(accessor, {})
+        # Related querysets that get filtered or turned to values, are
+        # fetched with queries of their own anyway.
+        if options.get('prehook') or options.get('values_list'):
+            continue
+
+        if prefetch or field.one_to_many or field.many_to_many \
+                or not field.concrete:
+            kind = 'prefetch_related'
+        else:
+            kind = 'select_related'
+        lookup = prefix + accessor
+        lookups.append((alias, kind, lookup))
+
+        # Guard against cyclic relations
+        related_model = field.related_model
+        if related_model in path + (model,):
+            continue
+        for _, sub_kind, sub_lookup in _get_related_lookups(
+                related_model, options, lookup + '__',
+                kind == 'prefetch_related', path + (model,)):
+            lookups.append((alias, sub_kind, sub_lookup))
+
+    return lookups
+
+
+def _get_template_columns(model, template, prefix='', path=()):
+    """
+    Returns a dictionary that maps each field(output name) of ``template``,
+    the ``django-preserialize`` template of ``model``, to the columns that
+    its serialization needs, as ``QuerySet.only`` lookups. Reverse relations
+    and many-to-many fields need no column other than the primary key.
+    Foreign keys need their own column, plus the columns of the related
+    template, if they are selected with ``select_related``. Template fields
+    that aren't model fields(methods, properties, other attributes) are left
+    out, since the columns they use can't be known, and so are foreign keys
+    whose related template has such fields.
+    """
+    fields = {}
+    for field in model._meta.get_fields():
+        if field.concrete:
+            fields[field.name] = field
+        elif field.is_relation:
+            fields[field.get_accessor_name()] = field
+
+    aliases = template.get('aliases', {})
+    related = template.get('related', {})
+    columns = {}
+    selectors = parse_selectors(
+        model, template.get('fields', None), template.get('exclude', None)
+    )
+    for alias in selectors:
+        accessor = aliases.get(alias, alias)
+        field = fields.get(accessor, None)
+        if field is None or (field.is_relation and not field.related_model):
+            continue
+
+        if not field.concrete or field.many_to_many:
+            columns[alias] = ()
+            continue
+
+        columns[alias] = (prefix + field.name,)
+        options = related.get(accessor, {})
+        if not field.is_relation or field.related_model in path + (model,) \
+                or options.get('prehook') or options.get('values_list'):
+            continue
+        related_columns = _get_template_columns(
+            field.related_model, options, prefix + field.name + '__',
+            path + (model,)
+        )
+        related_selectors = parse_selectors(
+            field.related_model, options.get('fields', None),
+            options.get('exclude', None)
+        )
+        if not set(related_selectors).issubset(related_columns):
+            del columns[alias]
+            continue
+        for lookups in related_columns.values():
+            columns[alias] += lookups
+
+    return columns
+
+
+def _get_values_fields(model, template):
+    """
+    Returns a dictionary that maps each field(output name) of ``template``,
+    the ``django-preserialize`` template of ``model``, that is a local
+    non-relational model field, to that field. Returns None if the template
+    uses ``django-preserialize`` options that change the representation of
+    the items, in which case they can't be serialized from ``QuerySet.values``
+    rows.
+    """
+    options = dict(getattr(settings, 'PRESERIALIZE_OPTIONS', {}), **template)
+    for option in ('prefix', 'camelcase', 'values_list', 'prehook',
+                   'posthook'):
+        if options.get(option):
+            return None
+
+    aliases = template.get('aliases', {})
+    fields = {}
+    selectors = parse_selectors(
+        model, template.get('fields', None), template.get('exclude', None)
+    )
+    for alias in selectors:
+        try:
+            field = model._meta.get_field(aliases.get(alias, alias))
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and not field.is_relation:
+            fields[alias] = field
+
+    return fields
+
+
+def _get_template_models(model, template, path=()):
+    """
+    Returns the set of ``model`` and the models of the related objects that
+    the serialization of ``template``, the ``django-preserialize`` template of
+    ``model``, includes.
+    """
+    models = set([model])
+    if model in path:
+        return models
+
+    related = {}
+    for field in model._meta.get_fields():
+        if field.is_relation and field.related_model:
+            name = field.name if field.concrete else field.get_accessor_name()
+            related[name] = field.related_model
+
+    aliases = template.get('aliases', {})
+    selectors = parse_selectors(
+        model, template.get('fields', None), template.get('exclude', None)
+    )
+    for alias in selectors:
+        accessor = aliases.get(alias, alias)
+        if accessor in related:
+            models |= _get_template_models(
+                related[accessor],
+                template.get('related', {}).get(accessor, {}),
+                path + (model,)
+            )
+
+    return models
+
+
+def _etag_matches(etag, if_none_match):
+    """
+    Weak comparison of ``etag`` with the value of an ``If-None-Match`` header.
+    """
+    etags = [value.strip() for value in if_none_match.split(',')]
+    etags = [value[2:] if value.startswith('W/') else value for value in etags]
+    if etag.startswith('W/'):
+        etag = etag[2:]
+    return '*' in etags or etag in etags
 
 
 class HandlerMetaClass(type):
@@ -39,12 +253,48 @@ class HandlerMetaClass(type):
 
         cls = type.__new__(meta, name, bases, attrs)
 
+        # Precompute the serialization formats of ``MAPPER``, in order of
+        # preference, for the content negotiation
+        cls.get_serialization_formats()
+
         # Uppercase all HTTP methods
         cls.http_methods = [method.upper() for method in cls.http_methods]
 
-        # Transform to sets
-        cls.post_body_fields = set(cls.post_body_fields)
-        cls.put_body_fields = set(cls.put_body_fields)
+        # Transform to frozensets, so that ``cleanse_body`` checks the keys of
+        # each request body item with a single set operation
+        cls.post_body_fields = frozenset(cls.post_body_fields)
+        cls.put_body_fields = frozenset(cls.put_body_fields)
+
+        # Precompute the ``select_related`` and ``prefetch_related`` lookups
+        # that the serialization of the ``template`` needs. See
+        # ``ModelHandler.apply_related_lookups``
+        # Likewise for the columns and the ``QuerySet.values`` fields it
+        # needs. See ``ModelHandler.apply_column_pruning`` and
+        # ``ModelHandler.get_values_fields``
+        if getattr(cls, 'model', None):
+            cls.related_lookups = tuple(
+                _get_related_lookups(cls.model, cls.template)
+            )
+            cls.template_columns = _get_template_columns(
+                cls.model, cls.template
+            )
+            cls.values_fields = _get_values_fields(cls.model, cls.template)
+        else:
+            cls.related_lookups = ()
+            cls.template_columns = {}
+            cls.values_fields = None
+
+        # Models whose changes invalidate the cached responses of the handler.
+        # See ``cache_responses``
+        if cls.cache_responses and getattr(cls, 'model', None):
+            cls.cache_models = tuple(sorted(
+                _get_template_models(cls.model, cls.template),
+                key=lambda model: (model._meta.app_label,
+                                   model._meta.model_name),
+            ))
+            caching.register(cls.cache_models, cls.response_cache_alias)
+        else:
+            cls.cache_models = ()
 
         # Make sure all method names declared in ``filters`` are defined in the
         # class
@@ -79,6 +329,11 @@ class HandlerControlFlow(object):
         """
         try:
             self.preprocess()
+
+            res = self.get_cached_response()
+            if res is not None:
+                return res
+
             data, pagination = self.process()
             dic = self.postprocess(
                 data, pagination,
@@ -87,6 +342,8 @@ class HandlerControlFlow(object):
             # If you want to alter the response object, override handler's
             # ``get_response`` method
             res = self.get_response(dic)
+            res = self.patch_response(res, self.validators)
+            self.cache_response(res)
 
         except Exception, e:
             res = self.handle_exception(e)
@@ -122,6 +379,11 @@ class HandlerControlFlow(object):
         except (exceptions.UnsupportedMediaType, exceptions.BadRequest):
             raise
 
+        # Streamed request bodies are cleansed and validated in chunks, while
+        # they're processed. See ``ModelHandler.post_stream``
+        if isinstance(self.request.data, deserializers.StreamedBody):
+            return
+
         # Remove disallowed request body fields
         self.cleanse_body()
         # Validate request body
@@ -139,6 +401,7 @@ class HandlerControlFlow(object):
             If no pagination was performed, ``pagination`` is {}.
         """
         data = getattr(self, self.request.method.lower())()
+        self.evaluate_preconditions(data)
         data, pagination = self.paginate(data)
         return data, pagination
 
@@ -208,9 +471,32 @@ class BaseHandler(HandlerControlFlow):
     # signing class
     jwt_signer = TimedJSONWebSignatureSerializer(settings.SECRET_KEY)
 
+    # Parameter applicable for ``JWTAuthentication`` mixin. It resolves the
+    # user id of a verified token to a User instance. Set it to a
+    # ``users.CachedUserResolver`` instance to cache the users, and save the
+    # database query of every request
+    jwt_user_resolver = users.UserResolver()
+
+    # Parameter applicable for ``JWTAuthentication`` mixin. Set it to a
+    # ``tokens.TokenCache`` instance to skip the signature verification of
+    # tokens that have already been verified
+    jwt_token_cache = None
+
+    # Additional request body formats of the handler, as a dictionary of
+    # media type -> deserializer, that take precedence over the ones of
+    # ``deserializers.MAPPER``. A deserializer is a callable, or the name of a
+    # handler method, that takes the request body and returns python data
+    # structures. It should raise ValueError for invalid bodies.
+    body_deserializers = {}
+
     # Allowed request body fields for POST and PUT requests
     post_body_fields = put_body_fields = []
 
+    # Set to True to reject request bodies that contain any fields other than
+    # the allowed ones, with a BadRequest error that lists them, instead of
+    # silently dropping them. See ``cleanse_item``.
+    strict_body_fields = False
+
     # Filters, declared as strings. Each string indicates the method name of
     # each filter. Every method's signature is ``(self, data)``
     # The method should define all its logic, and return a subset of ``data``.
@@ -225,10 +511,40 @@ class BaseHandler(HandlerControlFlow):
     # Generating metadata can, at times, perform costly queries.
     pagination_metadata = True
 
+    # Set to True to stream the response of plural GET requests. The
+    # queryset is then iterated and serialized one item at a time, while the
+    # response is being written, so that the memory usage doesn't depend on
+    # the size of the result. Note that the response status can't change
+    # after streaming has started.
+    stream_response = False
+
+    # Validator headers(``ETag``, ``Last-Modified``) of the response, set by
+    # ``evaluate_preconditions`` on GET requests of handlers that define a
+    # fingerprint(see ``get_fingerprint``).
+    validators = {}
+
+    # Set to True to cache the responses of GET requests, in the
+    # ``response_cache_alias`` cache, for ``response_cache_timeout`` seconds.
+    # Responses are cached per URL arguments, querystring, serialization
+    # format and user(see the authentication mixin's ``get_cache_scope``).
+    # On ``ModelHandler``s, saving or deleting any instance of the ``model``,
+    # or of the related models that the ``template`` includes, invalidates
+    # them(see module ``caching``). Changes that don't send signals(e.g.
+    # ``QuerySet.update``) outside the handlers, don't.
+    cache_responses = False
+    response_cache_alias = 'default'
+    response_cache_timeout = 300
+    # Cache key of the response, set by ``get_cached_response``
+    response_cache_key = None
+
     # Filename of Excel attachment in case a request needs the response data
     # serialized to an excel file. Can be a string or a callable that returns a
     # string
     excel_filename = 'file.xls'
+    # Filenames of the CSV, TSV and XLSX attachments, likewise
+    csv_filename = 'file.csv'
+    tsv_filename = 'file.tsv'
+    xlsx_filename = 'file.xlsx'
 
     def authentication_hook(self):
         """
@@ -274,37 +590,99 @@ class BaseHandler(HandlerControlFlow):
         try:
             self.request.data = deserializers.deserialize_request_body(
                 self.request,
-                *self.args,
-                **self.kwargs
+                self.get_body_deserializers(),
             )
         except (exceptions.UnsupportedMediaType, exceptions.BadRequest):
             raise
 
+    def get_body_deserializers(self):
+        """
+        Invoked by ``deserialize_body``.
+
+        Returns:
+            Dictionary of the handler's ``body_deserializers``, with method
+            names resolved to the handler's methods.
+        """
+        return {
+            media_type: isinstance(ds, basestring) and getattr(self, ds) or ds
+            for media_type, ds in self.body_deserializers.items()
+        }
+
     def cleanse_body(self):
         """
         Invoked by ``preprocess``.
-        Scans request body and only lets the allowed fields go through.
-
+        Scans request body and only lets the allowed fields go through(see
+        ``cleanse_item``).
 
         Returns:
             None
-        """
-        if self.request.method.upper() == 'POST':
-            if isinstance(self.request.data, dict):
-                for key in self.request.data.keys():
-                    if key not in self.post_body_fields:
-                        self.request.data.pop(key)
+        Raises:
+            exceptions.BadRequest: If ``strict_body_fields`` is set, and the
+            body contains fields that are not allowed
+        """
+        method = self.request.method.upper()
+        if method == 'POST':
+            fields = self.post_body_fields
+        elif method == 'PUT':
+            fields = self.put_body_fields
+        else:
+            return
 
-            if isinstance(self.request.data, list):
-                for dic in self.request.data:
-                    for key in dic.keys():
-                        if key not in self.post_body_fields:
-                            dic.pop(key)
+        # The metaclass has made them frozensets, unless they were set on
+        # the instance
+        if not isinstance(fields, frozenset):
+            fields = frozenset(fields)
 
-        elif self.request.method.upper() == 'PUT':
-            for key in self.request.data.keys():
-                if key not in self.put_body_fields:
-                    self.request.data.pop(key)
+        data = self.request.data
+        if isinstance(data, dict):
+            self.request.data = self.cleanse_item(data, fields)
+
+        elif isinstance(data, list) and method == 'POST':
+            # Bodies without any disallowed fields, the common case, are
+            # checked without a python level loop
+            if all(itertools.imap(fields.issuperset, data)):
+                return
+            try:
+                self.request.data = [
+                    self.cleanse_item(item, fields) for item in data
+                ]
+            except exceptions.BadRequest, e:
+                # Position of the invalid item. See ``post_stream``
+                e.index = next((
+                    index for index, item in enumerate(data)
+                    if not fields.issuperset(item)
+                ), None)
+                raise
+
+    def cleanse_item(self, item, fields):
+        """
+        Invoked by ``cleanse_body``.
+
+        Args:
+            item: Dictionary of the request body
+            fields: Frozenset of the allowed fields
+        Returns:
+            ``item``, without the fields that are not allowed.
+        Raises:
+            exceptions.BadRequest: If ``strict_body_fields`` is set, and
+            ``item`` contains fields that are not allowed. Each of them is
+            mapped to an error.
+        """
+        # The disallowed fields are found with a single set operation, and
+        # removed in place. Building a new dictionary per item is slower,
+        # since every new dictionary adds to the garbage collector's work.
+        unknown = item.viewkeys() - fields
+        if not unknown:
+            return item
+
+        if self.strict_body_fields:
+            raise exceptions.BadRequest({
+                key: ['Unknown field.'] for key in unknown
+            })
+
+        for key in unknown:
+            del item[key]
+        return item
 
     def inject_data_hook(self, data):
         """
@@ -331,12 +709,48 @@ class BaseHandler(HandlerControlFlow):
         Returns:
             Serialized data.
         """
+        plan = self.get_serialization_plan()
+
+        if self.is_streaming(data):
+            # Items are serialized one by one, while the response is being
+            # written
+            return StreamedData(data, plan.serialize)
+
+        return plan.serialize(data)
+
+    def get_serialization_plan(self):
+        """
+        Invoked by ``serialize_to_python``.
+        Returns the compiled ``template``(see module ``plans``), limited
+        to the request-level field selection. Plans are cached per handler
+        class and field selection, and recompiled if the handler's
+        ``template`` is replaced, or modified in place.
+        """
+        key = (self.__class__, frozenset(self.request.GET.getlist('field')))
+        template, snapshot, plan = plans.cache.get(key, (None, None, None))
+        if template is not self.template or snapshot != self.template:
+            plan = plans.compile_template(self.get_template())
+            plans.cache.set(
+                key, (self.template, copy.deepcopy(self.template), plan)
+            )
+
+        return plan
+
+    def get_template(self):
+        """
+        Invoked by ``get_serialization_plan``(and ``ModelHandler`` methods
+        ``apply_column_pruning`` and ``get_values_fields``).
+        Returns the handler's ``template``, limited to the fields of the
+        request-level field selection defined by querystring parameter
+        ``field``, if any.
+        """
         # NOTE: The request level field selection doesn not work if the
         # handler's ``template`` attribute uses ``django-preserialize``'s
         # pseudo selectors
         # See
         # <https://github.com/bruth/django-preserialize#my-model-has-a-ton-of-fields-and-i-dont-want-to-type-them-all-out-what-do-i-do>
         # It only works when the ``fields`` are defined one by one in a list.
+        template = self.template
         field_selection = set(self.request.GET.getlist('field'))
         if field_selection:
             intersection = field_selection.intersection(
@@ -344,9 +758,28 @@ class BaseHandler(HandlerControlFlow):
             )
             template = {key: value for key, value in self.template.items()}
             template['fields'] = intersection
-            return preserializer.serialize(data, **template)
 
-        return preserializer.serialize(data, **self.template)
+        return template
+
+    def is_streaming(self, data):
+        """
+        Invoked by ``serialize_to_python``.
+        Checks whether the response should be streamed: The handler has
+        ``stream_response`` set, it's a GET request, the result of the
+        operation is a queryset, and the requested serialization format can
+        be streamed.
+
+        Args:
+            data: Result of the handler's operation
+        Returns:
+            True or False
+        """
+        return (
+            self.stream_response
+            and self.request.method.upper() == 'GET'
+            and isinstance(data, QuerySet)
+            and self.get_serialization_format() in self.STREAMING_MAPPER
+        )
 
     def finalize_pending(self, data):
         """
@@ -362,7 +795,7 @@ class BaseHandler(HandlerControlFlow):
         if self.request.method.upper() == 'DELETE':
             data.delete()
 
-    def package(self, data, pagination):
+    def package(self, data, pagination, count=None):
         """
         Invoked by ``postprocess``.
         Wraps the ``data`` and ``pagiantion`` data a dictionary.
@@ -371,12 +804,18 @@ class BaseHandler(HandlerControlFlow):
             data: Data result of the handler's operation, serialized in python
             data structures
             pagination: Dictionary with pagination data
+            count: Number of items the operation refers to. Computed from
+            ``data`` if not given.
         Returns:
             Dictionary
         """
-        count = 1
-        if isinstance(data, (dict, list, tuple, set)):
-            count = len(data)
+        if count is None:
+            count = 1
+            if isinstance(data, (dict, list, tuple, set)):
+                count = len(data)
+            elif isinstance(data, StreamedData):
+                # Counted by the serializer, while streaming
+                count = None
 
         ret = {'data': data, 'count': count}
 
@@ -402,7 +841,7 @@ class BaseHandler(HandlerControlFlow):
             for item in connection.queries
         ]
 
-        return {
+        ret = {
             'total_query_time': sum(
                 [float(dic['time']) for dic in connection.queries]
             ),
@@ -410,6 +849,163 @@ class BaseHandler(HandlerControlFlow):
             'query_log': readable_connection_queries,
         }
 
+        # Hit/miss counters of the JWT user and token caches, if any
+        user_resolver_stats = self.jwt_user_resolver.get_stats()
+        if user_resolver_stats is not None:
+            ret['user_resolver'] = user_resolver_stats
+        if self.jwt_token_cache is not None:
+            ret['token_cache'] = self.jwt_token_cache.get_stats()
+        return ret
+
+    def get_fingerprint(self, data):
+        """
+        Invoked by ``evaluate_preconditions``.
+        Override to enable conditional GET requests. It should cheaply
+        compute a value that changes whenever the representation of ``data``
+        changes(e.g. the latest modification time and the number of items),
+        without serializing ``data``.
+
+        Args:
+            data: Result of the handler's operation
+        Returns:
+            (fingerprint, last_modified), where ``last_modified`` is a
+            datetime or None, or None if conditional requests are not
+            supported.
+        """
+        return None
+
+    def evaluate_preconditions(self, data):
+        """
+        Invoked by ``process``.
+        On GET requests, computes the ``ETag`` and ``Last-Modified``
+        validators of the response from the fingerprint of ``data``, and
+        evaluates the request's ``If-None-Match`` or(in its absence)
+        ``If-Modified-Since`` header against them. The ``ETag`` also depends
+        on the handler, the requested path and querystring, the ``Accept``
+        header and the user.
+
+        Args:
+            data: Result of the handler's operation
+        Raises:
+            exceptions.NotModified: if the client's representation is current
+        """
+        if self.request.method.upper() != 'GET':
+            return
+        fingerprint = self.get_fingerprint(data)
+        if fingerprint is None:
+            return
+
+        fingerprint, last_modified = fingerprint
+        user = getattr(self.request, 'user', None)
+        signature = repr((
+            self.__class__.__module__, self.__class__.__name__,
+            self.request.get_full_path(),
+            self.request.META.get('HTTP_ACCEPT', ''),
+            getattr(user, 'pk', None), fingerprint,
+        ))
+        etag = 'W/"%s"' % hashlib.md5(signature).hexdigest()
+        self.validators = {'ETag': etag}
+        if isinstance(last_modified, datetime.datetime):
+            last_modified = calendar.timegm(last_modified.utctimetuple())
+            self.validators['Last-Modified'] = http_date(last_modified)
+
+        self.check_preconditions(self.validators)
+
+    def check_preconditions(self, validators):
+        """
+        Invoked by ``evaluate_preconditions`` and ``get_cached_response``.
+        Evaluates the request's ``If-None-Match`` or(in its absence)
+        ``If-Modified-Since`` header against the ``ETag`` and
+        ``Last-Modified`` validators of the response.
+
+        Args:
+            validators: Dictionary of the validator headers of the response
+        Raises:
+            exceptions.NotModified: if the client's representation is current
+        """
+        etag = validators.get('ETag', None)
+        if_none_match = self.request.META.get('HTTP_IF_NONE_MATCH', None)
+        if if_none_match is not None:
+            if etag is not None and _etag_matches(etag, if_none_match):
+                raise exceptions.NotModified(validators)
+            return
+
+        last_modified = parse_http_date_safe(
+            validators.get('Last-Modified', '')
+        )
+        if_modified_since = parse_http_date_safe(
+            self.request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        if last_modified is not None and if_modified_since is not None \
+                and last_modified <= if_modified_since:
+            raise exceptions.NotModified(validators)
+
+    def get_response_cache_key(self):
+        """
+        Invoked by ``get_cached_response``.
+        Returns the cache key of the response, which includes the current
+        generations of the ``cache_models``.
+        """
+        ignored = self.get_cache_ignored_params()
+        query = sorted(
+            (key, sorted(values))
+            for key, values in self.request.GET.lists()
+            if key not in ignored
+        )
+        ser_format = self.get_serialization_format()
+        signature = repr((
+            self.__class__.__module__, self.__class__.__name__,
+            sorted(self.kwargs.items()), query, ser_format,
+            self.get_json_indent(), self.get_cache_scope(),
+            caching.get_generations(
+                self.cache_models, self.response_cache_alias
+            ),
+        ))
+        return 'firestone.response.%s' % hashlib.md5(signature).hexdigest()
+
+    def get_cached_response(self):
+        """
+        Invoked by ``dispatch``.
+        On GET requests of handlers with ``cache_responses``, returns the
+        cached response, after evaluating the request's preconditions against
+        its validators.
+
+        Returns:
+            http.HttpResponse object, or None if there is no cached response.
+        Raises:
+            exceptions.NotModified: if the client's representation is current
+        """
+        if not self.cache_responses or self.request.method.upper() != 'GET':
+            return None
+
+        self.response_cache_key = self.get_response_cache_key()
+        response = caches[self.response_cache_alias].get(
+            self.response_cache_key
+        )
+        if response is None:
+            return None
+
+        self.check_preconditions(dict(
+            (header, response[header])
+            for header in ('ETag', 'Last-Modified')
+            if response.has_header(header)
+        ))
+        return response
+
+    def cache_response(self, response):
+        """
+        Invoked by ``dispatch``.
+        Caches successful, non-streamed, responses of GET requests, if the
+        handler has ``cache_responses`` set.
+        """
+        if self.response_cache_key is None or response.status_code != 200 \
+                or response.streaming:
+            return
+
+        caches[self.response_cache_alias].set(
+            self.response_cache_key, response, self.response_cache_timeout
+        )
+
     def patch_response(self, response, headers={}):
         """
         Invoked by ``dispatch``. Wraps data and headers in an HttpResponse
@@ -580,6 +1176,9 @@ class BaseHandler(HandlerControlFlow):
         querystring parameters. ``page`` indicates the requested page, and
         ``ipp`` indicates the items per page (default is
         ``self.items_per_page``).
+        Alternatively, the ``cursor`` querystring parameter requests cursor
+        pagination. Its value is empty for the first page, and one of the
+        cursors returned in the pagination metadata for any other page.
 
         Args:
             data: Result of the handler's data operation
@@ -589,12 +1188,28 @@ class BaseHandler(HandlerControlFlow):
             If data is not paginable, or invalid pagination data has been
             given, it returns (data, {})
         """
+        cursor = self.request.GET.get('cursor', None)
+        if cursor is not None:
+            return self.paginate_cursor(data, cursor)
+
         page = self.request.GET.get('page', None)
         if page:
             return self.paginate_data(data, page)
 
         return data, {}
 
+    def get_items_per_page(self):
+        """
+        Invoked by ``paginate_data`` and ``paginate_cursor``.
+        Returns the value of querystring parameter ``ipp``, or
+        ``self.items_per_page`` if it's missing or invalid.
+        """
+        ipp = self.request.GET.get('ipp', None) or self.items_per_page
+        try:
+            return int(ipp)
+        except ValueError:
+            return self.items_per_page
+
     def paginate_data(self, data, page):
         """
         Invoked by ``paginate``.
@@ -608,6 +1223,19 @@ class BaseHandler(HandlerControlFlow):
         """
         return data, {}
 
+    def paginate_cursor(self, data, cursor):
+        """
+        Invoked by ``paginate``.
+        Override to specify cursor paging logic.
+
+        Args:
+            data: Result of the handler's data operation
+            cursor: Value of querystring parameter ``cursor``
+        Returns:
+            (data, {})
+        """
+        return data, {}
+
 
 class ModelHandler(BaseHandler):
     """
@@ -617,6 +1245,71 @@ class ModelHandler(BaseHandler):
     # Override to define the handler's model
     model = None
 
+    # Set to True to create the items of bulk POST requests with chunked
+    # ``bulk_create`` queries, instead of one INSERT query per item. Requests
+    # can opt out of it, with the ``bulk`` querystring parameter, but can't
+    # opt in if it's not set. Unless the database backend can return the ids
+    # of bulk inserted rows(Django 1.10+), items whose representation needs
+    # their primary key are still saved one by one. That includes the
+    # default ``template``, so the ``template`` should only list local
+    # non-primary key fields for ``bulk_create`` to be used.
+    # See ``is_bulk_post`` and ``can_serialize_bulk_created``.
+    bulk_post = False
+
+    # Maximum number of items inserted by each ``bulk_create`` query
+    bulk_post_batch_size = 500
+
+    # Set to True to parse the JSON array and NDJSON bodies of bulk POST
+    # requests incrementally, from the request stream, and to cleanse,
+    # validate and save their items in chunks of ``stream_post_chunk_size``,
+    # so that the whole body is never held in memory. The response then only
+    # contains the number of created items. It can also be toggled per
+    # request, with the ``stream`` querystring parameter.
+    # See ``is_stream_post`` and ``post_stream``.
+    stream_post = False
+    stream_post_chunk_size = 500
+
+    # Set to True to perform plural PUT requests with a single
+    # ``QuerySet.update`` query. The request body is then validated once,
+    # against a prototype model instance, and no per instance hooks(``save``,
+    # ``clean``, signals) are called. The response contains the dataset as
+    # filtered after the update, so items that the update makes no longer
+    # match the handler's filters are left out of it. See ``clean_prototype``.
+    bulk_put = False
+
+    # Set to True so that plural DELETE requests only return the number of
+    # deleted items, instead of their serialized representation.
+    delete_count_only = False
+
+    # Set to True to fetch only the columns that the ``template`` and the
+    # request-level field selection need, on GET requests. Pruning is skipped
+    # when the selected fields include methods, properties or other
+    # attributes, since the columns they use can't be known.
+    # See ``apply_column_pruning``.
+    prune_columns = False
+
+    # Name of a datetime field of the model, updated whenever an item changes
+    # (e.g. ``auto_now``). If set, GET requests support conditional requests,
+    # with the latest value of the field and the number of items as the
+    # fingerprint. See ``get_fingerprint``.
+    last_modified_field = None
+
+    # How the total number of items of the pagination metadata is computed:
+    # 'exact', 'cached' or 'estimated'. See ``count_data``.
+    count_strategy = counts.EXACT
+    # Cache backend and timeout(in seconds) of the 'cached' strategy
+    count_cache_alias = 'default'
+    count_cache_timeout = 60
+    # The 'estimated' strategy counts exactly, if the estimate is lower
+    count_estimate_threshold = 1000
+
+    # Set to True to serialize GET querysets from ``QuerySet.values`` rows,
+    # without instantiating any model instances. Only applies when all the
+    # selected fields are local non-relational model fields, and the
+    # queryset hasn't been evaluated(e.g. by ``inject_data_hook``).
+    # See ``get_values_fields``.
+    serialize_values = False
+
     def get(self):
         """
         Invoked by ``dispatch``.
@@ -639,20 +1332,172 @@ class ModelHandler(BaseHandler):
         Raises:
             TODO
         """
-        # For Bulk POST requests, I could have used ``bulk_create``.
-        # This has many drawbacks though
+        # For Bulk POST requests, ``bulk_create`` is only used if the handler
+        # or the request asks for it. It has many drawbacks
         # (https://docs.djangoproject.com/en/dev/ref/models/querysets/#bulk-create),
-        # so I've gone for the more conservative approach of one query per
+        # so the default is the more conservative approach of one query per
         # item.
         # TODO: What kind of errors do I contemplate for here? How do I handle
         # them?
+        if isinstance(self.request.data, deserializers.StreamedBody):
+            return self.post_stream()
         if isinstance(self.request.data, self.model):
             self.request.data.save(force_insert=True)
+        elif self.is_bulk_post() and self.can_bulk_create() \
+                and self.can_serialize_bulk_created():
+            self.model.objects.bulk_create(
+                self.request.data, batch_size=self.bulk_post_batch_size
+            )
+            # No ``post_save`` signals are sent
+            caching.bump(self.model)
         else:
             for instance in self.request.data:
                 instance.save(force_insert=True)
         return self.request.data
 
+    def is_bulk_post(self):
+        """
+        Invoked by ``post``.
+        Checks whether the items of a bulk POST request should be created with
+        ``bulk_create``. On handlers with ``bulk_post`` set, the querystring
+        parameter ``bulk`` (``0``) can turn it off. It can never turn it on,
+        since ``bulk_create`` skips the ``save`` method of the model, that
+        the handler may rely on.
+
+        Returns:
+            True or False
+        """
+        if not self.bulk_post:
+            return False
+        bulk = self.request.GET.get('bulk', None)
+        return bulk is None or bulk.lower() not in ('0', 'false', 'no')
+
+    def can_bulk_create(self):
+        """
+        Invoked by ``post``.
+        ``bulk_create`` doesn't call ``save``, doesn't send the ``pre_save``
+        and ``post_save`` signals, and doesn't work with multi-table
+        inheritance. Models that depend on any of these are always saved one
+        by one.
+        Note that unless the database backend can return the ids of bulk
+        inserted rows, the created items will have no primary key.
+
+        Returns:
+            True if ``self.model`` can be created with ``bulk_create``, False
+            otherwise.
+        """
+        if self.model._meta.parents:
+            return False
+        # The response cache invalidation receivers don't count, since
+        # ``post`` invalidates the cache itself, and neither does the user
+        # cache one, since new users are never cached
+        if signals.pre_save.has_listeners(self.model) \
+                or caching.has_other_receivers(
+                    signals.post_save, self.model,
+                    ignored=(users.on_user_change,),
+                ):
+            return False
+        return True
+
+    def can_serialize_bulk_created(self):
+        """
+        Invoked by ``post``.
+        Unless the database backend can return the ids of bulk inserted rows
+        (Django 1.10+), ``bulk_create`` doesn't set the primary keys of the
+        created items. Their primary key would then be serialized as null,
+        and their many-to-many and reverse relations, or any property that
+        depends on them, couldn't be serialized at all. Such items are saved
+        one by one.
+
+        Returns:
+            True if the response can be serialized without the primary keys
+            of the created items: all the fields of the template(limited to
+            the request-level field selection) are local non-relational model
+            fields, other than the primary key. False otherwise.
+        """
+        features = connections[router.db_for_write(self.model)].features
+        if getattr(features, 'can_return_ids_from_bulk_insert', False):
+            return True
+
+        template = self.get_template()
+        fields = _get_values_fields(self.model, template)
+        if fields is None:
+            return False
+        for alias in parse_selectors(self.model, template.get('fields', None),
+                                     template.get('exclude', None)):
+            if alias not in fields or fields[alias].primary_key:
+                return False
+        return True
+
+    def is_stream_post(self):
+        """
+        Invoked by ``deserialize_body``.
+        Checks whether the request body of a POST request should be streamed.
+        The querystring parameter ``stream`` (``1``/``0``) overrides the
+        handler's ``stream_post`` attribute.
+
+        Returns:
+            True or False
+        """
+        stream = self.request.GET.get('stream', None)
+        if stream is None:
+            return self.stream_post
+        return stream.lower() in ('1', 'true', 'yes')
+
+    def post_stream(self):
+        """
+        Invoked by ``post``, when the request body is streamed.
+        Reads the items of the request body in chunks of
+        ``stream_post_chunk_size``, and cleanses, validates and saves each
+        chunk before reading the next one. All chunks are saved in a single
+        transaction, so that an invalid item fails the whole request, as it
+        does when the body is not streamed.
+
+        Returns:
+            The ``deserializers.StreamedBody`` of the request body, which
+            holds the number of created items.
+        Raises:
+            exceptions.BadRequest: If the body is not valid, or an item
+            doesn't validate. In the latter case, the errors are
+            ``{'items': [<first>, <last>], 'item': <position>, 'errors':
+            <errors of the item>}``, where ``items`` is the range of
+            positions of the chunk, and ``item`` the position of the invalid
+            item, if known.
+        """
+        body = self.request.data
+        bulk = self.is_bulk_post() and self.can_bulk_create()
+
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            for offset, chunk in body.chunks(self.stream_post_chunk_size):
+                self.request.data = chunk
+                try:
+                    self.cleanse_body()
+                    self.validate()
+                except exceptions.BadRequest, e:
+                    errors = {
+                        'items': [offset, offset + len(chunk) - 1],
+                        'errors': e.errors,
+                    }
+                    if getattr(e, 'index', None) is not None:
+                        errors['item'] = offset + e.index
+                    raise exceptions.BadRequest(errors)
+
+                if bulk:
+                    self.model.objects.bulk_create(
+                        self.request.data,
+                        batch_size=self.bulk_post_batch_size,
+                    )
+                else:
+                    for instance in self.request.data:
+                        instance.save(force_insert=True)
+
+        if bulk:
+            # No ``post_save`` signals are sent
+            caching.bump(self.model)
+
+        self.request.data = body
+        return body
+
     def put(self):
         """
         Invoked by ``dispatch``
@@ -667,11 +1512,43 @@ class ModelHandler(BaseHandler):
         # them?
         if isinstance(self.request.data, self.model):
             self.request.data.save(force_update=True)
+        elif isinstance(self.request.data, dict):
+            # Set-based plural PUT. ``request.data`` holds the validated field
+            # values, which are applied on the whole dataset with one query.
+            dataset = self.get_data_set()
+            if self.request.data:
+                dataset.update(**self.get_update_values())
+                # No ``post_save`` signals are sent
+                caching.bump(self.model)
+            # The queryset is evaluated after the update, so items that no
+            # longer match the handler's filters drop out of the response
+            return dataset
         else:
             for instance in self.request.data:
                 instance.save(force_update=True)
         return self.request.data
 
+    def get_update_values(self):
+        """
+        Invoked by ``put``, on set-based plural PUT requests.
+        ``QuerySet.update`` doesn't call ``save``, so the ``auto_now``
+        fields(e.g. the ``last_modified_field``) are not updated on their
+        own.
+
+        Returns:
+            Dictionary of the ``update`` field values: the ones of
+            ``request.data``, plus the current value of every ``auto_now``
+            field that ``request.data`` doesn't set.
+        """
+        values = dict(self.request.data)
+        prototype = self.model()
+        for field in self.model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) \
+                    and field.name not in values \
+                    and field.attname not in values:
+                values[field.name] = field.pre_save(prototype, False)
+        return values
+
     def delete(self):
         """
         Invoked by ``dispatch``
@@ -686,6 +1563,62 @@ class ModelHandler(BaseHandler):
         """
         return self.get_data()
 
+    def postprocess(self, data, pagination):
+        """
+        Invoked by ``dispatch``.
+        On plural DELETE requests of handlers with ``delete_count_only``, the
+        deleted items are not serialized. The response only contains their
+        count. Likewise for the created items of streamed POST requests.
+
+        Args:
+            data: Result of operation
+            pagination: Dictionary with pagination data
+        Returns:
+            Whole response data dictionary
+        """
+        if self.delete_count_only \
+                and self.request.method.upper() == 'DELETE' \
+                and isinstance(data, QuerySet):
+            count = data.count()
+            self.finalize_pending(data)
+            return self.package(None, pagination, count)
+
+        # The items of streamed POST requests are not kept
+        if isinstance(data, deserializers.StreamedBody):
+            return self.package(None, pagination, data.count)
+
+        return super(ModelHandler, self).postprocess(data, pagination)
+
+    def finalize_pending(self, data):
+        """
+        Invoked by ``postprocess``
+        Performs any pending DELETE operations, in case of DELETE requests.
+
+        If the deleted model has no cascades or delete signals, a queryset is
+        deleted with one query, without fetching any rows. Otherwise the
+        model instances, which ``serialize_to_python`` has already fetched,
+        are handed to the delete collector, which deletes them in primary key
+        batches, instead of fetching them all over again.
+
+        Args:
+            Result of the handler's action
+        Returns:
+            None
+        """
+        if self.request.method.upper() != 'DELETE':
+            return
+
+        if not isinstance(data, QuerySet):
+            data.delete()
+            return
+
+        collector = Collector(using=router.db_for_write(data.model))
+        if collector.can_fast_delete(data):
+            data.delete()
+        else:
+            collector.collect(list(data))
+            collector.delete()
+
     def get_data_item(self):
         """
         Invoked by ``get_data``.
@@ -698,7 +1631,9 @@ class ModelHandler(BaseHandler):
         """
         if self.kwargs:
             try:
-                return self.get_working_set().get(**self.kwargs)
+                return self.apply_column_pruning(
+                    self.apply_related_lookups(self.get_working_set())
+                ).get(**self.kwargs)
             except (self.model.DoesNotExist, ValueError, TypeError):
                 raise exceptions.Gone
 
@@ -716,7 +1651,123 @@ class ModelHandler(BaseHandler):
         filtered_data = self.filter_data(data)
         ordered_data = self.order(filtered_data)
 
-        return ordered_data
+        return self.apply_column_pruning(
+            self.apply_related_lookups(ordered_data)
+        )
+
+    def apply_related_lookups(self, data):
+        """
+        Invoked by ``get_data_item`` and ``get_data_set``.
+        Applies the ``select_related`` and ``prefetch_related`` lookups that
+        the metaclass has derived from the handler's ``template``, so that
+        serializing related objects doesn't cost one query per object.
+        Lookups for fields left out by the request level field selection are
+        not applied, and nothing is applied to requests other than GET.
+
+        Args:
+            data: Queryset
+        Returns:
+            Queryset with the related lookups applied.
+        """
+        if not self.related_lookups or not isinstance(data, QuerySet) \
+                or self.request.method.upper() != 'GET':
+            return data
+
+        field_selection = set(self.request.GET.getlist('field'))
+        select, prefetch = [], []
+        for field, kind, lookup in self.related_lookups:
+            if field_selection and field not in field_selection:
+                continue
+            if kind == 'select_related':
+                select.append(lookup)
+            else:
+                prefetch.append(lookup)
+
+        if select:
+            data = data.select_related(*select)
+        if prefetch:
+            data = data.prefetch_related(*prefetch)
+        return data
+
+    def apply_column_pruning(self, data):
+        """
+        Invoked by ``get_data_item`` and ``get_data_set``.
+        If ``prune_columns`` is set, restricts ``data`` with ``QuerySet.only``
+        to the primary key and the columns that the serialization of the
+        selected template fields needs.
+
+        Args:
+            data: Queryset
+        Returns:
+            Queryset with the columns pruned.
+        """
+        if not self.prune_columns or not isinstance(data, QuerySet) \
+                or self.request.method.upper() != 'GET':
+            return data
+
+        template = self.get_template()
+        columns = set([self.model._meta.pk.name])
+        for alias in parse_selectors(self.model, template.get('fields', None),
+                                     template.get('exclude', None)):
+            if alias not in self.template_columns:
+                return data
+            columns.update(self.template_columns[alias])
+
+        return data.only(*columns)
+
+    def get_values_fields(self, data):
+        """
+        Invoked by ``serialize_to_python``.
+        Checks whether ``data`` can be serialized from ``QuerySet.values``
+        rows(see ``serialize_values``).
+
+        Args:
+            data: Result of the handler's operation
+        Returns:
+            List of ``(field name, model field)`` tuples of the selected
+            template fields, or None.
+        """
+        if not self.serialize_values or self.values_fields is None \
+                or not isinstance(data, QuerySet) \
+                or data._result_cache is not None \
+                or self.request.method.upper() != 'GET':
+            return None
+
+        template = self.get_template()
+        fields = []
+        for alias in parse_selectors(self.model, template.get('fields', None),
+                                     template.get('exclude', None)):
+            if alias not in self.values_fields:
+                return None
+            fields.append((alias, self.values_fields[alias]))
+
+        return fields
+
+    def serialize_to_python(self, data):
+        """
+        Invoked by ``postprocess``.
+        Serializes querysets from ``QuerySet.values`` rows, if possible(see
+        ``serialize_values``). Otherwise it falls back to
+        ``BaseHandler.serialize_to_python``.
+        """
+        fields = self.get_values_fields(data)
+        if fields is None:
+            return super(ModelHandler, self).serialize_to_python(data)
+
+        # Same values as ``django-preserialize`` would output
+        def serialize(row):
+            return {
+                alias: field.get_prep_value(row[field.name])
+                for alias, field in fields
+            }
+
+        data = data.prefetch_related(None).values(
+            *[field.name for _, field in fields]
+        )
+        if self.is_streaming(data):
+            return StreamedData(data, serialize)
+
+        return [serialize(row) for row in data]
 
     def get_working_set(self):
         """
@@ -728,12 +1779,40 @@ class ModelHandler(BaseHandler):
         """
         return self.model.objects.all()
 
+    def deserialize_body(self):
+        """
+        Invoked by ``preprocess``.
+        On POST requests whose body is streamed(see ``is_stream_post``),
+        ``request.data`` is the ``deserializers.StreamedBody`` of the items of
+        JSON array and NDJSON bodies, which are read by ``post_stream``.
+
+        Returns:
+            None
+        Raises:
+            exceptions.UnsupportedMediaType: if content-type is not supported
+            exceptions.BadRequest: If request body is not valid according to
+            content-type
+        """
+        if self.request.method.upper() != 'POST' \
+                or not self.is_stream_post():
+            return super(ModelHandler, self).deserialize_body()
+
+        try:
+            self.request.data = deserializers.stream_request_body(
+                self.request,
+                self.get_body_deserializers(),
+            )
+        except (exceptions.UnsupportedMediaType, exceptions.BadRequest):
+            raise
+
     def validate(self):
         """
         Invoked by ``preprocess``.
         Extra request body validation step. It should map the contents of
         ``request.data``(which at this point are python data structures) to
-        ``self.model`` instances, and validate them.
+        ``self.model`` instances, and validate them. On set-based plural PUT
+        requests(see ``bulk_put``), ``request.data`` remains a dictionary of
+        the validated field values.
 
         Returns:
             None
@@ -756,6 +1835,14 @@ class ModelHandler(BaseHandler):
             if isinstance(dataset, self.model):
                 for key, value in self.request.data.items():
                     setattr(dataset, key, value)
+            elif self.bulk_put:
+                # The dataset will be updated by ``put``, with a single query.
+                # Here we only validate the new field values.
+                try:
+                    self.request.data = self.clean_prototype()
+                except exceptions.BadRequest:
+                    raise
+                return
             else:
                 def update(instance):
                     for key, value in self.request.data.items():
@@ -785,8 +1872,9 @@ class ModelHandler(BaseHandler):
         # TODO: Add the exclude parameter in the signature of the method.
         # Call full_clean with ``exclude``, so that we can exclude any models
         # fields we want from the validation.
-        for element in isinstance(self.request.data, self.model) \
-                and [self.request.data] or self.request.data:
+        for index, element in enumerate(
+                isinstance(self.request.data, self.model)
+                and [self.request.data] or self.request.data):
             try:
                 element.full_clean()
             except ValidationError, e:
@@ -796,7 +1884,38 @@ class ModelHandler(BaseHandler):
                 #                   'field2':  'error string, ...}
                 # When it's raised by ``clean`` e has the parameter:
                 # e.message_dict = {NON_FIELD_ERRORS: [<error string>]}
-                raise exceptions.BadRequest(e.message_dict)
+                error = exceptions.BadRequest(e.message_dict)
+                # Position of the invalid item. See ``post_stream``
+                error.index = index
+                raise error
+
+    def clean_prototype(self):
+        """
+        Invoked by ``validate``, on set-based plural PUT requests.
+        Assigns the contents of ``request.data`` on a prototype ``self.model``
+        instance, and validates only the fields that the request body
+        updates. Model-wide validation(``clean``, uniqueness checks) is not
+        performed, since it depends on the values of each separate instance.
+
+        Returns:
+            Dictionary of the cleaned field values
+        Raises:
+            exceptions.BadRequest: If any of the fields is not valid
+        """
+        prototype = self.model(**self.request.data)
+        exclude = [
+            field.name for field in self.model._meta.fields
+            if field.name not in self.request.data
+            and field.attname not in self.request.data
+        ]
+        try:
+            prototype.clean_fields(exclude=exclude)
+        except ValidationError, e:
+            raise exceptions.BadRequest(e.message_dict)
+
+        return {
+            key: getattr(prototype, key) for key in self.request.data.keys()
+        }
 
     def paginate_data(self, data, page):
         """
@@ -810,14 +1929,14 @@ class ModelHandler(BaseHandler):
             If for some reason we can't paginate data, or
             ``pagination_metadata`` is ``False``, returns (data, {})
         """
-        ipp = self.request.GET.get('ipp', None) or self.items_per_page
-        try:
-            ipp = int(ipp)
-        except ValueError:
-            ipp = self.items_per_page
+        ipp = self.get_items_per_page()
 
+        strategy = None
         if not self.pagination_metadata:
             paginator = LazyPaginator(data, ipp)
+        elif isinstance(data, QuerySet):
+            count, strategy = self.count_data(data)
+            paginator = counts.CountedPaginator(data, ipp, count)
         else:
             paginator = Paginator(data, ipp)
 
@@ -834,5 +1953,149 @@ class ModelHandler(BaseHandler):
             }
         except NotImplementedError:
             metadata = {}
+        if strategy:
+            metadata['count_strategy'] = strategy
 
         return data_page, metadata
+
+    def get_fingerprint(self, data):
+        """
+        Invoked by ``evaluate_preconditions``.
+        If ``last_modified_field`` is set, returns the fingerprint of a model
+        instance(its field value and primary key), or of a queryset(the
+        latest field value and the number of items, computed with a single
+        aggregate query).
+        """
+        field = self.last_modified_field
+        if not field:
+            return None
+
+        if isinstance(data, self.model):
+            last_modified = getattr(data, field)
+            return (last_modified, data.pk), last_modified
+
+        if isinstance(data, QuerySet):
+            aggregate = data.aggregate(
+                last_modified=Max(field), count=Count('pk')
+            )
+            return (
+                (aggregate['last_modified'], aggregate['count']),
+                aggregate['last_modified'],
+            )
+
+        return None
+
+    def count_data(self, data):
+        """
+        Invoked by ``paginate_data``.
+        Counts the items of ``data`` according to ``count_strategy``:
+            'exact': ``SELECT COUNT(*)``
+            'cached': the exact count, cached for ``count_cache_timeout``
+            seconds, per handler, URL arguments, user, and querystring
+            parameters other than the pagination and field selection ones.
+            'estimated': the query planner's estimate, if the database
+            exposes it, and it's not lower than ``count_estimate_threshold``.
+            Otherwise the exact count. Estimates may be off, so the last
+            pages may be empty or missing.
+
+        Args:
+            data: Queryset
+        Returns:
+            (count, strategy), where ``strategy`` is the one that actually
+            produced ``count``. E.g. 'exact' on cache misses.
+        """
+        if self.count_strategy == counts.CACHED:
+            cache = caches[self.count_cache_alias]
+            key = self.get_count_cache_key()
+            count = cache.get(key)
+            if count is not None:
+                return count, counts.CACHED
+            count = data.count()
+            cache.set(key, count, self.count_cache_timeout)
+            return count, counts.EXACT
+
+        if self.count_strategy == counts.ESTIMATED:
+            estimate = counts.estimate_count(data)
+            if estimate is not None \
+                    and estimate >= self.count_estimate_threshold:
+                return estimate, counts.ESTIMATED
+
+        return data.count(), counts.EXACT
+
+    def get_count_cache_key(self):
+        """
+        Invoked by ``count_data``.
+        Returns the cache key of the count of the 'cached' strategy.
+        """
+        # Parameters that don't change the number of items
+        ignored = ('page', 'ipp', 'cursor', 'field')
+        query = sorted(
+            (key, sorted(values))
+            for key, values in self.request.GET.lists()
+            if key not in ignored
+        )
+        user = getattr(self.request, 'user', None)
+        signature = repr((
+            self.__class__.__module__, self.__class__.__name__,
+            sorted(self.kwargs.items()), getattr(user, 'pk', None), query,
+        ))
+        return 'firestone.count.%s' % hashlib.md5(signature).hexdigest()
+
+    def paginate_cursor(self, data, cursor):
+        """
+        Invoked by ``paginate``.
+        Keyset pagination, on the ordering of ``data``(see ``order``), with
+        the primary key as a tie-breaker. Pages are fetched with conditions on
+        the ordering columns instead of offsets, so that deep pages are as
+        fast as the first one. See module ``cursors``.
+
+        Args:
+            data: Result of the handler's data operation
+            cursor: Value of querystring parameter ``cursor``. Empty for the
+            first page.
+        Returns:
+            (data_page, {'next': <cursor or None>,
+                         'previous': <cursor or None>})
+            If ``data`` is not a queryset, or its ordering includes nullable
+            or relational columns, expressions or random ordering, returns
+            (data, {})
+        Raises:
+            exceptions.BadRequest: if ``cursor`` is invalid
+        """
+        if not isinstance(data, QuerySet):
+            return data, {}
+        ordering = cursors.get_ordering(data)
+        if ordering is None:
+            return data, {}
+
+        ipp = self.get_items_per_page()
+        direction, values = cursors.NEXT, None
+        if cursor:
+            try:
+                direction, values = cursors.decode(cursor, ordering)
+            except cursors.InvalidCursor:
+                raise exceptions.BadRequest({'cursor': ['Invalid cursor.']})
+
+        reverse = direction == cursors.PREVIOUS
+        if values is not None:
+            data = cursors.seek(data, ordering, values, reverse)
+        # One more item than the page size, to know if there are more pages
+        items = list(cursors.order(data, ordering, reverse)[:ipp + 1])
+        has_more = len(items) > ipp
+        items = items[:ipp]
+        if reverse:
+            items.reverse()
+
+        has_next = has_more if not reverse else True
+        has_previous = has_more if reverse else values is not None
+        metadata = {'next': None, 'previous': None}
+        if items and has_next:
+            metadata['next'] = cursors.encode(
+                cursors.NEXT, cursors.get_values(items[-1], ordering)
+            )
+        if items and has_previous:
+            metadata['previous'] = cursors.encode(
+                cursors.PREVIOUS, cursors.get_values(items[0], ordering)
+            )
+
+        return items, metadata
@@ -0,0 +1,222 @@
+"""
+The ``json_backends`` module exposes the backends that encode python data
+structures to JSON text, and decode JSON text to python data structures. They
+are used by ``serializers.SerializerMixin`` and by the JSON deserializer.
+
+The backend is selected with the ``FIRESTONE_JSON_BACKEND`` setting. It's
+either the name of a backend, or a list of names in order of preference. The
+first backend whose library is installed is used, and the standard library's
+``json`` module is always the last resort. For example:
+
+    FIRESTONE_JSON_BACKEND = ('orjson', 'ujson', 'simplejson')
+
+Every backend follows the encoding semantics of Django's
+``DateTimeAwareJSONEncoder`` for datetimes, dates, times, Decimals and UUIDs.
+"""
+from django.conf import settings
+from django.core.serializers.json import DateTimeAwareJSONEncoder
+import json
+import math
+
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ujson 1.x decodes floats imprecisely, unless ``precise_float`` is set.
+# Later versions always decode them precisely, and have dropped the option
+_ujson_loads_options = {}
+if ujson is not None:
+    try:
+        ujson.loads('0', precise_float=True)
+        _ujson_loads_options['precise_float'] = True
+    except TypeError:
+        pass
+
+
+DEFAULT_BACKEND = 'json'
+
+_encoder = DateTimeAwareJSONEncoder()
+
+
+def _default(value):
+    """
+    Encodes any value that JSON can't natively represent, the way
+    ``DateTimeAwareJSONEncoder`` does. Raises TypeError for anything else.
+    """
+    return _encoder.default(value)
+
+
+class _Float(object):
+    """
+    Wrapper of a finite float, that ujson encodes as the float's ``repr``:
+    the shortest representation that decodes to the same float, which is
+    what the other backends output. ujson's own encoding rounds floats to 15
+    significant digits at most.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __json__(self):
+        return repr(self.value)
+
+
+def _prepare(data, wrap_floats=False):
+    """
+    Returns a copy of ``data``, in which all values that JSON can't natively
+    represent, have been encoded with ``_default``. Used by backends that
+    don't support a ``default`` hook. If ``wrap_floats`` is set, finite
+    floats are wrapped in ``_Float``.
+    """
+    if isinstance(data, dict):
+        return {key: _prepare(value, wrap_floats)
+                for key, value in data.iteritems()}
+    if isinstance(data, (list, tuple)):
+        return [_prepare(value, wrap_floats) for value in data]
+    if isinstance(data, float):
+        if wrap_floats and not (math.isinf(data) or math.isnan(data)):
+            return _Float(data)
+        return data
+    if data is None or isinstance(data, (basestring, bool, int, long)):
+        return data
+    return _prepare(_default(data), wrap_floats)
+
+
+class JSONBackend(object):
+    """
+    Base class of all backends. Subclasses define ``dumps`` and ``loads``.
+    """
+    def dumps(self, data, indent=None):
+        """
+        Returns the JSON text of ``data``. Output is compact, unless
+        ``indent`` is given.
+        """
+        raise NotImplementedError
+
+    def loads(self, text):
+        """
+        Returns the python data structures of the JSON ``text``.
+        Raises ValueError if ``text`` is not valid JSON.
+        """
+        raise NotImplementedError
+
+
+class StdlibBackend(JSONBackend):
+    def dumps(self, data, indent=None):
+        if indent is None:
+            return json.dumps(data, cls=DateTimeAwareJSONEncoder,
+                              ensure_ascii=False, separators=(',', ':'))
+        return json.dumps(data, cls=DateTimeAwareJSONEncoder,
+                          ensure_ascii=False, indent=indent)
+
+    def loads(self, text):
+        return json.loads(text)
+
+
+class SimplejsonBackend(JSONBackend):
+    def dumps(self, data, indent=None):
+        # ``use_decimal=False``, so that Decimals are encoded as strings by
+        # ``_default``, rather than as numbers.
+        if indent is None:
+            return simplejson.dumps(data, default=_default, use_decimal=False,
+                                    ensure_ascii=False, separators=(',', ':'))
+        return simplejson.dumps(data, default=_default, use_decimal=False,
+                                ensure_ascii=False, indent=indent)
+
+    def loads(self, text):
+        return simplejson.loads(text)
+
+
+class UjsonBackend(JSONBackend):
+    def dumps(self, data, indent=None):
+        # ujson has no ``default`` hook, and encodes unknown objects silently,
+        # so the data are prepared beforehand. Floats are wrapped, so that
+        # they aren't rounded.
+        return ujson.dumps(_prepare(data, wrap_floats=True),
+                           ensure_ascii=False, escape_forward_slashes=False,
+                           indent=indent or 0)
+
+    def loads(self, text):
+        try:
+            return ujson.loads(text, **_ujson_loads_options)
+        except ValueError:
+            # ujson can't decode some valid JSON, e.g. subnormal floats like
+            # ``5e-324``. The standard library raises ValueError on invalid
+            # JSON too
+            return json.loads(text)
+
+
+class OrjsonBackend(JSONBackend):
+    def dumps(self, data, indent=None):
+        # orjson formats datetimes differently than
+        # ``DateTimeAwareJSONEncoder`` so they are passed through to
+        # ``_default``. orjson only supports an indentation of 2 spaces.
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option) \
+            .decode('utf-8')
+
+    def loads(self, text):
+        return orjson.loads(text)
+
+
+# Backend name -> (backend class, whether its library is installed)
+BACKENDS = {
+    'json': (StdlibBackend, True),
+    'simplejson': (SimplejsonBackend, simplejson is not None),
+    'ujson': (UjsonBackend, ujson is not None),
+    'orjson': (OrjsonBackend, orjson is not None),
+}
+
+_instances = {}
+
+
+def register(name, backend, available=True):
+    """
+    Registers the ``JSONBackend`` subclass ``backend`` under ``name``, so that
+    it can be selected with the ``FIRESTONE_JSON_BACKEND`` setting.
+    """
+    BACKENDS[name] = (backend, available)
+    _instances.pop(name, None)
+
+
+def available_backends():
+    """
+    Returns the names of all backends whose libraries are installed.
+    """
+    return [name for name, (_, available) in BACKENDS.items() if available]
+
+
+def get_backend(name=None):
+    """
+    Returns the backend instance named ``name``, or else the one selected by
+    the ``FIRESTONE_JSON_BACKEND`` setting. Falls back to the standard
+    library's ``json`` module, if none of the requested backends is
+    installed.
+    """
+    names = name or getattr(settings, 'FIRESTONE_JSON_BACKEND',
+                            DEFAULT_BACKEND)
+    if isinstance(names, basestring):
+        names = (names,)
+
+    for name in tuple(names) + (DEFAULT_BACKEND,):
+        if name in _instances:
+            return _instances[name]
+
+        backend, available = BACKENDS.get(name, (None, False))
+        if available:
+            _instances[name] = backend()
+            return _instances[name]
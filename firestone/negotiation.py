@@ -0,0 +1,170 @@
+"""
+This module implements the content negotiation of ``Accept`` headers, as
+specified by RFC 7231, section 5.3.2, used by
+``serializers.SerializerMixin.get_serialization_format``.
+
+Parsed headers, and the negotiation results, are cached in bounded LRU caches
+(of ``FIRESTONE_ACCEPT_CACHE_SIZE`` entries, 256 by default), keyed by the raw
+header, since real traffic only carries a handful of distinct ``Accept``
+values.
+"""
+from django.conf import settings
+from utils import LRUCache
+
+
+def _cache():
+    return LRUCache(getattr(settings, 'FIRESTONE_ACCEPT_CACHE_SIZE', 256))
+
+
+# Raw header -> parsed media ranges
+_parsed = _cache()
+# (Raw header, available media types) -> selected media type
+_selected = _cache()
+
+
+class MediaRange(object):
+    """
+    A media range of an ``Accept`` header, e.g.
+    ``application/json; indent=4; q=0.8``.
+    """
+    __slots__ = ('type', 'subtype', 'params', 'quality', 'position')
+
+    def __init__(self, type, subtype, params, quality, position):
+        self.type = type
+        self.subtype = subtype
+        self.params = params        # Dictionary, without ``q``
+        self.quality = quality
+        self.position = position    # Position in the header
+
+    @property
+    def media_type(self):
+        return '%s/%s' % (self.type, self.subtype)
+
+    @property
+    def specificity(self):
+        """
+        Precedence of the media range, over the others that match the same
+        media type: ``*/*`` < ``type/*`` < ``type/subtype`` <
+        ``type/subtype;param``.
+        """
+        if self.type == '*':
+            return 0
+        if self.subtype == '*':
+            return 1
+        return 2 + bool(self.params)
+
+    def matches(self, media_type):
+        """
+        Returns whether the media range includes ``media_type``, a
+        ``type/subtype`` string without parameters.
+        """
+        type, _, subtype = media_type.partition('/')
+        return (
+            self.type == '*'
+            or self.type == type and self.subtype in ('*', subtype)
+        )
+
+
+def _parse_quality(value):
+    # ``qvalue = ( "0" [ "." 0*3DIGIT ] ) / ( "1" [ "." 0*3("0") ] )``. Invalid
+    # values are treated as 1, like most servers do.
+    try:
+        quality = float(value)
+    except ValueError:
+        return 1.0
+    if not 0 <= quality <= 1:
+        return 1.0
+    return quality
+
+
+def parse_accept(header):
+    """
+    Parses the ``Accept`` ``header``.
+
+    Returns:
+        Tuple of ``MediaRange`` instances, in the order of the header.
+        Malformed media ranges are skipped.
+    """
+    ranges = _parsed.get(header)
+    if ranges is not None:
+        return ranges
+
+    ranges = []
+    for position, media_range in enumerate(header.split(',')):
+        parts = media_range.split(';')
+        type, _, subtype = parts[0].strip().lower().partition('/')
+        type, subtype = type.strip(), subtype.strip()
+        if not type or not subtype or type == '*' and subtype != '*':
+            continue
+
+        params = {}
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.partition('=')
+            key, value = key.strip().lower(), value.strip().strip('"')
+            if key == 'q':
+                quality = _parse_quality(value)
+            elif key:
+                params[key] = value
+        ranges.append(MediaRange(type, subtype, params, quality, position))
+
+    ranges = tuple(ranges)
+    _parsed.set(header, ranges)
+    return ranges
+
+
+def get_quality(ranges, media_type):
+    """
+    Returns the ``(quality, position)`` of ``media_type``, as given by the
+    most specific media range of ``ranges`` that includes it, or None if no
+    media range does.
+    """
+    best = None
+    for media_range in ranges:
+        if media_range.matches(media_type) and (
+                best is None or media_range.specificity > best.specificity):
+            best = media_range
+    if best is None:
+        return None
+    return best.quality, best.position
+
+
+def select(header, available):
+    """
+    Returns the media type of ``available``(a tuple of media types, in the
+    server's order of preference) that the ``Accept`` ``header`` prefers, or
+    None if it accepts none of them.
+
+    Media types are ordered by their quality. Among those of the same
+    quality, the one whose media range comes first in the header wins, and
+    then the server's order of preference.
+    """
+    key = (header, available)
+    selected = _selected.get(key, key)
+    if selected is not key:
+        return selected
+
+    ranges = parse_accept(header)
+    selected = None
+    best = None
+    for preference, media_type in enumerate(available):
+        quality = get_quality(ranges, media_type)
+        if quality is None or quality[0] <= 0:
+            continue
+        rank = (-quality[0], quality[1], preference)
+        if best is None or rank < best:
+            best, selected = rank, media_type
+
+    _selected.set(key, selected)
+    return selected
+
+
+def get_params(header, media_type):
+    """
+    Returns the parameters of the first media range of the ``Accept``
+    ``header`` that names ``media_type`` exactly, or an empty dictionary.
+    """
+    for media_range in parse_accept(header):
+        if media_range.media_type == media_type:
+            return media_range.params
+    return {}
@@ -0,0 +1,295 @@
+"""
+The ``plans`` module turns ``django-preserialize`` templates into
+serialization plans, which serialize data exactly like
+``preserialize.serialize`` does, but without interpreting the template for
+every object they touch.
+
+A plan resolves its options(defaults, settings-based options, aliases,
+prefixes, camelcasing) once. For every model class it meets, it resolves the
+template's pseudo selectors and the model fields of the template fields once,
+and serializes the instances of that class with a precomputed list of
+getters. Related objects are serialized by sub-plans, which are compiled the
+first time they are needed.
+
+Plans of handlers are cached per handler class and request-level field
+selection, in a bounded LRU cache. See ``BaseHandler.get_serialization_plan``.
+"""
+from django.conf import settings
+from django.db import models
+from django.db.models import FieldDoesNotExist
+from django.db.models.fields import Field
+from django.db.models.query import QuerySet
+from preserialize.serialize import DEFAULT_OPTIONS
+from preserialize.utils import parse_selectors
+from preserialize.utils import convert_to_camel
+from firestone.utils import LRUCache
+import collections
+
+
+# Class names of the managers of local many-to-many and reverse foreign key
+# relations, whose values are serialized as querysets
+RELATED_MANAGERS = frozenset(
+    ('RelatedManager', 'ManyRelatedManager', 'GenericRelatedObjectManager')
+)
+
+# (handler class, field selection) -> (template, copy of the template, plan)
+cache = LRUCache(getattr(settings, 'FIRESTONE_PLAN_CACHE_SIZE', 256))
+
+# (model class, field name) -> model field, or None if the name is not a
+# ``Field`` of the model
+_model_fields = {}
+
+
+def _get_model_field(cls, name):
+    """
+    Returns the ``Field`` of model ``cls`` named ``name``, or None.
+    """
+    try:
+        return _model_fields[cls, name]
+    except KeyError:
+        pass
+
+    try:
+        field = cls._meta.get_field(name)
+    except FieldDoesNotExist:
+        field = None
+    if not isinstance(field, Field):
+        field = None
+    _model_fields[cls, name] = field
+    return field
+
+
+def _defaults(template):
+    """
+    Returns the options of ``template``, merged with the default and the
+    settings-based options of ``django-preserialize``.
+    """
+    options = dict(template)
+    if 'key_map' in options and 'aliases' not in options:
+        options['aliases'] = options.pop('key_map')
+    if 'key_prefix' in options and 'prefix' not in options:
+        options['prefix'] = options.pop('key_prefix')
+
+    defaults = DEFAULT_OPTIONS.copy()
+    defaults.update(getattr(settings, 'PRESERIALIZE_OPTIONS', {}))
+    defaults.update(options)
+    defaults.setdefault('fields', [])
+    defaults.setdefault('related', {})
+    return defaults
+
+
+class SerializationPlan(object):
+    """
+    Compiled ``django-preserialize`` template. ``serialize`` returns the same
+    python data structures as ``preserialize.serialize(obj, **template)``.
+    """
+    def __init__(self, template):
+        self.template = template
+        self.options = options = _defaults(template)
+        self.fields = options['fields']
+        self.exclude = options.get('exclude', None)
+        self.key_map = template.get('key_map', None)
+        self.aliases = options['aliases']
+        self.prehook = options['prehook']
+        self.posthook = options['posthook']
+        self.allow_missing = options['allow_missing']
+        # Whether a related model instance is represented by the value of its
+        # only field, rather than a dictionary
+        self.flat = len(options['fields']) == 1 and options['flat'] \
+            and not options['merge']
+        self.merge = options['merge']
+
+        self.selectors = {}     # model -> selected fields
+        self.getters = {}       # (model, instance class) -> getters
+        self.related = {}       # field -> plan of its related objects
+
+    def get_selectors(self, model):
+        """
+        Returns the template fields of ``model``, with the pseudo selectors
+        resolved and the excluded fields left out.
+        """
+        try:
+            return self.selectors[model]
+        except KeyError:
+            selectors = self.selectors[model] = parse_selectors(
+                model, self.fields, self.exclude, self.key_map
+            )
+            return selectors
+
+    def get_getters(self, model, cls):
+        """
+        Returns a list of ``(key, field name, accessor, model field)`` tuples
+        for the template fields of ``model``, serialized from instances of
+        class ``cls``.
+        """
+        try:
+            return self.getters[model, cls]
+        except KeyError:
+            pass
+
+        getters = []
+        for alias in self.get_selectors(model):
+            accessor = self.aliases.get(alias, alias)
+            getters.append((
+                self.get_key(alias), alias, accessor,
+                _get_model_field(cls, accessor),
+            ))
+        self.getters[model, cls] = getters
+        return getters
+
+    def get_key(self, alias):
+        """
+        Returns the output key of field ``alias``.
+        """
+        key = self.options['prefix'] + alias
+        if self.options['camelcase']:
+            key = convert_to_camel(key)
+        return key
+
+    def get_related_plan(self, alias, accessor):
+        """
+        Returns the plan that serializes the related objects of field
+        ``alias``.
+        """
+        try:
+            return self.related[alias]
+        except KeyError:
+            pass
+
+        template = self.options['related'].get(accessor, {})
+        prefix = _defaults(template)['prefix']
+        if '%(accessor)s' in prefix:
+            template = dict(template, prefix=prefix % {'accessor': alias})
+        plan = self.related[alias] = SerializationPlan(template)
+        return plan
+
+    def serialize(self, obj):
+        """
+        Serializes ``obj`` to python data structures.
+        """
+        if isinstance(obj, models.Model):
+            cls = obj.__class__
+            return self.model_to_dict(obj, self.get_getters(cls, cls), True)
+
+        if isinstance(obj, QuerySet):
+            return self.queryset_to_list(obj)
+
+        if isinstance(obj, dict):
+            exclude = self.exclude or []
+            fields = self.fields or obj.keys()
+            getters = [
+                (self.get_key(alias), alias, self.aliases.get(alias, alias),
+                 None)
+                for alias in fields if alias not in exclude
+            ]
+            return self.model_to_dict(obj, getters, True)
+
+        if hasattr(obj, '__iter__'):
+            return [self.serialize(item) for item in obj]
+
+        return obj
+
+    def queryset_to_list(self, queryset):
+        model = queryset.model
+
+        prehook = self.prehook
+        if prehook:
+            if isinstance(prehook, collections.Callable):
+                queryset = prehook(queryset)
+                if queryset is None:
+                    return []
+            else:
+                queryset = queryset.filter(**prehook)
+
+        if 'select_related' in self.options:
+            queryset = queryset.select_related(*self.options['select_related'])
+
+        if self.options['values_list']:
+            fields = self.get_selectors(model)
+            if len(fields) == 1:
+                queryset = queryset.values_list(
+                    fields[0], flat=self.options['flat']
+                )
+            else:
+                queryset = queryset.values_list(*fields)
+            return list(queryset)
+
+        model_to_dict = self.model_to_dict
+        get_getters = self.get_getters
+        return [
+            model_to_dict(item, get_getters(model, item.__class__), False)
+            for item in queryset
+        ]
+
+    def model_to_dict(self, instance, getters, prehook):
+        """
+        Serializes a model instance or dictionary to a dictionary. The
+        ``prehook`` option is only applied to single instances, like
+        ``django-preserialize`` does.
+        """
+        attrs = {}
+
+        if prehook and isinstance(self.prehook, collections.Callable):
+            instance = self.prehook(instance)
+            if instance is None:
+                return attrs
+
+        is_model = isinstance(instance, models.Model)
+        for key, alias, accessor, field in getters:
+            # ``hasattr`` semantics: any exception means a missing attribute
+            try:
+                value = getattr(instance, accessor)
+            except Exception:
+                value = self.get_missing_value(instance, accessor)
+            else:
+                if field is not None and is_model:
+                    value = field.get_prep_value(value)
+
+            if value.__class__.__name__ in RELATED_MANAGERS:
+                value = value.all()
+            elif isinstance(value, collections.Callable):
+                value = value()
+
+            if isinstance(value, models.Model):
+                plan = self.get_related_plan(alias, accessor)
+                if plan.flat:
+                    value = list(plan.serialize(value).values())[0]
+                elif plan.merge:
+                    attrs.update(plan.serialize(value))
+                    continue
+                else:
+                    value = plan.serialize(value)
+            elif isinstance(value, QuerySet):
+                value = self.get_related_plan(alias, accessor) \
+                    .serialize(value)
+
+            attrs[key] = value
+
+        if self.posthook:
+            attrs = self.posthook(instance, attrs)
+
+        return attrs
+
+    def get_missing_value(self, instance, accessor):
+        """
+        Returns the value of ``accessor`` for objects that don't have such an
+        attribute: The item ``accessor`` of dictionaries, or else None if the
+        template allows missing fields.
+
+        Raises:
+            ValueError
+        """
+        if hasattr(instance, '__getitem__') and accessor in instance:
+            return instance[accessor]
+        if not self.allow_missing:
+            raise ValueError(
+                '{} has no attribute {}'.format(instance, accessor)
+            )
+        return None
+
+
+def compile_template(template):
+    """
+    Returns the ``SerializationPlan`` of ``template``.
+    """
+    return SerializationPlan(template)
@@ -8,6 +8,10 @@ request, the ``Proxy`` instance will run throuh all handlers, one-by-one,
 and the first one for whom the request is authenticated, will serve it.
 If the request can't authenticate for any of the handlers, the proxy
 returns a 403 status code.
+Before a handler is instantiated, the proxy asks its authentication method
+whether the request could possibly authenticate(e.g. whether it carries an
+``Authorization: JWT`` header), and skips it otherwise. The handlers are still
+tried in the order they were declared.
 The proxy expects that all handlers return an ``HttpResponse`` object.
 """
 from django import http
@@ -16,12 +20,25 @@ from django import http
 class Proxy(object):
     def __init__(self, *args):
         self.handlers = tuple(args)
+        # Pre-dispatch index, built once: every handler, in declared order,
+        # along with the cheap check of its authentication method.
+        self.index = tuple(
+            (handler, handler.may_authenticate) for handler in self.handlers
+        )
 
     def choose_handler(self, request, *args, **kwargs):
         """
         Returns the handler instance responsible to serve this request
         """
-        for handler in self.handlers:
+        # Every request gets fresh handler instances. Handlers keep request
+        # specific state on ``self``, and reusing(pooling) instances would
+        # mean resetting that state, which is no cheaper than building them:
+        # instantiating a handler is a plain ``object`` construction, since
+        # all the metaclass work happens once, at class creation time.
+        for handler, may_authenticate in self.index:
+            if not may_authenticate(request):
+                continue
+
             h = handler()
             h.request = request
             h.args = args
@@ -1,8 +1,104 @@
+from django.conf import settings
 from django.http import HttpResponse
-from django.core.serializers.json import DateTimeAwareJSONEncoder
+from django.http import StreamingHttpResponse
+from django.db.models.query import prefetch_related_objects
+from firestone import json_backends
+from firestone import binary_formats
+from firestone import negotiation
+from firestone import streams
+from firestone import xlsx
 import tablib
-import json
-import StringIO
+import tempfile
+import string
+import csv
+
+
+XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class Echo(object):
+    """
+    File-like object whose ``write`` method returns the value written, so
+    that ``csv.writer`` can produce the CSV text one row at a time.
+    """
+    def write(self, value):
+        return value
+
+
+# Translation table of ``str.translate``, that replaces the characters TSV
+# values can't contain with spaces
+TSV_TRANSLATION = string.maketrans('\t\r\n', '   ')
+
+
+def encode(value):
+    """
+    Returns the UTF-8 encoded ``value``, if it's a unicode string.
+    """
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+
+def get_path_value(value, path):
+    """
+    Returns the value of ``value`` under the keys of ``path``, or the list of
+    values, if any of the keys refers to a list of dictionaries.
+    """
+    for i, key in enumerate(path):
+        if isinstance(value, list):
+            return [get_path_value(element, path[i:]) for element in value]
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+class StreamedData(object):
+    """
+    Iterable over the items of a queryset, each one serialized to python data
+    structures only when the iteration reaches it. Used in place of a fully
+    serialized list, when the response is streamed.
+    """
+    # Number of model instances whose ``prefetch_related`` lookups are
+    # fetched at once
+    chunk_size = 500
+
+    def __init__(self, queryset, serialize):
+        self.queryset = queryset
+        self.serialize = serialize
+
+    def __iter__(self):
+        # ``iterator`` refetches querysets that have already been evaluated
+        # (possibly modified by ``inject_data_hook``)
+        if self.queryset._result_cache is not None:
+            for item in self.queryset:
+                yield self.serialize(item)
+            return
+
+        for chunk in self.chunks():
+            for item in chunk:
+                yield self.serialize(item)
+
+    def chunks(self):
+        """
+        Yields lists of up to ``chunk_size`` model instances of the queryset.
+        ``iterator`` doesn't cache the model instances, but it ignores
+        ``prefetch_related`` lookups, so they are applied on each chunk.
+        """
+        lookups = self.queryset._prefetch_related_lookups
+        chunk = []
+        for item in self.queryset.iterator():
+            chunk.append(item)
+            if len(chunk) == self.chunk_size:
+                if lookups:
+                    prefetch_related_objects(chunk, lookups)
+                yield chunk
+                chunk = []
+
+        if chunk:
+            if lookups:
+                prefetch_related_objects(chunk, lookups)
+            yield chunk
 
 
 class SerializerMixin(object):
@@ -14,34 +110,251 @@ class SerializerMixin(object):
     MAPPER = {
         'application/json': 'serialize_to_json',
         'application/vnd.ms-excel': 'serialize_to_excel',
+        'text/csv': 'serialize_to_csv',
+        'text/tab-separated-values': 'serialize_to_tsv',
+        XLSX: 'serialize_to_xlsx',
+        streams.NDJSON: 'serialize_to_ndjson',
     }
+    # Serialization formats that can be written incrementally, for data
+    # containing ``StreamedData``
+    STREAMING_MAPPER = {
+        'application/json': 'stream_to_json',
+        'text/csv': 'stream_to_csv',
+        'text/tab-separated-values': 'stream_to_tsv',
+        XLSX: 'stream_to_xlsx',
+        streams.NDJSON: 'stream_to_ndjson',
+    }
+    # Binary formats, if their libraries are installed
+    if binary_formats.msgpack is not None:
+        MAPPER.update(dict.fromkeys(
+            binary_formats.MSGPACK_TYPES, 'serialize_to_msgpack'
+        ))
+    if binary_formats.cbor2 is not None:
+        MAPPER.update(dict.fromkeys(
+            binary_formats.CBOR_TYPES, 'serialize_to_cbor'
+        ))
+
+    # Media types of ``MAPPER`` in order of preference. Set by
+    # ``get_serialization_formats``
+    serialization_formats = None
+
+    # Size of the chunks that spreadsheet files are streamed in
+    file_chunk_size = 64 * 1024
+
+    # Whether JSON output is pretty printed(indented), or compact. If None,
+    # the ``FIRESTONE_PRETTY_JSON`` setting is used, which defaults to
+    # ``DEBUG``. Clients can always ask for indented output with the
+    # ``indent`` parameter of the Accept header, e.g.
+    # ``Accept: application/json; indent=4``
+    pretty_json = None
+    # Indentation of pretty printed JSON output
+    json_indent = 4
+    # Largest indentation that clients can ask for, with the ``indent``
+    # parameter of the Accept header, since the size of the response grows
+    # with it
+    max_json_indent = 8
+    # Name of the ``json_backends`` backend that encodes JSON output. If
+    # None, the ``FIRESTONE_JSON_BACKEND`` setting is used.
+    json_backend = None
+
+    @classmethod
+    def get_serialization_formats(cls):
+        """
+        Returns the media types of ``MAPPER``, in the server's order of
+        preference: ``DEFAULT_SERIALIZATION_FORMAT`` first, and then the
+        rest alphabetically. Computed once per class(by the metaclass, for
+        handler classes).
+        """
+        formats = cls.__dict__.get('serialization_formats')
+        if formats is None:
+            formats = tuple(sorted(
+                cls.MAPPER,
+                key=lambda media_type: (
+                    media_type != cls.DEFAULT_SERIALIZATION_FORMAT, media_type
+                ),
+            ))
+            cls.serialization_formats = formats
+        return formats
 
     def get_serialization_format(self):
         """
         Returns the serialization format that the ``request``'s ``Accept``
-        header wants. Returns ``DEFAULT_SERIALIZATION_FORMAT`` if header
-        doesn't match any of the provided serializaion formats.
+        header prefers(see module ``negotiation``). Returns
+        ``DEFAULT_SERIALIZATION_FORMAT`` if header doesn't accept any of the
+        provided serializaion formats.
         """
         accept_header = self.request.META.get('HTTP_ACCEPT', '')
         if accept_header:
-            accept_header = accept_header.split(',')
-            accept_header = [value.strip().lower() for value in accept_header]
-            for preference in accept_header:
-                if preference in self.MAPPER:
-                    return preference
+            ser_format = negotiation.select(
+                accept_header, self.get_serialization_formats()
+            )
+            if ser_format is not None:
+                return ser_format
         return self.DEFAULT_SERIALIZATION_FORMAT
 
     def get_serializer(self, ser_format):
         return getattr(self, self.MAPPER[ser_format])
 
+    def get_json_indent(self):
+        """
+        Returns the indentation level of the JSON output, or None for
+        compact output. The ``indent`` parameter of the ``application/json``
+        media type in the Accept header takes precedence over the
+        ``pretty_json`` attribute and the ``FIRESTONE_PRETTY_JSON`` setting.
+        It's capped to ``max_json_indent``.
+        """
+        accept_header = self.request.META.get('HTTP_ACCEPT', '')
+        if accept_header:
+            indent = negotiation.get_params(
+                accept_header, 'application/json'
+            ).get('indent')
+            if indent is not None:
+                try:
+                    return min(max(int(indent), 0), self.max_json_indent)
+                except ValueError:
+                    pass
+
+        pretty = self.pretty_json
+        if pretty is None:
+            pretty = getattr(settings, 'FIRESTONE_PRETTY_JSON', settings.DEBUG)
+        return pretty and self.json_indent or None
+
+    def to_json(self, data, indent=None):
+        """
+        Returns the JSON text of ``data``, encoded by the ``json_backend``.
+        Output is compact, unless ``indent`` is given.
+        """
+        return json_backends.get_backend(self.json_backend).dumps(
+            data, indent
+        )
+
     def serialize_to_json(self, data):
         return (
-            json.dumps(data, cls=DateTimeAwareJSONEncoder,
-                       ensure_ascii=False, indent=4),
+            self.to_json(data, self.get_json_indent()),
             {'Content-Type': 'application/json; charset=utf-8'}
         )
 
-    def serialize_to_excel(self, data):
+    def stream_to_json(self, data):
+        """
+        Streaming counterpart of ``serialize_to_json``. ``data`` is the
+        dictionary built by the handler's ``package`` method, whose ``data``
+        value is a ``StreamedData`` instance.
+
+        Returns:
+            (generator of JSON text chunks, headers)
+        """
+        indent = self.get_json_indent()
+        # Same separators as ``to_json``
+        comma, colon = indent is None and (',', ':') or (', ', ': ')
+
+        def stream():
+            yield '{"data"%s[' % colon
+            count = 0
+            for item in data['data']:
+                if count:
+                    yield comma
+                yield self.to_json(item, indent)
+                count += 1
+            yield ']%s"count"%s%d' % (comma, colon, count)
+
+            for key, value in data.items():
+                if key not in ('data', 'count'):
+                    yield '%s%s%s%s' % (
+                        comma, self.to_json(key), colon,
+                        self.to_json(value, indent)
+                    )
+            yield '}'
+
+        return stream(), {'Content-Type': 'application/json; charset=utf-8'}
+
+    def get_metadata_headers(self, data):
+        """
+        Returns the response headers that carry the metadata of ``data``, the
+        dictionary built by the handler's ``package`` method, for formats
+        that only hold the items: ``X-Count``, and ``X-Pagination-<Key>``
+        for each key of ``pagination``(e.g. ``X-Pagination-Total-Pages``).
+        Missing(None) values are left out, like the count of streamed data.
+        """
+        metadata = [('count', data.get('count'))]
+        metadata.extend(
+            ('pagination-' + key, value)
+            for key, value in sorted((data.get('pagination') or {}).items())
+        )
+
+        headers = {}
+        for key, value in metadata:
+            if value is None:
+                continue
+            if not isinstance(value, basestring):
+                value = self.to_json(value)
+            name = '-'.join(part.capitalize() for part in
+                            key.replace('_', '-').split('-'))
+            headers['X-' + name] = value
+        return headers
+
+    def serialize_to_ndjson(self, data):
+        body, headers = self.stream_to_ndjson(data)
+        return ''.join(body), headers
+
+    def stream_to_ndjson(self, data):
+        """
+        Writes the items of ``data['data']`` as NDJSON(newline-delimited
+        JSON), one compact JSON text per line. The rest of the dictionary
+        built by the handler's ``package`` method is sent in the headers(see
+        ``get_metadata_headers``), except for the debug data.
+
+        Returns:
+            (generator of NDJSON lines, headers)
+        """
+        from firestone.exceptions import Unprocessable
+
+        if not isinstance(data, dict) or 'data' not in data:
+            # This should never happen
+            raise Unprocessable('Fatal Error. Cannot process')
+
+        items = data['data']
+        if items is None:
+            # Responses that only carry the count
+            items = []
+        elif not isinstance(items, (list, tuple, StreamedData)):
+            items = [items]
+
+        def stream():
+            for item in items:
+                yield self.to_json(item) + '\n'
+
+        headers = self.get_metadata_headers(data)
+        headers['Content-Type'] = streams.NDJSON + '; charset=utf-8'
+        return stream(), headers
+
+    def serialize_to_msgpack(self, data):
+        return (
+            binary_formats.msgpack_dumps(data),
+            {'Content-Type': binary_formats.MSGPACK}
+        )
+
+    def serialize_to_cbor(self, data):
+        return (
+            binary_formats.cbor_dumps(data),
+            {'Content-Type': binary_formats.CBOR}
+        )
+
+    def get_tabular_rows(self, data, flatten=True):
+        """
+        Lays out ``data``, the dictionary built by the handler's ``package``
+        method, in rows of spreadsheet cells. Only ``data['data']`` is
+        included. The first row holds the column headers(see
+        ``get_tabular_columns``). If ``flatten`` is False, related objects
+        are not flattened to columns of their own, but laid out in a single
+        cell, like any other dictionary.
+
+        Returns:
+            Generator of lists. Items of ``StreamedData`` are laid out one
+            at a time, while the generator is consumed.
+
+        Raises:
+            Unprocessable, NotAcceptable: ``data`` can't be laid out in rows
+        """
         from firestone.exceptions import NotAcceptable
         from firestone.exceptions import Unprocessable
 
@@ -54,60 +367,180 @@ class SerializerMixin(object):
 
         data = data['data']
         # data should only be a dictionary or list(of dictionaries),
-        # otherwise we can't serialize to excel
-        if not isinstance(data, list) and not isinstance(data, dict):
+        # otherwise we can't serialize to a spreadsheet
+        if not isinstance(data, (list, dict, StreamedData)):
             raise NotAcceptable()
 
         # if ``data`` is a dictionary, we make it into a list
         if isinstance(data, dict):
             data = [data, ]
 
-        def process(value):
-            # Returns a clean representation of ``value``
-            if isinstance(value, dict):
-                return ', '.join([
-                    '%s: %s' % (process(k), process(v))
-                    for k, v in value.items()
-                ])
-            elif isinstance(value, list) \
-                or isinstance(value, tuple) \
-                    or isinstance(value, set):
-                return ', '.join([process(element) for element in value])
-
-            try:
-                return str(value)
-            except UnicodeEncodeError:
-                return unicode(value)
-
-        # Excel Sheet headers. We lay them out, in the order they are defined
-        # in the handler's ``template['fields']`` attribute
-        headers = [
-            field for field in self.template['fields'] if field in data[0]
-        ]
-
-        # We layout the values into a list of tuples, with each tuple element
-        # corresponding to a header
-        values = []
-        for element in data:
-            values.append(
-                [process(element.get(key)) for key in headers]
-            )
+        def rows():
+            columns = None
+            for element in data:
+                if columns is None:
+                    columns = self.get_tabular_columns(
+                        self.template, element, flatten
+                    )
+                    yield ['.'.join(column) for column in columns]
+                # Each value corresponds to a header
+                yield [
+                    self.to_cell(get_path_value(element, column))
+                    for column in columns
+                ]
+
+        return rows()
+
+    def get_tabular_columns(self, template, element, flatten=True):
+        """
+        Returns the columns of the items laid out by ``get_tabular_rows``,
+        as tuples of keys, in the order the fields are defined in
+        ``template['fields']``. Only the fields that ``element``, the first
+        item, contains are included.
+
+        The fields of related objects, defined in ``template['related']``,
+        are flattened to columns of their own, whose headers are the dotted
+        paths of the fields, e.g. ``author.name``. The values of the fields
+        of many related objects are joined in a single cell. Unless
+        ``flatten`` is False, in which case every field is a single column.
+        """
+        related = flatten and template.get('related', {}) or {}
+        columns = []
+        for field in template['fields']:
+            if element is not None and field not in element:
+                continue
+
+            value = element.get(field) if element is not None else None
+            if isinstance(value, list):
+                value = value and value[0] or None
+            if field in related and 'fields' in related[field] \
+                    and not related[field].get('values_list') \
+                    and (value is None or isinstance(value, dict)):
+                subcolumns = self.get_tabular_columns(related[field], value)
+                if subcolumns:
+                    columns.extend((field, ) + column for column in subcolumns)
+                    continue
+            columns.append((field, ))
+        return columns
+
+    def to_cell(self, value):
+        """
+        Returns a clean, text representation of ``value``, for a
+        spreadsheet cell.
+        """
+        if isinstance(value, dict):
+            return ', '.join([
+                '%s: %s' % (self.to_cell(k), self.to_cell(v))
+                for k, v in value.items()
+            ])
+        elif isinstance(value, list) \
+            or isinstance(value, tuple) \
+                or isinstance(value, set):
+            return ', '.join([self.to_cell(element) for element in value])
 
-        # Create the tablib dataset
-        dataset = tablib.Dataset(*values, headers=headers, title='Sheet')
-        # Export to excel
-        stream = StringIO.StringIO()
-        stream.write(dataset.xls)
+        try:
+            return str(value)
+        except UnicodeEncodeError:
+            return unicode(value)
 
-        filename = self.excel_filename
+    def get_attachment_headers(self, content_type, filename):
+        """
+        Returns the headers of a response with an attachment. ``filename``
+        can be a string or a callable that returns a string.
+        """
         if not isinstance(filename, basestring):
             filename = filename()
 
-        return stream.getvalue(), {
-            'Content-Type': 'application/vnd.ms-excel',
+        return {
+            'Content-Type': content_type,
             'Content-Disposition': 'attachment; filename=%s;' % filename
         }
 
+    def serialize_to_excel(self, data):
+        # The layout of the .xls format predates the flattening of related
+        # objects, and is kept as is for its existing consumers
+        rows = self.get_tabular_rows(data, flatten=False)
+        headers = next(rows, [])
+
+        # Create the tablib dataset, and export it to excel
+        dataset = tablib.Dataset(*rows, headers=headers, title='Sheet')
+        return dataset.xls, self.get_attachment_headers(
+            'application/vnd.ms-excel', self.excel_filename
+        )
+
+    def serialize_to_csv(self, data):
+        body, headers = self.stream_to_csv(data)
+        return ''.join(body), headers
+
+    def stream_to_csv(self, data):
+        """
+        Writes the rows of ``data``(see ``get_tabular_rows``) as UTF-8
+        encoded CSV text.
+
+        Returns:
+            (generator of CSV text chunks, one per row, headers)
+        """
+        rows = self.get_tabular_rows(data)
+        writer = csv.writer(Echo())
+
+        def stream():
+            for row in rows:
+                yield writer.writerow([encode(value) for value in row])
+
+        return stream(), self.get_attachment_headers(
+            'text/csv; charset=utf-8', self.csv_filename
+        )
+
+    def serialize_to_tsv(self, data):
+        body, headers = self.stream_to_tsv(data)
+        return ''.join(body), headers
+
+    def stream_to_tsv(self, data):
+        """
+        Writes the rows of ``data``(see ``get_tabular_rows``) as UTF-8
+        encoded tab separated values. The format has no quoting, so tabs and
+        line breaks in the values are replaced by spaces.
+
+        Returns:
+            (generator of TSV text chunks, one per row, headers)
+        """
+        rows = self.get_tabular_rows(data)
+
+        def stream():
+            for row in rows:
+                yield '\t'.join([
+                    encode(value).translate(TSV_TRANSLATION) for value in row
+                ]) + '\n'
+
+        return stream(), self.get_attachment_headers(
+            'text/tab-separated-values; charset=utf-8', self.tsv_filename
+        )
+
+    def serialize_to_xlsx(self, data):
+        body, headers = self.stream_to_xlsx(data)
+        return ''.join(body), headers
+
+    def stream_to_xlsx(self, data):
+        """
+        Writes the rows of ``data``(see ``get_tabular_rows``) to an XLSX
+        workbook(see module ``xlsx``). The workbook is built in a temporary
+        file, instead of in memory, and is then read in chunks of
+        ``file_chunk_size`` bytes.
+
+        Returns:
+            (generator of XLSX file chunks, headers)
+        """
+        rows = self.get_tabular_rows(data)
+
+        def stream():
+            with tempfile.TemporaryFile() as f:
+                xlsx.write(rows, f)
+                f.seek(0)
+                for chunk in iter(lambda: f.read(self.file_chunk_size), ''):
+                    yield chunk
+
+        return stream(), self.get_attachment_headers(XLSX, self.xlsx_filename)
+
     def serialize(self, data, ser_format=''):
         """
         Serializes ``data`` and returns  tuple of:
@@ -119,16 +552,24 @@ class SerializerMixin(object):
         if not ser_format:
             ser_format = self.get_serialization_format()
 
-        serializer = self.get_serializer(ser_format)
+        if isinstance(data, dict) \
+                and isinstance(data.get('data', None), StreamedData):
+            serializer = getattr(self, self.STREAMING_MAPPER[ser_format])
+        else:
+            serializer = self.get_serializer(ser_format)
         data, headers = serializer(data)
         return data, headers
 
     def get_response(self, data):
         """
-        Serializers ``data`` and returns the appropriate HttpResponse object
+        Serializers ``data`` and returns the appropriate HttpResponse object.
+        Streamed data are returned in a StreamingHttpResponse object.
         """
         data, headers = self.serialize(data)
-        r = HttpResponse(data)
+        if isinstance(data, basestring):
+            r = HttpResponse(data)
+        else:
+            r = StreamingHttpResponse(data)
         for key, value in headers.items():
             r[key] = value
         return r
@@ -0,0 +1,141 @@
+"""
+This module implements the incremental parsers of request bodies, that
+``deserializers.stream_request_body`` uses to read the items of large bulk
+requests from the request stream, one at a time, instead of loading the whole
+body in memory(see ``ModelHandler.stream_post``).
+
+Every parser reads the stream with ``read(size)``, a function that returns up
+to ``size`` bytes of UTF-8 encoded data, or an empty string at the end of the
+stream, and raises ValueError when the data are not valid.
+"""
+import json_backends
+import json
+import re
+
+
+CHUNK_SIZE = 64 * 1024
+
+NDJSON = 'application/x-ndjson'
+
+WHITESPACE = ' \t\n\r'
+
+# The standard library's decoder is the only one that can decode a value that
+# is followed by more data(``raw_decode``)
+_decoder = json.JSONDecoder()
+
+# Matches any character that can't be part of a JSON number
+_not_number = re.compile(r'[^0-9.eE+-]')
+
+
+def read_all(read, chunk_size=CHUNK_SIZE):
+    """
+    Returns the rest of the stream.
+    """
+    return ''.join(iter(lambda: read(chunk_size), ''))
+
+
+def parse_json(read, chunk_size=CHUNK_SIZE):
+    """
+    Parses a JSON document from the stream.
+
+    Returns:
+        An iterator of the items of the document, if it's an array, or else
+        the decoded document, which is read in full.
+    """
+    data = buf = ''
+    while True:
+        data = read(chunk_size)
+        buf = (buf + data).lstrip(WHITESPACE)
+        if buf or not data:
+            break
+
+    if buf[:1] == '[':
+        return iter_json_array(read, buf[1:], chunk_size)
+    return json_backends.get_backend().loads(buf + read_all(read, chunk_size))
+
+
+def iter_json_array(read, buf='', chunk_size=CHUNK_SIZE):
+    """
+    Yields the items of a JSON array, whose opening bracket has already been
+    read. ``buf`` holds any data read past the bracket.
+
+    Only the item being decoded is kept in memory, and whitespace is
+    dropped as it's read. Items larger than ``chunk_size`` are decoded once
+    more after each read, which doubles the amount of data read, so that
+    they are decoded a logarithmic number of times.
+    """
+    pos = 0
+    eof = False
+    # Whether the next token is a value(or the closing bracket, for the
+    # first one), rather than a separator
+    expect_value = True
+    first = True
+
+    while True:
+        while pos < len(buf) and buf[pos] in WHITESPACE:
+            pos += 1
+
+        need_more = pos == len(buf)
+        if not need_more:
+            char = buf[pos]
+            if expect_value and not (first and char == ']'):
+                try:
+                    item, end = _decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if eof:
+                        raise
+                    need_more = True
+                else:
+                    # The value is only complete once a character that
+                    # can't be part of a number follows it, since a number at
+                    # the end of the buffer(e.g. ``12.`` of ``12.5``) may go
+                    # on in the next chunk. Whatever follows it is checked as
+                    # the next token
+                    if not eof and not _not_number.search(buf, end):
+                        need_more = True
+                    else:
+                        yield item
+                        pos = end
+                        expect_value = first = False
+            elif char == ',' and not expect_value:
+                pos += 1
+                expect_value = True
+            elif char == ']' and (first or not expect_value):
+                # Only whitespace may follow the array
+                if buf[pos + 1:].strip(WHITESPACE):
+                    raise ValueError('Extra data after the array')
+                for data in iter(lambda: read(chunk_size), ''):
+                    if data.strip(WHITESPACE):
+                        raise ValueError('Extra data after the array')
+                return
+            else:
+                raise ValueError('Invalid array')
+
+        if need_more:
+            if eof:
+                raise ValueError('Unterminated array')
+            data = read(max(chunk_size, len(buf) - pos))
+            eof = not data
+            buf = buf[pos:] + data
+            pos = 0
+
+
+def iter_ndjson(read, chunk_size=CHUNK_SIZE):
+    """
+    Yields the decoded values of the lines of an NDJSON(newline-delimited
+    JSON) stream. Empty lines are skipped.
+    """
+    loads = json_backends.get_backend().loads
+    buf = ''
+    while True:
+        data = read(chunk_size)
+        if not data:
+            break
+        lines = (buf + data).split('\n')
+        buf = lines.pop()
+        for line in lines:
+            if line.strip(WHITESPACE):
+                yield loads(line)
+
+    if buf.strip(WHITESPACE):
+        yield loads(buf)
@@ -0,0 +1,129 @@
+"""
+This module implements the cache of verified JSON Web Tokens, that
+``JWTAuthentication`` uses to skip the signature verification and decoding of
+tokens it has already seen(see ``BaseHandler.jwt_token_cache``).
+
+Entries are keyed by a SHA-256 digest of the token and of the signer's
+configuration(class, secret key, salt and algorithm), so that neither the
+tokens nor the secret are kept in memory in the clear, and changing the
+``jwt_signer`` of a handler makes the entries of the old one unreachable.
+Every entry expires together with its token.
+"""
+from utils import LRUCache
+import threading
+import hashlib
+import copy
+import time
+
+
+def get_signer_fingerprint(signer):
+    """
+    Returns:
+        A digest of the configuration of ``signer`` that affects the
+        verification of tokens.
+    """
+    secret_key = getattr(signer, 'secret_key', None)
+    if isinstance(secret_key, unicode):
+        secret_key = secret_key.encode('utf-8')
+    return hashlib.sha256(repr((
+        type(signer).__module__,
+        type(signer).__name__,
+        secret_key,
+        getattr(signer, 'salt', None),
+        getattr(signer, 'algorithm_name', None),
+    ))).digest()
+
+
+class TokenCache(object):
+    """
+    Per-process LRU cache of the payloads of up to ``maxsize`` verified
+    tokens.
+
+    Entries are kept for at most ``timeout`` seconds(forever, if None), and
+    never past the ``exp`` date of their token. Tokens that fail verification
+    are never cached.
+    """
+    def __init__(self, maxsize=4096, timeout=300):
+        self.local = LRUCache(maxsize)
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def get_key(self, signer, token):
+        if isinstance(token, unicode):
+            token = token.encode('utf-8')
+        return hashlib.sha256(get_signer_fingerprint(signer) + token).digest()
+
+    def loads(self, signer, token):
+        """
+        Invoked by ``JWTAuthentication.is_authenticated``.
+
+        Returns:
+            The payload of ``token``, as verified by ``signer``.
+
+        Raises:
+            itsdangerous.BadSignature and subclasses, like ``signer.loads``.
+        """
+        key = self.get_key(signer, token)
+        entry = self.local.get(key)
+        if entry is not None:
+            payload, expires = entry
+            if time.time() < expires:
+                self._count('hits')
+                return copy.copy(payload)
+            # Verified once more, so that the signer raises the proper
+            # ``SignatureExpired`` error
+            self.local.pop(key)
+
+        self._count('misses')
+        payload, header = signer.loads(token, return_header=True)
+        self.local.set(key, (payload, self.get_expiry(header)))
+        return copy.copy(payload)
+
+    def get_expiry(self, header):
+        """
+        Returns:
+            The timestamp until which the token with ``header`` may be served
+            from the cache.
+        """
+        if self.timeout is None:
+            expires = float('inf')
+        else:
+            expires = time.time() + self.timeout
+        exp = header.get('exp') if isinstance(header, dict) else None
+        if exp is not None:
+            # ``exp`` is the last second the token is valid at
+            expires = min(expires, int(exp) + 1)
+        return expires
+
+    def invalidate(self, signer, token):
+        """
+        Removes ``token`` from the cache, e.g. when it's revoked, so that its
+        next use is verified from scratch.
+        """
+        self.local.pop(self.get_key(signer, token))
+
+    def clear(self):
+        """
+        Empties the cache, e.g. when the signing secret is rotated.
+        """
+        self.local.clear()
+
+    def _count(self, counter):
+        with self.lock:
+            self.stats[counter] += 1
+
+    def get_stats(self):
+        """
+        Returns:
+            Dictionary with the number of ``hits``, ``misses``(full
+            verifications) and the current ``size`` of the cache.
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        stats['size'] = len(self.local)
+        return stats
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {'hits': 0, 'misses': 0}
@@ -0,0 +1,182 @@
+"""
+This module defines the user resolvers, that ``JWTAuthentication`` uses to
+fetch the User instance a verified token refers to(see
+``BaseHandler.jwt_user_resolver``).
+
+``UserResolver`` queries the database on every request.
+``CachedUserResolver`` keeps the resolved users in a per-process LRU cache,
+and optionally in a shared Django cache backend, so that repeat requests of
+the same user don't hit the database at all. Cached users expire after the
+lifetime of the tokens, and are invalidated when the User instance is saved or
+deleted.
+
+Note that the signals only fire in the process that saved or deleted the
+User. The shared tier is invalidated for all processes, but the per-process
+tier of other processes may serve the stale instance until it expires. Choose
+``timeout`` accordingly.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models import signals
+from django.utils.encoding import force_text
+from utils import LRUCache
+import threading
+import weakref
+import copy
+import time
+User = get_user_model()
+
+
+class UserResolver(object):
+    """
+    Resolves user ids to User instances, by querying the database.
+    """
+    def resolve(self, user_id, max_age=None):
+        """
+        Invoked by ``JWTAuthentication.verify_request_user``.
+
+        Args:
+            user_id: The user id that the token carries
+            max_age: The lifetime of the token, in seconds
+
+        Returns:
+            User instance, or None if there is no such user.
+        """
+        try:
+            return User.objects.get(id=user_id)
+        except User.DoesNotExist:
+            return None
+
+    def get_stats(self):
+        """
+        Returns:
+            Dictionary of the resolver's counters, or None if it keeps none.
+        """
+        return None
+
+
+# Live ``CachedUserResolver`` instances, invalidated by the User signals
+_resolvers = weakref.WeakSet()
+
+
+def on_user_change(sender, instance, **kwargs):
+    """
+    Receiver of the User ``post_save`` and ``post_delete`` signals. Newly
+    created users are never cached, so it doesn't need to run for bulk
+    created ones.
+    """
+    for resolver in list(_resolvers):
+        resolver.invalidate(instance.pk)
+
+
+class CachedUserResolver(UserResolver):
+    """
+    Resolves user ids to User instances, through a per-process LRU cache of
+    ``maxsize`` users and, if ``cache_alias`` is given, the Django cache
+    backend of that alias.
+
+    Users are cached for ``timeout`` seconds, bounded by the lifetime of the
+    token(the ``max_age`` argument of ``resolve``). Every call returns a copy
+    of the cached instance, so that a request can't alter the users of other
+    requests.
+    """
+    key_prefix = 'firestone.user.'
+
+    def __init__(self, maxsize=1024, timeout=300, cache_alias=None):
+        self.local = LRUCache(maxsize)
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+        _resolvers.add(self)
+        uid = 'firestone.users.invalidate'
+        signals.post_save.connect(
+            on_user_change, sender=User, weak=False, dispatch_uid=uid
+        )
+        signals.post_delete.connect(
+            on_user_change, sender=User, weak=False, dispatch_uid=uid
+        )
+
+    def resolve(self, user_id, max_age=None):
+        """
+        Invoked by ``JWTAuthentication.verify_request_user``.
+
+        Args:
+            user_id: The user id that the token carries
+            max_age: The lifetime of the token, in seconds
+
+        Returns:
+            User instance, or None if there is no such user.
+        """
+        key = force_text(user_id)
+        now = time.time()
+
+        entry = self.local.get(key)
+        if entry is not None and entry[1] > now:
+            self._count('hits')
+            return copy.copy(entry[0])
+
+        timeout = self.get_timeout(max_age)
+        if self.cache_alias is not None:
+            user = caches[self.cache_alias].get(self.key_prefix + key)
+            if user is not None:
+                self._count('shared_hits')
+                self.local.set(key, (user, now + timeout))
+                return copy.copy(user)
+
+        self._count('misses')
+        user = super(CachedUserResolver, self).resolve(user_id, max_age)
+        if user is None:
+            # Not cached, so that a user created later on is found
+            return None
+
+        self.local.set(key, (user, now + timeout))
+        if self.cache_alias is not None:
+            caches[self.cache_alias].set(self.key_prefix + key, user, timeout)
+        return copy.copy(user)
+
+    def get_timeout(self, max_age=None):
+        """
+        Returns:
+            The number of seconds to cache a user for, which is never longer
+            than the lifetime of the token.
+        """
+        if max_age is None:
+            return self.timeout
+        return min(self.timeout, max_age)
+
+    def invalidate(self, user_id):
+        """
+        Removes the user with ``user_id`` from the cache.
+        """
+        key = force_text(user_id)
+        self.local.pop(key)
+        if self.cache_alias is not None:
+            caches[self.cache_alias].delete(self.key_prefix + key)
+
+    def clear(self):
+        """
+        Empties the per-process cache.
+        """
+        self.local.clear()
+
+    def _count(self, counter):
+        with self.lock:
+            self.stats[counter] += 1
+
+    def get_stats(self):
+        """
+        Returns:
+            Dictionary with the number of ``hits``(per-process tier),
+            ``shared_hits``(shared tier) and ``misses``(database queries),
+            and the current ``size`` of the per-process tier.
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        stats['size'] = len(self.local)
+        return stats
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {'hits': 0, 'shared_hits': 0, 'misses': 0}
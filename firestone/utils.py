@@ -0,0 +1,87 @@
+"""
+This module defines general purpose helpers, used by other modules of the
+package.
+"""
+import threading
+
+
+# Fields of the links of ``LRUCache``'s linked list
+PREV, NEXT, KEY, VALUE = 0, 1, 2, 3
+
+
+class LRUCache(object):
+    """
+    Thread-safe mapping of bounded size. When it's full, storing a new key
+    evicts the least recently used one.
+
+    The keys are kept in a circular doubly linked list, in order of use, like
+    the ``functools.lru_cache`` of python 3 does, which is cheaper to
+    reorder on every hit than an ``OrderedDict``.
+    """
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.data = {}          # key -> link ``[prev, next, key, value]``
+        self.root = []          # Sentinel link, between the newest and oldest
+        self.root[:] = [self.root, self.root, None, None]
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value of ``key``, marking it as the most recently used, or
+        ``default`` if ``key`` is not cached.
+        """
+        with self.lock:
+            link = self.data.get(key)
+            if link is None:
+                return default
+            # Move the link in front of the root, as the newest
+            prev, next = link[PREV], link[NEXT]
+            prev[NEXT] = next
+            next[PREV] = prev
+            root = self.root
+            last = root[PREV]
+            last[NEXT] = root[PREV] = link
+            link[PREV] = last
+            link[NEXT] = root
+            return link[VALUE]
+
+    def set(self, key, value):
+        """
+        Caches ``value`` under ``key``, evicting the least recently used key
+        if the cache is full.
+        """
+        with self.lock:
+            self._unlink(key)
+            root = self.root
+            last = root[PREV]
+            link = [last, root, key, value]
+            last[NEXT] = root[PREV] = self.data[key] = link
+            while len(self.data) > self.maxsize:
+                self._unlink(root[NEXT][KEY])
+
+    def pop(self, key, default=None):
+        """
+        Removes ``key`` from the cache, and returns its value, or ``default``
+        if ``key`` is not cached.
+        """
+        with self.lock:
+            link = self._unlink(key)
+            return default if link is None else link[VALUE]
+
+    def _unlink(self, key):
+        link = self.data.pop(key, None)
+        if link is not None:
+            link[PREV][NEXT] = link[NEXT]
+            link[NEXT][PREV] = link[PREV]
+        return link
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.root[:] = [self.root, self.root, None, None]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
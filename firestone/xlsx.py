@@ -0,0 +1,122 @@
+"""
+This module implements a minimal, write-only XLSX(Office Open XML
+spreadsheet) writer, used by ``serializers.SerializerMixin.stream_to_xlsx``.
+
+Rows are written to the worksheet XML in a temporary file as they come, with
+all cells as inline strings, so that no shared string table, or any other
+per-row state, is kept in memory. The memory usage doesn't depend on the
+number of rows.
+"""
+from xml.sax.saxutils import escape
+import tempfile
+import zipfile
+import re
+
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'content-types">'
+    '<Default Extension="rels" ContentType="application/'
+    'vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/'
+    'main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships">'
+    '<sheets><sheet name="%s" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/'
+    'main"><sheetData>'
+)
+
+SHEET_END = '</sheetData></worksheet>'
+
+# Characters that XML 1.0 doesn't allow
+ILLEGAL_CHARACTERS = re.compile(u'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def get_column_letter(index):
+    """
+    Returns the letters of the column with the 0-based ``index``, e.g. ``A``
+    for 0, ``AA`` for 26.
+    """
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def to_xml(value):
+    """
+    Returns the UTF-8 encoded, escaped XML text of cell ``value``.
+    """
+    if not isinstance(value, unicode):
+        value = str(value).decode('utf-8', 'replace')
+    return escape(ILLEGAL_CHARACTERS.sub(u'', value)).encode('utf-8')
+
+
+def write(rows, f, title='Sheet'):
+    """
+    Writes the XLSX workbook of a single sheet named ``title``, with
+    ``rows``(an iterable of lists of values), to file object ``f``.
+    """
+    columns = []
+    with tempfile.NamedTemporaryFile() as sheet:
+        sheet.write(SHEET_START)
+        for number, row in enumerate(rows, 1):
+            while len(columns) < len(row):
+                columns.append(get_column_letter(len(columns)))
+            sheet.write('<row r="%d">' % number)
+            for column, value in zip(columns, row):
+                sheet.write(
+                    '<c r="%s%d" t="inlineStr"><is><t xml:space="preserve">'
+                    '%s</t></is></c>' % (column, number, to_xml(value))
+                )
+            sheet.write('</row>')
+        sheet.write(SHEET_END)
+        sheet.flush()
+
+        archive = zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED)
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+        archive.writestr('_rels/.rels', ROOT_RELS)
+        archive.writestr(
+            'xl/workbook.xml', WORKBOOK % to_xml(title).replace('"', '&quot;')
+        )
+        archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        archive.write(sheet.name, 'xl/worksheets/sheet1.xml')
+        archive.close()
@@ -3,10 +3,21 @@ from test_proxy import *
 from test_serializers import *
 
 from test_deserializers import *
+from test_streams import *
+
+from test_json_backends import *
+
+from test_binary_formats import *
+
+from test_negotiation import *
+
+from test_plans import *
 
 from test_exceptions import *
 
 from test_authentication import *
+from test_users import *
+from test_tokens import *
 
 from test_whole_flow import *
 
@@ -34,3 +45,8 @@ from test_handlers_paginate_data import *
 from test_handlers_inject_data_hook import *
 from test_handlers_handle_exception import *
 from test_handlers_deserialize_body import *
+from test_handlers_is_streaming import *
+from test_handlers_apply_related_lookups import *
+from test_handlers_column_pruning import *
+from test_handlers_evaluate_preconditions import *
+from test_handlers_response_cache import *
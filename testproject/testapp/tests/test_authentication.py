@@ -11,6 +11,9 @@ from django.test import RequestFactory
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import empty
 from model_mommy import mommy
 from itsdangerous import TimedJSONWebSignatureSerializer
 import urllib
@@ -332,3 +335,99 @@ class TestJWTAuthentication(TestCase):
 
 
 
+
+
+class TestMayAuthenticate(TestCase):
+    # Classmethod ``may_authenticate``, used by the ``Proxy`` to skip handlers
+
+    def test_no_authentication(self):
+        request = RequestFactory().get('/')
+        self.assertTrue(HandlerNoAuth.may_authenticate(request))
+
+    def test_session_no_user(self):
+        request = RequestFactory().get('/')
+        self.assertFalse(HandlerSessionAuth.may_authenticate(request))
+
+    def test_session_user(self):
+        request = RequestFactory().get('/')
+        request.user = mommy.make(User)
+        self.assertTrue(HandlerSessionAuth.may_authenticate(request))
+
+    def test_session_lazy_user_no_cookie(self):
+        request = RequestFactory().get('/')
+        SessionMiddleware().process_request(request)
+        AuthenticationMiddleware().process_request(request)
+        self.assertFalse(HandlerSessionAuth.may_authenticate(request))
+        # The lazy user has not been resolved
+        self.assertIs(request.user._wrapped, empty)
+
+    def test_session_lazy_user_with_cookie(self):
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = 'key'
+        SessionMiddleware().process_request(request)
+        AuthenticationMiddleware().process_request(request)
+        self.assertTrue(HandlerSessionAuth.may_authenticate(request))
+
+    def test_signature(self):
+        request = RequestFactory().get('/')
+        self.assertFalse(HandlerSignatureAuth.may_authenticate(request))
+
+        request = RequestFactory().get(
+            '/?%s=signature' % HandlerSignatureAuth.sig_param
+        )
+        self.assertTrue(HandlerSignatureAuth.may_authenticate(request))
+
+    def test_jwt(self):
+        request = RequestFactory().get('/')
+        self.assertFalse(HandlerJWTAuth.may_authenticate(request))
+
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='Basic abc')
+        self.assertFalse(HandlerJWTAuth.may_authenticate(request))
+
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='JWT token')
+        self.assertTrue(HandlerJWTAuth.may_authenticate(request))
+
+    def test_jwt_whitespace(self):
+        # Agrees with ``is_authenticated`` on any whitespace around the token
+        mommy.make(User)
+        token = HandlerJWTAuth.jwt_signer.dumps({'iss': 1})
+        for header in ('JWT %s', 'JWT\t%s', 'JWT  %s', ' JWT %s', 'JWT\n%s'):
+            request = RequestFactory().get(
+                '/', HTTP_AUTHORIZATION=header % token
+            )
+            handler = init_handler(HandlerJWTAuth, request)
+            self.assertTrue(handler.is_authenticated())
+            self.assertTrue(HandlerJWTAuth.may_authenticate(request))
+
+        for header in ('JWTX %s', 'Bearer %s', '%s'):
+            request = RequestFactory().get(
+                '/', HTTP_AUTHORIZATION=header % token
+            )
+            handler = init_handler(HandlerJWTAuth, request)
+            self.assertFalse(handler.is_authenticated())
+            self.assertFalse(HandlerJWTAuth.may_authenticate(request))
+
+
+class TestCacheScope(TestCase):
+    # Methods ``get_cache_scope`` and ``get_cache_ignored_params``, used by
+    # the response cache
+
+    def test_anonymous(self):
+        handler = init_handler(HandlerNoAuth, RequestFactory().get('/'))
+        self.assertEqual(handler.get_cache_scope(), 'anonymous')
+        self.assertEqual(handler.get_cache_ignored_params(), ())
+
+    def test_user(self):
+        request = RequestFactory().get('/')
+        request.user = mommy.make(User)
+        handler = init_handler(HandlerSessionAuth, request)
+        self.assertEqual(
+            handler.get_cache_scope(), 'user:%s' % request.user.pk
+        )
+
+    def test_signature_params(self):
+        handler = init_handler(HandlerSignatureAuth, RequestFactory().get('/'))
+        self.assertEqual(
+            handler.get_cache_ignored_params(),
+            (handler.sig_param, handler.max_age_param)
+        )
@@ -0,0 +1,159 @@
+# coding: UTF-8
+
+"""
+This module tests the ``firestone.binary_formats`` module, and the
+MessagePack and CBOR serializers and deserializers that use it. Every format
+has to produce the same values as the standard library's ``json`` module with
+Django's ``DateTimeAwareJSONEncoder``.
+"""
+from firestone import binary_formats
+from firestone import serializers
+from firestone import deserializers
+from firestone import exceptions
+from firestone.handlers import ModelHandler
+from django.test import TestCase
+from django.test import RequestFactory
+from django.core.serializers.json import DateTimeAwareJSONEncoder
+from django.contrib.auth.models import User
+from django.utils import timezone
+from model_mommy import mommy
+from datetime import datetime, date, time
+from decimal import Decimal
+from unittest import skipIf
+import uuid
+import json
+
+
+FIXTURES = (
+    'string',
+    u'Χαράλαμπος',
+    1,
+    -12345678901234,
+    0.1,
+    True,
+    None,
+    [],
+    {},
+    [1, 'a', None, [2, [3, {'key': 'value'}]]],
+    {'key': {'nested': [1, 2, {'deeper': u'Χ'}]}},
+    datetime(2015, 3, 14, 15, 9, 26, 535897),
+    datetime(2015, 3, 14, 15, 9, 26, tzinfo=timezone.utc),
+    date(2015, 3, 14),
+    time(15, 9, 26),
+    Decimal('3.14159'),
+    uuid.UUID('12345678123456781234567812345678'),
+    {'created': datetime(2015, 3, 14), 'amount': Decimal('10.50')},
+)
+
+
+def expected(data):
+    # What the stdlib produces, decoded back to python data structures
+    return json.loads(json.dumps(data, cls=DateTimeAwareJSONEncoder))
+
+
+def init_handler(handler, request, *args, **kwargs):
+    handler.request = request
+    handler.args = args
+    handler.kwargs = kwargs
+    return handler
+
+
+class UserHandler(ModelHandler):
+    model = User
+    http_methods = ['GET', 'POST']
+    template = {'fields': ['id', 'username', 'first_name', 'date_joined']}
+    post_body_fields = ['username', 'first_name', 'password']
+
+
+@skipIf(binary_formats.msgpack is None, 'msgpack is not installed')
+class TestMsgpack(TestCase):
+    def test_round_trip(self):
+        for data in FIXTURES:
+            self.assertEqual(
+                binary_formats.msgpack_loads(
+                    binary_formats.msgpack_dumps(data)
+                ),
+                expected(data),
+            )
+
+    def test_invalid(self):
+        for data in ('', '\xc1', '\x92\x01'):
+            self.assertRaises(ValueError, binary_formats.msgpack_loads, data)
+
+    def test_registered(self):
+        for media_type in binary_formats.MSGPACK_TYPES:
+            s = serializers.SerializerMixin()
+            s.request = RequestFactory().get('/', HTTP_ACCEPT=media_type)
+            self.assertEqual(s.get_serialization_format(), media_type)
+            self.assertEqual(
+                s.get_serializer(media_type), s.serialize_to_msgpack
+            )
+            self.assertEqual(
+                deserializers.deserialize(
+                    binary_formats.msgpack_dumps({'key': 'value'}), media_type
+                ),
+                {'key': 'value'},
+            )
+
+    def test_invalid_body(self):
+        self.assertRaises(
+            exceptions.BadRequest,
+            deserializers.deserialize, '\xc1', binary_formats.MSGPACK,
+        )
+
+    def test_get(self):
+        mommy.make(User, 3)
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT=binary_formats.MSGPACK
+        )
+        response = init_handler(UserHandler(), request).dispatch()
+        self.assertEqual(response['Content-Type'], binary_formats.MSGPACK)
+        data = binary_formats.msgpack_loads(response.content)
+
+        request = RequestFactory().get('/')
+        response = init_handler(UserHandler(), request).dispatch()
+        self.assertEqual(data, json.loads(response.content))
+        self.assertEqual(data['count'], 3)
+
+    def test_post(self):
+        request = RequestFactory().post(
+            '/',
+            data=binary_formats.msgpack_dumps(
+                {'username': 'user', 'first_name': u'Χαράλαμπος',
+                 'password': 'x'}
+            ),
+            content_type=binary_formats.MSGPACK,
+            HTTP_ACCEPT=binary_formats.MSGPACK,
+        )
+        response = init_handler(UserHandler(), request).dispatch()
+        self.assertEqual(response.status_code, 200)
+        data = binary_formats.msgpack_loads(response.content)
+        self.assertEqual(data['data']['first_name'], u'Χαράλαμπος')
+        self.assertEqual(
+            User.objects.get(username='user').first_name, u'Χαράλαμπος'
+        )
+
+
+@skipIf(binary_formats.cbor2 is None, 'cbor2 is not installed')
+class TestCbor(TestCase):
+    def test_round_trip(self):
+        for data in FIXTURES:
+            self.assertEqual(
+                binary_formats.cbor_loads(binary_formats.cbor_dumps(data)),
+                expected(data),
+            )
+
+    def test_invalid(self):
+        for data in ('', '\x82\x01'):
+            self.assertRaises(ValueError, binary_formats.cbor_loads, data)
+
+    def test_registered(self):
+        s = serializers.SerializerMixin()
+        s.request = RequestFactory().get('/', HTTP_ACCEPT=binary_formats.CBOR)
+        self.assertEqual(s.get_serialization_format(), binary_formats.CBOR)
+        self.assertEqual(
+            deserializers.deserialize(
+                binary_formats.cbor_dumps([1, 2]), binary_formats.CBOR
+            ),
+            [1, 2],
+        )
@@ -3,9 +3,13 @@ This module tests the ``firestone.deserializers`` module
 """
 from firestone.deserializers import _json_deserializer
 from firestone.deserializers import _form_encoded_data_deserializer
+from firestone.deserializers import _ndjson_deserializer
 from firestone.deserializers import _get_deserializer
 from firestone.deserializers import deserialize
 from firestone.deserializers import deserialize_request_body
+from firestone.deserializers import parse_content_type
+from firestone.deserializers import get_deserializer
+from firestone import deserializers
 from firestone import exceptions
 from django.test import TestCase
 from django.test import RequestFactory
@@ -37,6 +41,22 @@ class TestFormEncodedDataDeserializer(TestCase):
         data = urllib.urlencode(data_dic)
         self.assertEqual(_form_encoded_data_deserializer(data), data_dic)
 
+class TestNDJSONDeserializer(TestCase):
+    def test_lines(self):
+        data = '{"key": "value"}\n\n[1, 2]\n'
+        self.assertEqual(
+            _ndjson_deserializer(data), [{'key': 'value'}, [1, 2]],
+        )
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, _ndjson_deserializer, '{"key"\n1\n')
+
+    def test_deserialize(self):
+        self.assertEqual(
+            deserializers.deserialize('1\n2', 'application/x-ndjson'),
+            [1, 2],
+        )
+
 class TestGetDeserializer(TestCase):
     def test_empty(self):
         self.assertIsNone(_get_deserializer(''))
@@ -269,3 +289,103 @@ class TestGetDeserializeRequestBody(TestCase):
 
     
 
+
+class TestParseContentType(TestCase):
+    def test_parse(self):
+        self.assertEqual(
+            parse_content_type('Application/JSON; Charset="UTF-8"; x=1'),
+            ('application/json', {'charset': 'UTF-8', 'x': '1'}),
+        )
+        self.assertEqual(
+            parse_content_type('multipart/form-data; boundary=----abc'),
+            ('multipart/form-data', {'boundary': '----abc'}),
+        )
+
+    def test_cached(self):
+        content_type = 'application/json; charset=utf-8'
+        self.assertIs(
+            parse_content_type(content_type), parse_content_type(content_type)
+        )
+
+
+class TestGetDeserializerRegistry(TestCase):
+    # Function ``get_deserializer``
+
+    def test_exact_media_type(self):
+        # Media types that only start with a known one don't match
+        self.assertIsNone(get_deserializer('application/jsonp'))
+
+    def test_suffix(self):
+        self.assertEqual(
+            get_deserializer('application/vnd.api+json'), _json_deserializer
+        )
+        self.assertEqual(
+            get_deserializer('application/merge-patch+json'),
+            _json_deserializer,
+        )
+        self.assertIsNone(get_deserializer('application/vnd.api+xml'))
+
+    def test_mapper(self):
+        ds = lambda data: data
+        self.assertEqual(
+            get_deserializer('text/plain', {'text/plain': ds}), ds
+        )
+        # Takes precedence over ``MAPPER``
+        self.assertEqual(
+            get_deserializer('application/json', {'application/json': ds}), ds
+        )
+        # and over the suffix fallback
+        self.assertEqual(
+            get_deserializer('application/x+json', {'application/x+json': ds}),
+            ds,
+        )
+        self.assertIsNone(get_deserializer('text/plain'))
+
+
+class TestDeserializeCharset(TestCase):
+    def test_utf16(self):
+        data = u'{"key": "\u03a7"}'.encode('utf-16')
+        self.assertEqual(
+            deserialize(data, 'application/json; charset=utf-16'),
+            {'key': u'\u03a7'},
+        )
+
+    def test_latin1_form(self):
+        data = u'key=\u00e9'.encode('latin-1')
+        self.assertEqual(
+            deserialize(
+                data, 'application/x-www-form-urlencoded; charset=latin-1'
+            ),
+            {'key': u'\u00e9'.encode('utf-8')},
+        )
+
+    def test_unknown_charset(self):
+        self.assertRaises(
+            exceptions.UnsupportedMediaType,
+            deserialize, '{}', 'application/json; charset=unknown',
+        )
+
+    def test_not_a_charset(self):
+        """
+        Codecs that are not character encodings, like compression ones, are
+        not accepted
+        """
+        for charset in ('zlib', 'bz2', 'base64', 'hex', 'rot13',
+                        'unicode_escape', 'idna'):
+            self.assertRaises(
+                exceptions.UnsupportedMediaType,
+                deserialize, '{}'.encode('zlib'),
+                'application/json; charset=%s' % charset,
+            )
+
+    def test_invalid_data(self):
+        self.assertRaises(
+            exceptions.BadRequest,
+            deserialize, '\xff', 'application/json; charset=utf-16',
+        )
+
+    def test_suffix(self):
+        self.assertEqual(
+            deserialize('[1]', 'application/vnd.api+json; charset=utf-8'), [1]
+        )
+
@@ -21,6 +21,18 @@ class TestAPIException(TestCase):
         )
 
 
+class TestNotModified(TestCase):
+    def test_not_modified(self):
+        request = RequestFactory().get('/')
+        e = exceptions.NotModified({'ETag': 'W/"etag"'})
+
+        response = e.get_response(request)
+        self.assertIsInstance(response, http.HttpResponseNotModified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], 'W/"etag"')
+        self.assertEqual(response.content, '')
+
+
 class TestMethodNotAllowed(TestCase):        
     def test_not_allowed(self):
         request = RequestFactory().get('/')
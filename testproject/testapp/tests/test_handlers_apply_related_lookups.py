@@ -0,0 +1,156 @@
+"""
+This module tests the ``firestone.handlers.ModelHandler.apply_related_lookups``
+method, and the lookups that the metaclass derives from the handler template.
+"""
+from firestone.handlers import ModelHandler
+from firestone.handlers import BaseHandler
+from django.test import TestCase
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth.models import User
+from django.contrib.admin.models import LogEntry
+from testproject.testapp.models import Contact
+from model_mommy import mommy
+
+
+def init_handler(handler, request, *args, **kwargs):
+    # Mimicking the initialization of the handler instance
+    handler.request = request
+    handler.args = args
+    handler.kwargs = kwargs
+    return handler
+
+
+class UserHandler(ModelHandler):
+    model = User
+    http_methods = ['GET', 'DELETE']
+    template = {
+        'fields': ['id', 'username', 'logentry_set'],
+        'related': {
+            'logentry_set': {
+                'fields': ['action_flag', 'content_type'],
+                'related': {
+                    'content_type': {'fields': ['id'], 'flat': False},
+                },
+            },
+        },
+    }
+
+
+class ContactHandler(ModelHandler):
+    model = Contact
+    http_methods = ['GET']
+    template = {
+        'fields': ['id', 'name', 'owner'],
+        'aliases': {'owner': 'user'},
+        'related': {
+            'user': {'fields': ['username'], 'flat': False},
+        },
+    }
+
+
+class TestRelatedLookups(TestCase):
+    def test_reverse_relation(self):
+        self.assertEqual(
+            UserHandler.related_lookups,
+            (
+                ('logentry_set', 'prefetch_related', 'logentry_set'),
+                ('logentry_set', 'prefetch_related',
+                 'logentry_set__content_type'),
+            )
+        )
+
+    def test_forward_relation_with_alias(self):
+        self.assertEqual(
+            ContactHandler.related_lookups,
+            (('owner', 'select_related', 'user'),)
+        )
+
+    def test_default_template(self):
+        class Handler(ModelHandler):
+            model = User
+
+        lookups = [lookup for _, _, lookup in Handler.related_lookups]
+        self.assertIn('groups', lookups)
+        self.assertIn('user_permissions', lookups)
+
+    def test_excluded_relations(self):
+        class Handler(ModelHandler):
+            model = User
+            template = {'exclude': ['groups', 'user_permissions']}
+
+        self.assertEqual(Handler.related_lookups, ())
+
+    def test_prehook(self):
+        # Related querysets filtered by a prehook are not prefetched
+        class Handler(ModelHandler):
+            model = User
+            template = {
+                'fields': ['id', 'logentry_set'],
+                'related': {
+                    'logentry_set': {'prehook': lambda qs: qs.none()},
+                },
+            }
+
+        self.assertEqual(Handler.related_lookups, ())
+
+    def test_no_model(self):
+        class Handler(BaseHandler):
+            template = {'fields': ['user'], 'related': {'user': {}}}
+
+        self.assertEqual(Handler.related_lookups, ())
+
+
+class TestApplyRelatedLookups(TestCase):
+    def setUp(self):
+        for user in mommy.make(User, 5):
+            mommy.make(LogEntry, 3, user=user)
+            mommy.make(Contact, 2, user=user)
+
+    def test_applied(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        data = handler.apply_related_lookups(User.objects.all())
+        self.assertEqual(
+            data._prefetch_related_lookups,
+            ['logentry_set', 'logentry_set__content_type'],
+        )
+
+    def test_field_selection(self):
+        request = RequestFactory().get('/?field=id&field=username')
+        handler = init_handler(UserHandler(), request)
+        data = handler.apply_related_lookups(User.objects.all())
+        self.assertEqual(data._prefetch_related_lookups, [])
+
+    def test_not_get(self):
+        handler = init_handler(UserHandler(), RequestFactory().delete('/'))
+        data = handler.apply_related_lookups(User.objects.all())
+        self.assertEqual(data._prefetch_related_lookups, [])
+
+    def test_plural_query_count(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        with CaptureQueriesContext(connection) as queries:
+            data = handler.serialize_to_python(handler.get_data_set())
+        # users, log entries, content types
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(len(data), 5)
+        self.assertEqual(len(data[0]['logentry_set']), 3)
+
+    def test_singular_query_count(self):
+        handler = init_handler(ContactHandler(), RequestFactory().get('/'),
+                               id=1)
+        with CaptureQueriesContext(connection) as queries:
+            data = handler.serialize_to_python(handler.get_data_item())
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            data['owner'],
+            {'username': Contact.objects.get(id=1).user.username}
+        )
+
+    def test_same_output(self):
+        handler = init_handler(ContactHandler(), RequestFactory().get('/'))
+        data = handler.serialize_to_python(handler.get_data_set())
+        handler.related_lookups = ()
+        self.assertEqual(
+            data, handler.serialize_to_python(handler.get_data_set())
+        )
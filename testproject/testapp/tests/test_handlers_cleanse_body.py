@@ -5,6 +5,7 @@ method
 from django.test import TestCase
 from django.test import RequestFactory
 from firestone.handlers import BaseHandler
+from firestone import exceptions
 import json
 
 def init_handler(handler, request, *args, **kwargs):
@@ -81,3 +82,55 @@ class TestPUT(TestCase):
             handler.request.data.keys(),
             handler.put_body_fields
         )
+
+    def test_not_cleansed(self):
+        """
+        Bodies without disallowed fields are left as they are
+        """
+        request = RequestFactory().put('/')
+
+        handler = init_handler(BaseHandler(), request)
+        handler.put_body_fields = frozenset(['id', 'name'])
+        data = handler.request.data = {'id': 1}
+
+        handler.cleanse_body()
+        self.assertIs(handler.request.data, data)
+
+
+class TestStrict(TestCase):
+    def setUp(self):
+        request = RequestFactory().post('/')
+        handler = init_handler(BaseHandler(), request)
+        handler.post_body_fields = ('id', 'name')
+        handler.strict_body_fields = True
+        self.handler = handler
+
+    def test_dic(self):
+        self.handler.request.data = {'id': 1, 'age': 2, 'email': 3}
+        try:
+            self.handler.cleanse_body()
+        except exceptions.BadRequest, e:
+            self.assertEqual(
+                e.errors,
+                {'age': ['Unknown field.'], 'email': ['Unknown field.']},
+            )
+        else:
+            self.fail('BadRequest not raised')
+
+    def test_list(self):
+        self.handler.request.data = [
+            {'id': 1}, {'name': 'Name'}, {'id': 3, 'age': 3},
+        ]
+        try:
+            self.handler.cleanse_body()
+        except exceptions.BadRequest, e:
+            self.assertEqual(e.errors, {'age': ['Unknown field.']})
+            self.assertEqual(e.index, 2)
+        else:
+            self.fail('BadRequest not raised')
+
+    def test_allowed(self):
+        data = [{'id': 1}, {'id': 2, 'name': 'Name'}]
+        self.handler.request.data = data
+        self.handler.cleanse_body()
+        self.assertEqual(self.handler.request.data, data)
@@ -0,0 +1,221 @@
+"""
+This module tests the ``firestone.handlers.ModelHandler`` methods
+``apply_column_pruning`` and ``get_values_fields``, and the serialization of
+querysets from ``QuerySet.values`` rows.
+"""
+from firestone.handlers import ModelHandler
+from firestone.serializers import StreamedData
+from django.test import TestCase
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth.models import User
+from testproject.testapp.models import Contact
+from model_mommy import mommy
+
+
+def init_handler(handler, request, *args, **kwargs):
+    # Mimicking the initialization of the handler instance
+    handler.request = request
+    handler.args = args
+    handler.kwargs = kwargs
+    return handler
+
+
+class UserHandler(ModelHandler):
+    model = User
+    http_methods = ['GET', 'DELETE']
+    prune_columns = True
+    serialize_values = True
+    template = {
+        'fields': ['id', 'login', 'first_name', 'last_login'],
+        'aliases': {'login': 'username'},
+    }
+
+
+class ContactHandler(ModelHandler):
+    model = Contact
+    http_methods = ['GET']
+    prune_columns = True
+    serialize_values = True
+    template = {
+        'fields': ['id', 'name', 'user'],
+        'related': {
+            'user': {'fields': ['username'], 'flat': False},
+        },
+    }
+
+
+class ContactNameHandler(ModelHandler):
+    model = Contact
+    http_methods = ['GET']
+    prune_columns = True
+    template = {
+        'fields': ['id', 'user'],
+        'related': {
+            'user': {'fields': ['id', 'get_full_name'], 'flat': False},
+        },
+    }
+
+
+class TestTemplateColumns(TestCase):
+    def test_local_fields(self):
+        self.assertEqual(
+            UserHandler.template_columns,
+            {'id': ('id',), 'login': ('username',),
+             'first_name': ('first_name',), 'last_login': ('last_login',)}
+        )
+
+    def test_related_fields(self):
+        self.assertEqual(
+            ContactHandler.template_columns,
+            {'id': ('id',), 'name': ('name',),
+             'user': ('user', 'user__username')}
+        )
+        self.assertNotIn('user', ContactHandler.values_fields)
+
+    def test_not_model_fields(self):
+        class Handler(ModelHandler):
+            model = User
+            template = {'fields': ['id', 'get_full_name']}
+
+        self.assertEqual(Handler.template_columns, {'id': ('id',)})
+        self.assertEqual(Handler.values_fields.keys(), ['id'])
+
+    def test_related_not_model_fields(self):
+        self.assertEqual(ContactNameHandler.template_columns, {'id': ('id',)})
+
+    def test_unsupported_options(self):
+        class Handler(ModelHandler):
+            model = User
+            template = {'fields': ['id'], 'camelcase': True}
+
+        self.assertIsNone(Handler.values_fields)
+
+
+class TestApplyColumnPruning(TestCase):
+    def setUp(self):
+        mommy.make(Contact, 5)
+
+    def test_pruned(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        data = handler.get_data_set()
+        self.assertEqual(
+            data.query.deferred_loading,
+            (set(['id', 'username', 'first_name', 'last_login']), False)
+        )
+
+    def test_field_selection(self):
+        request = RequestFactory().get('/?field=id&field=first_name')
+        handler = init_handler(UserHandler(), request)
+        data = handler.get_data_set()
+        self.assertEqual(
+            data.query.deferred_loading, (set(['id', 'first_name']), False)
+        )
+
+    def test_disabled(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        handler.prune_columns = False
+        data = handler.get_data_set()
+        self.assertEqual(data.query.deferred_loading, (set(), True))
+
+    def test_not_get(self):
+        handler = init_handler(UserHandler(), RequestFactory().delete('/'))
+        data = handler.get_data_set()
+        self.assertEqual(data.query.deferred_loading, (set(), True))
+
+    def test_unknown_columns(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        handler.template = {'fields': ['id', 'get_full_name']}
+        data = handler.get_data_set()
+        self.assertEqual(data.query.deferred_loading, (set(), True))
+
+    def test_related(self):
+        handler = init_handler(ContactHandler(), RequestFactory().get('/'))
+        handler.serialize_values = False
+        with CaptureQueriesContext(connection) as queries:
+            data = handler.serialize_to_python(handler.get_data_set())
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('email', queries[0]['sql'])
+        self.assertNotIn('password', queries[0]['sql'])
+
+        handler.prune_columns = False
+        self.assertEqual(
+            data, handler.serialize_to_python(handler.get_data_set())
+        )
+
+    def test_related_not_model_fields(self):
+        handler = init_handler(ContactNameHandler(), RequestFactory().get('/'))
+        with self.assertNumQueries(1):
+            data = handler.serialize_to_python(handler.get_data_set())
+        self.assertEqual(len(data), 5)
+
+    def test_data_item(self):
+        handler = init_handler(ContactHandler(), RequestFactory().get('/'),
+                               id=1)
+        handler.serialize_values = False
+        with CaptureQueriesContext(connection) as queries:
+            data = handler.serialize_to_python(handler.get_data_item())
+        self.assertEqual(len(queries), 1)
+        self.assertItemsEqual(data.keys(), ['id', 'name', 'user'])
+
+
+class TestSerializeValues(TestCase):
+    def setUp(self):
+        mommy.make(Contact, 5)
+
+    def test_same_output(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        data = handler.serialize_to_python(handler.get_data_set())
+        self.assertEqual(len(data), 5)
+        handler.serialize_values = False
+        self.assertEqual(
+            data, handler.serialize_to_python(handler.get_data_set())
+        )
+
+    def test_no_model_instances(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        self.assertIsNotNone(handler.get_values_fields(User.objects.all()))
+        self.assertIsInstance(
+            handler.serialize_to_python(User.objects.all())[0]['login'],
+            basestring,
+        )
+
+    def test_field_selection(self):
+        request = RequestFactory().get('/?field=login')
+        handler = init_handler(UserHandler(), request)
+        data = handler.serialize_to_python(handler.get_data_set())
+        self.assertItemsEqual(
+            data,
+            [{'login': user.username} for user in User.objects.all()]
+        )
+
+    def test_evaluated_queryset(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        data = User.objects.all()
+        list(data)
+        self.assertIsNone(handler.get_values_fields(data))
+
+    def test_related_fields(self):
+        # Related fields need model instances
+        handler = init_handler(ContactHandler(), RequestFactory().get('/'))
+        self.assertIsNone(handler.get_values_fields(Contact.objects.all()))
+
+        request = RequestFactory().get('/?field=id&field=name')
+        handler = init_handler(ContactHandler(), request)
+        self.assertIsNotNone(handler.get_values_fields(Contact.objects.all()))
+
+    def test_model_instance(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        self.assertIsNone(handler.get_values_fields(User.objects.get(id=1)))
+
+    def test_streamed(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        handler.stream_response = True
+        data = handler.serialize_to_python(handler.get_data_set())
+        self.assertIsInstance(data, StreamedData)
+
+        handler.stream_response = False
+        self.assertEqual(
+            list(data), handler.serialize_to_python(handler.get_data_set())
+        )
@@ -79,3 +79,50 @@ class TestDeserializeBody(TestCase):
         )
 
 
+class PlainTextHandler(BaseHandler):
+    body_deserializers = {
+        'text/plain': 'deserialize_text',
+        'application/json': lambda data: {'overridden': data},
+    }
+
+    def deserialize_text(self, data):
+        if data == 'invalid':
+            raise ValueError
+        return {'text': data}
+
+
+class TestBodyDeserializers(TestCase):
+    # Handler parameter ``body_deserializers``
+
+    def test_method_name(self):
+        request = RequestFactory().post(
+            '/', data='some text', content_type='text/plain; charset=utf-8'
+        )
+        handler = init_handler(PlainTextHandler(), request)
+        handler.deserialize_body()
+        self.assertEqual(handler.request.data, {'text': 'some text'})
+
+    def test_invalid_body(self):
+        request = RequestFactory().post(
+            '/', data='invalid', content_type='text/plain'
+        )
+        handler = init_handler(PlainTextHandler(), request)
+        self.assertRaises(exceptions.BadRequest, handler.deserialize_body)
+
+    def test_precedence(self):
+        request = RequestFactory().post(
+            '/', data='{}', content_type='application/json'
+        )
+        handler = init_handler(PlainTextHandler(), request)
+        handler.deserialize_body()
+        self.assertEqual(handler.request.data, {'overridden': '{}'})
+
+    def test_other_handlers(self):
+        request = RequestFactory().post(
+            '/', data='some text', content_type='text/plain'
+        )
+        handler = init_handler(BaseHandler(), request)
+        self.assertRaises(
+            exceptions.UnsupportedMediaType, handler.deserialize_body
+        )
+
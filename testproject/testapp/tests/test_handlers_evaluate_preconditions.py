@@ -0,0 +1,156 @@
+"""
+This module tests the ``firestone.handlers.BaseHandler.evaluate_preconditions``
+and ``firestone.handlers.ModelHandler.get_fingerprint`` methods, and the
+conditional GET requests they enable.
+"""
+from firestone.handlers import BaseHandler
+from firestone.handlers import ModelHandler
+from firestone import exceptions
+from django.test import TestCase
+from django.test import RequestFactory
+from django.contrib.admin.models import LogEntry
+from django.utils.http import http_date
+from django.conf import settings
+from model_mommy import mommy
+import datetime
+import calendar
+
+
+def init_handler(handler, request, *args, **kwargs):
+    # Mimicking the initialization of the handler instance
+    handler.request = request
+    handler.args = args
+    handler.kwargs = kwargs
+    return handler
+
+
+class LogEntryHandler(ModelHandler):
+    model = LogEntry
+    http_methods = ['GET', 'DELETE']
+    last_modified_field = 'action_time'
+    template = {'fields': ['id', 'object_repr']}
+
+
+class TestGetFingerprint(TestCase):
+    def setUp(self):
+        mommy.make(LogEntry, 5)
+
+    def test_no_field(self):
+        handler = init_handler(ModelHandler(), RequestFactory().get('/'))
+        handler.model = LogEntry
+        self.assertIsNone(handler.get_fingerprint(LogEntry.objects.all()))
+
+    def test_queryset(self):
+        handler = init_handler(LogEntryHandler(), RequestFactory().get('/'))
+        latest = LogEntry.objects.order_by('-action_time')[0].action_time
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                handler.get_fingerprint(LogEntry.objects.all()),
+                ((latest, 5), latest),
+            )
+
+    def test_model_instance(self):
+        handler = init_handler(LogEntryHandler(), RequestFactory().get('/'))
+        entry = LogEntry.objects.get(id=1)
+        self.assertEqual(
+            handler.get_fingerprint(entry),
+            ((entry.action_time, 1), entry.action_time),
+        )
+
+    def test_other_data(self):
+        handler = init_handler(LogEntryHandler(), RequestFactory().get('/'))
+        self.assertIsNone(handler.get_fingerprint([1, 2]))
+
+
+class TestEvaluatePreconditions(TestCase):
+    def setUp(self):
+        settings.DEBUG = False
+        mommy.make(LogEntry, 5)
+
+    def get(self, **headers):
+        request = RequestFactory().get('/?page=1', **headers)
+        return init_handler(LogEntryHandler(), request).dispatch()
+
+    def test_validators(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        latest = LogEntry.objects.order_by('-action_time')[0].action_time
+        self.assertEqual(
+            response['Last-Modified'],
+            http_date(calendar.timegm(latest.utctimetuple())),
+        )
+
+    def test_if_none_match(self):
+        etag = self.get()['ETag']
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, '')
+
+        response = self.get(HTTP_IF_NONE_MATCH='"other", %s' % etag[2:])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='*').status_code, 304)
+        self.assertEqual(
+            self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200
+        )
+
+    def test_changed(self):
+        etag = self.get()['ETag']
+        LogEntry.objects.get(id=1).delete()
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.get()['ETag']
+        LogEntry.objects.get(id=2).save()
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_representation(self):
+        # Other pages, or serialization formats, have other ETags
+        etag = self.get()['ETag']
+        request = RequestFactory().get('/?page=2')
+        response = init_handler(LogEntryHandler(), request).dispatch()
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertNotEqual(
+            self.get(HTTP_ACCEPT='application/vnd.ms-excel')['ETag'], etag
+        )
+
+    def test_if_modified_since(self):
+        last_modified = self.get()['Last-Modified']
+        response = self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        earlier = http_date(calendar.timegm(
+            (datetime.datetime.utcnow() - datetime.timedelta(days=1))
+            .utctimetuple()
+        ))
+        self.assertEqual(
+            self.get(HTTP_IF_MODIFIED_SINCE=earlier).status_code, 200
+        )
+        # If-None-Match takes precedence
+        self.assertEqual(
+            self.get(HTTP_IF_MODIFIED_SINCE=last_modified,
+                     HTTP_IF_NONE_MATCH='"other"').status_code,
+            200
+        )
+
+    def test_not_get(self):
+        request = RequestFactory().delete('/', HTTP_IF_NONE_MATCH='*')
+        handler = init_handler(LogEntryHandler(), request)
+        handler.evaluate_preconditions(LogEntry.objects.all())
+        self.assertEqual(handler.validators, {})
+
+    def test_no_fingerprint(self):
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH='*')
+        handler = init_handler(BaseHandler(), request)
+        handler.evaluate_preconditions('data')
+        self.assertEqual(handler.validators, {})
+
+    def test_custom_fingerprint(self):
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH='*')
+        handler = init_handler(BaseHandler(), request)
+        handler.get_fingerprint = lambda data: ('version', None)
+        self.assertRaises(
+            exceptions.NotModified, handler.evaluate_preconditions, 'data'
+        )
+        self.assertNotIn('Last-Modified', handler.validators)
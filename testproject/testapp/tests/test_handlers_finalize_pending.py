@@ -6,6 +6,9 @@ from firestone.handlers import ModelHandler
 from django.test import TestCase
 from django.test import RequestFactory
 from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from model_mommy import mommy
 
 def init_handler(handler, request, *args, **kwargs):
@@ -98,3 +101,76 @@ class TestModelHandlerFinalizePlural(TestCase):
             data,
         )
 
+
+class TestModelHandlerFinalizePluralCascade(TestCase):
+    def setUp(self):
+        request = RequestFactory().delete('/')
+        handler = init_handler(ModelHandler(), request)
+        handler.model = User
+        handler.http_methods = ('PLURAL_DELETE',)
+        self.handler = handler
+
+        for user in mommy.make(User, 5):
+            mommy.make(LogEntry, 2, user=user)
+
+    def test_result(self):
+        data = User.objects.all()
+        self.handler.finalize_pending(data)
+
+        self.assertEqual(User.objects.count(), 0)
+        self.assertEqual(LogEntry.objects.count(), 0)
+
+    def test_rows_not_fetched_twice(self):
+        """
+        The users have been fetched during serialization. Deleting them
+        should not fetch them again.
+        """
+        data = User.objects.all()
+        self.handler.serialize_to_python(data)
+
+        with CaptureQueriesContext(connection) as context:
+            self.handler.finalize_pending(data)
+
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "auth_user"' in query['sql']
+        ]
+        self.assertEqual(selects, [])
+        self.assertEqual(User.objects.count(), 0)
+
+
+class TestModelHandlerDeleteCountOnly(TestCase):
+    def setUp(self):
+        request = RequestFactory().delete('/')
+        handler = init_handler(ModelHandler(), request)
+        handler.model = LogEntry
+        handler.http_methods = ('PLURAL_DELETE',)
+        handler.delete_count_only = True
+        handler.template = {'fields': ['id']}
+        self.handler = handler
+
+        mommy.make(LogEntry, 10)
+
+    def test_result(self):
+        data = self.handler.delete()
+        dic = self.handler.postprocess(data, {})
+
+        self.assertEqual(dic['count'], 10)
+        self.assertIsNone(dic['data'])
+        self.assertEqual(LogEntry.objects.count(), 0)
+
+    def test_query_count(self):
+        # One COUNT and one DELETE query
+        data = self.handler.delete()
+        self.assertNumQueries(2, self.handler.postprocess, data, {})
+
+    def test_singular(self):
+        # Singular DELETE requests are not affected
+        logentry = LogEntry.objects.all()[0]
+        self.handler.kwargs = {'id': logentry.id}
+        data = self.handler.delete()
+        dic = self.handler.postprocess(data, {})
+
+        self.assertEqual(dic['data'], {'id': logentry.id})
+        self.assertEqual(dic['count'], 1)
@@ -0,0 +1,238 @@
+"""
+This module tests the ``firestone.handlers.BaseHandler.is_streaming`` method,
+and the streamed responses it enables.
+"""
+from firestone.handlers import ModelHandler
+from firestone.serializers import StreamedData
+from django.test import TestCase
+from django.test import RequestFactory
+from django.http import StreamingHttpResponse
+from django.contrib.auth.models import User
+from django.conf import settings
+from firestone.serializers import XLSX
+from testproject.testapp.models import Contact
+from model_mommy import mommy
+import StringIO
+import openpyxl
+import json
+
+
+def init_handler(handler, request, *args, **kwargs):
+    # Mimicking the initialization of the handler instance
+    handler.request = request
+    handler.args = args
+    handler.kwargs = kwargs
+    return handler
+
+
+class UserHandler(ModelHandler):
+    model = User
+    http_methods = ['GET']
+    stream_response = True
+    template = {
+        'fields': ['id', 'username', 'first_name'],
+    }
+
+
+class ContactHandler(ModelHandler):
+    model = Contact
+    http_methods = ['GET']
+    stream_response = True
+    template = {
+        'fields': ['id', 'user', 'email'],
+        'related': {
+            'user': {'fields': ['id', 'username']},
+        },
+    }
+
+
+class UserContactsHandler(ModelHandler):
+    model = User
+    http_methods = ['GET']
+    stream_response = True
+    template = {
+        'fields': ['id', 'username', 'contact_set'],
+        'related': {
+            'contact_set': {'fields': ['email']},
+        },
+    }
+
+
+class TestIsStreaming(TestCase):
+    def setUp(self):
+        mommy.make(User, 10)
+
+    def test_queryset(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        self.assertTrue(handler.is_streaming(User.objects.all()))
+
+    def test_disabled(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        handler.stream_response = False
+        self.assertFalse(handler.is_streaming(User.objects.all()))
+
+    def test_model_instance(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        self.assertFalse(handler.is_streaming(User.objects.get(id=1)))
+
+    def test_not_get(self):
+        handler = init_handler(UserHandler(), RequestFactory().delete('/'))
+        self.assertFalse(handler.is_streaming(User.objects.all()))
+
+    def test_format_not_streamable(self):
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT='application/vnd.ms-excel'
+        )
+        handler = init_handler(UserHandler(), request)
+        self.assertFalse(handler.is_streaming(User.objects.all()))
+
+
+class TestStreamedResponse(TestCase):
+    def setUp(self):
+        settings.DEBUG = False
+        mommy.make(User, 10)
+
+    def test_serialize_to_python(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        data = User.objects.all()
+
+        streamed = handler.serialize_to_python(data)
+        self.assertIsInstance(streamed, StreamedData)
+        # Nothing has been fetched yet
+        self.assertIsNone(data._result_cache)
+
+        handler.stream_response = False
+        self.assertEqual(list(streamed), handler.serialize_to_python(data))
+
+    def test_prefetch_related(self):
+        """
+        The ``prefetch_related`` lookups of reverse relations are fetched per
+        chunk of items, while the queryset is still iterated without caching
+        """
+        for user in User.objects.all():
+            mommy.make(Contact, 2, user=user)
+        handler = init_handler(
+            UserContactsHandler(), RequestFactory().get('/')
+        )
+        data = handler.get_data_set()
+        self.assertTrue(data._prefetch_related_lookups)
+
+        streamed = handler.serialize_to_python(data)
+        streamed.chunk_size = 4
+        # The items, and the contacts of each of the 3 chunks
+        with self.assertNumQueries(4):
+            items = list(streamed)
+        self.assertIsNone(data._result_cache)
+
+        handler.stream_response = False
+        self.assertEqual(items, handler.serialize_to_python(data))
+        self.assertEqual(len(items), 10)
+        self.assertTrue(all(len(item['contact_set']) == 2 for item in items))
+
+    def test_dispatch(self):
+        request = RequestFactory().get('/?field=id&field=username')
+        response = init_handler(UserHandler(), request).dispatch()
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(
+            response['Content-Type'], 'application/json; charset=utf-8'
+        )
+        streamed = json.loads(''.join(response.streaming_content))
+
+        handler = init_handler(UserHandler(), request)
+        handler.stream_response = False
+        response = handler.dispatch()
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(streamed, json.loads(response.content))
+        self.assertEqual(streamed['count'], 10)
+
+    def test_pagination_keys(self):
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        data = handler.package(
+            handler.serialize_to_python(User.objects.all()),
+            {'key': 'value'},
+        )
+        body, headers = handler.stream_to_json(data)
+        dic = json.loads(''.join(body))
+        self.assertEqual(dic['count'], 10)
+        self.assertEqual(dic['pagination'], {'key': 'value'})
+        self.assertEqual(len(dic['data']), 10)
+
+    def test_empty(self):
+        User.objects.all().delete()
+        handler = init_handler(UserHandler(), RequestFactory().get('/'))
+        response = handler.dispatch()
+        self.assertEqual(
+            json.loads(''.join(response.streaming_content)),
+            {'data': [], 'count': 0},
+        )
+
+    def test_csv(self):
+        request = RequestFactory().get(
+            '/?field=id&field=username', HTTP_ACCEPT='text/csv'
+        )
+        response = init_handler(UserHandler(), request).dispatch()
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = ''.join(response.streaming_content).splitlines()
+        self.assertEqual(lines[0], 'id,username')
+        self.assertEqual(len(lines), 11)
+
+        handler = init_handler(UserHandler(), request)
+        handler.stream_response = False
+        response = handler.dispatch()
+        self.assertEqual(response.content.splitlines(), lines)
+
+    def test_xlsx(self):
+        request = RequestFactory().get('/?field=id', HTTP_ACCEPT=XLSX)
+        response = init_handler(UserHandler(), request).dispatch()
+        self.assertIsInstance(response, StreamingHttpResponse)
+        workbook = openpyxl.load_workbook(
+            StringIO.StringIO(''.join(response.streaming_content))
+        )
+        rows = list(workbook['Sheet'].iter_rows())
+        self.assertEqual(rows[0][0].value, 'id')
+        self.assertEqual(len(rows), 11)
+
+    def test_tsv_related(self):
+        mommy.make(Contact, 3)
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT='text/tab-separated-values'
+        )
+        response = init_handler(ContactHandler(), request).dispatch()
+        self.assertIsInstance(response, StreamingHttpResponse)
+        lines = ''.join(response.streaming_content).splitlines()
+        self.assertEqual(lines[0], 'id\tuser.id\tuser.username\temail')
+        contact = Contact.objects.get(id=1)
+        self.assertEqual(
+            lines[1].split('\t'),
+            ['1', str(contact.user.id), contact.user.username, contact.email],
+        )
+        self.assertEqual(len(lines), 4)
+
+    def test_ndjson(self):
+        request = RequestFactory().get(
+            '/?field=id&field=username', HTTP_ACCEPT='application/x-ndjson'
+        )
+        response = init_handler(UserHandler(), request).dispatch()
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson; charset=utf-8'
+        )
+        # The count of streamed data is not known in advance
+        self.assertFalse(response.has_header('X-Count'))
+        lines = ''.join(response.streaming_content).splitlines()
+        self.assertItemsEqual(
+            [json.loads(line) for line in lines],
+            list(User.objects.values('id', 'username')),
+        )
+
+    def test_ndjson_pagination(self):
+        request = RequestFactory().get(
+            '/?page=2&ipp=4', HTTP_ACCEPT='application/x-ndjson'
+        )
+        handler = init_handler(UserHandler(), request)
+        handler.stream_response = False
+        response = handler.dispatch()
+        self.assertEqual(len(response.content.splitlines()), 4)
+        self.assertEqual(response['X-Count'], '4')
+        self.assertEqual(response['X-Pagination-Total-Pages'], '3')
@@ -44,9 +44,9 @@ class TestHandlerMetaClass(TestCase):
         # handler class
         self.assertTrue(SerializerMixin in BaseHandlerExample.__bases__)
 
-        # Have these 2 parameters been transformed to sets?
-        self.assertIsInstance(base_handler.post_body_fields, set)
-        self.assertIsInstance(base_handler.put_body_fields, set)
+        # Have these 2 parameters been transformed to frozensets?
+        self.assertIsInstance(base_handler.post_body_fields, frozenset)
+        self.assertIsInstance(base_handler.put_body_fields, frozenset)
 
     def test_model_handler(self):
         self.assertItemsEqual(
@@ -67,8 +67,8 @@ class TestHandlerMetaClass(TestCase):
         # handler class
         self.assertTrue(SerializerMixin in BaseHandlerExample.__bases__)
 
-        # Have these 2 parameters been transformed to sets?
-        self.assertIsInstance(model_handler.post_body_fields, set)
-        self.assertIsInstance(model_handler.put_body_fields, set)
+        # Have these 2 parameters been transformed to frozensets?
+        self.assertIsInstance(model_handler.post_body_fields, frozenset)
+        self.assertIsInstance(model_handler.put_body_fields, frozenset)
                 
 
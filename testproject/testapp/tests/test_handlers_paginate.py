@@ -38,7 +38,16 @@ class BaseHandlerTestPaginate(TestCase):
             handler.paginate(data),
             (data, {},)
         )
-        
-    pass
+
+    def test_cursor_paging(self):
+        handler = self.handler
+        handler.request = RequestFactory().get('/?cursor=&page=1')
+        handler.paginate_cursor = lambda data, cursor: ('cursor', cursor)
+        handler.paginate_data = lambda data, page: ('page', page)
+
+        self.assertEqual(handler.paginate("data"), ('cursor', ''))
+
+        handler.request = RequestFactory().get('/?page=1')
+        self.assertEqual(handler.paginate("data"), ('page', '1'))
 
 
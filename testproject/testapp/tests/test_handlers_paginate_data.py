@@ -9,6 +9,9 @@ from django.test import TestCase
 from django.test import RequestFactory
 from django.contrib.auth.models import User
 from model_mommy import mommy
+from django.db import connection
+from django.core.cache import caches
+from firestone import counts
 
 
 def init_handler(handler, request, *args, **kwargs):
@@ -137,3 +140,173 @@ class ModelHandlerTestPaginateData(TestCase):
         self.assertEqual(metadata['total_pages'], 10)
         self.assertEqual(metadata['total_items'], 100)
         
+
+
+class BaseHandlerTestPaginateCursor(TestCase):
+    def test_paginate_cursor(self):
+        request = RequestFactory().get('/')
+        handler = init_handler(BaseHandler(), request)
+
+        self.assertEqual(
+            handler.paginate_cursor("data", ''),
+            ("data", {}),
+        )
+
+
+class ModelHandlerTestPaginateCursor(TestCase):
+    def setUp(self):
+        request = RequestFactory().get('/')
+        handler = init_handler(ModelHandler(), request)
+        handler.model = User
+        handler.items_per_page = 10
+        self.handler = handler
+
+        mommy.make(User, 25)
+        # Duplicate values of the ordering column
+        User.objects.filter(id__lte=12).update(first_name='a')
+        User.objects.filter(id__gt=12).update(first_name='b')
+
+    def walk(self, data, cursor='', key='next'):
+        # Returns the pages, following the ``key`` cursors
+        pages = []
+        while cursor is not None:
+            items, metadata = self.handler.paginate_cursor(data, cursor)
+            pages.append(items)
+            cursor = metadata[key]
+        return pages
+
+    def test_first_page(self):
+        data_page, metadata = self.handler.paginate_cursor(
+            User.objects.order_by('id'), ''
+        )
+        self.assertEqual(data_page, list(User.objects.filter(id__lte=10)))
+        self.assertIsNotNone(metadata['next'])
+        self.assertIsNone(metadata['previous'])
+
+    def test_walk_forwards(self):
+        for ordering in (['id'], ['-id'], ['first_name'],
+                         ['-first_name'], ['first_name', '-username']):
+            data = User.objects.order_by(*ordering)
+            pages = self.walk(data)
+            self.assertEqual([len(page) for page in pages], [10, 10, 5])
+            self.assertEqual(sum(pages, []), list(data.order_by(
+                *(ordering + ['pk'])
+            )))
+
+    def test_walk_backwards(self):
+        data = User.objects.order_by('-first_name')
+        pages = self.walk(data)
+        _, metadata = self.handler.paginate_cursor(data, '')
+        last_page, metadata = self.handler.paginate_cursor(
+            data, metadata['next']
+        )
+        last_page, metadata = self.handler.paginate_cursor(
+            data, metadata['next']
+        )
+        self.assertIsNone(metadata['next'])
+
+        backwards = self.walk(data, metadata['previous'], 'previous')
+        self.assertEqual(backwards, [pages[1], pages[0]])
+
+    def test_ipp(self):
+        self.handler.request = RequestFactory().get('/?ipp=25')
+        data_page, metadata = self.handler.paginate_cursor(
+            User.objects.all(), ''
+        )
+        self.assertEqual(len(data_page), 25)
+        self.assertEqual(metadata, {'next': None, 'previous': None})
+
+    def test_deep_page_query(self):
+        data = User.objects.order_by('first_name')
+        cursor = self.handler.paginate_cursor(data, '')[1]['next']
+        with self.assertNumQueries(1):
+            data_page, metadata = self.handler.paginate_cursor(data, cursor)
+        self.assertNotIn('OFFSET', connection.queries[-1]['sql'])
+
+    def test_invalid_cursor(self):
+        data = User.objects.all()
+        for cursor in ('invalid', '!!', 'WyJ4IiwxXQ', 'WyJuIl0'):
+            self.assertRaises(
+                exceptions.BadRequest,
+                self.handler.paginate_cursor, data, cursor,
+            )
+
+    def test_unsupported_ordering(self):
+        # Nullable column
+        data = User.objects.order_by('last_login')
+        self.assertEqual(self.handler.paginate_cursor(data, ''), (data, {}))
+        # Random
+        data = User.objects.order_by('?')
+        self.assertEqual(self.handler.paginate_cursor(data, ''), (data, {}))
+
+    def test_single_model_instance(self):
+        data = User.objects.get(id=1)
+        self.assertEqual(self.handler.paginate_cursor(data, ''), (data, {}))
+
+
+class ModelHandlerTestCountData(TestCase):
+    def setUp(self):
+        request = RequestFactory().get('/?page=1&name=a')
+        handler = init_handler(ModelHandler(), request)
+        handler.model = User
+        handler.items_per_page = 10
+        self.handler = handler
+        caches['default'].clear()
+
+        mommy.make(User, 30)
+
+    def test_exact(self):
+        data_page, metadata = self.handler.paginate_data(User.objects.all(), 1)
+        self.assertEqual(metadata, {
+            'total_pages': 3, 'total_items': 30, 'count_strategy': 'exact'
+        })
+
+    def test_cached(self):
+        handler = self.handler
+        handler.count_strategy = 'cached'
+        self.assertEqual(handler.count_data(User.objects.all()), (30, 'exact'))
+
+        mommy.make(User, 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                handler.count_data(User.objects.all()), (30, 'cached')
+            )
+
+        # Pagination parameters share the count
+        handler.request = RequestFactory().get('/?name=a&page=3&ipp=5')
+        self.assertEqual(handler.count_data(User.objects.all()), (30, 'cached'))
+
+        # Filters don't
+        handler.request = RequestFactory().get('/?name=b')
+        self.assertEqual(handler.count_data(User.objects.all()), (35, 'exact'))
+
+    def test_cache_key(self):
+        handler = self.handler
+        key = handler.get_count_cache_key()
+        handler.request = RequestFactory().get('/?name=a&page=2&field=id')
+        self.assertEqual(handler.get_count_cache_key(), key)
+        handler.kwargs = {'id': 1}
+        self.assertNotEqual(handler.get_count_cache_key(), key)
+
+    def test_estimated(self):
+        handler = self.handler
+        handler.count_strategy = 'estimated'
+        # No planner estimates on sqlite
+        self.assertIsNone(counts.estimate_count(User.objects.all()))
+        self.assertEqual(handler.count_data(User.objects.all()), (30, 'exact'))
+
+        estimate_count = counts.estimate_count
+        counts.estimate_count = lambda queryset: 5000
+        try:
+            data_page, metadata = handler.paginate_data(User.objects.all(), 1)
+            self.assertEqual(metadata['total_items'], 5000)
+            self.assertEqual(metadata['count_strategy'], 'estimated')
+            self.assertEqual(len(data_page), 10)
+
+            # Below the threshold, counts are exact
+            handler.count_estimate_threshold = 10000
+            self.assertEqual(
+                handler.count_data(User.objects.all()), (30, 'exact')
+            )
+        finally:
+            counts.estimate_count = estimate_count
@@ -8,7 +8,9 @@ from firestone import exceptions
 from django.test import TestCase
 from django.test import RequestFactory
 from django.contrib.auth.models import User
+from django.db.models.signals import post_save
 from model_mommy import mommy
+import json
 
 def init_handler(handler, request, *args, **kwargs):
     # Mimicking the initialization of the handler instance
@@ -86,3 +88,235 @@ class TestModelHandlerBulkPost(TestCase):
         self.assertNumQueries(5, self.handler.post)
 
 
+class TestModelHandlerBulkCreatePost(TestCase):
+    def setUp(self):
+        request = RequestFactory().post('/')
+        handler = init_handler(ModelHandler(), request)
+        handler.model = User
+        handler.bulk_post = True
+        handler.bulk_post_batch_size = 2
+        # Serializable without the primary keys of the items
+        handler.template = {'fields': ['username', 'first_name']}
+        self.handler = handler
+
+        self.users = [
+            User(username='user1', password='pass1'),
+            User(username='user2', password='pass2'),
+            User(username='user3', password='pass3'),
+            User(username='user4', password='pass4'),
+            User(username='user5', password='pass5'),
+        ]
+        self.handler.request.data = self.users
+
+    def test_ret_value(self):
+        self.assertItemsEqual(self.handler.post(), self.users)
+
+    def test_created(self):
+        self.handler.post()
+        self.assertItemsEqual(
+            User.objects.values_list('username', flat=True),
+            [user.username for user in self.users],
+        )
+
+    def test_num_queries(self):
+        # 5 items, in batches of 2
+        self.assertNumQueries(3, self.handler.post)
+
+    def test_querystring_override(self):
+        self.handler.request = RequestFactory().post('/?bulk=0')
+        self.handler.request.data = self.users
+        self.assertNumQueries(5, self.handler.post)
+
+    def test_querystring_cannot_opt_in(self):
+        handler = init_handler(ModelHandler(), RequestFactory().post('/?bulk=1'))
+        handler.model = User
+        handler.template = self.handler.template
+        handler.request.data = self.users
+        self.assertFalse(handler.is_bulk_post())
+        self.assertNumQueries(5, handler.post)
+
+    def test_template_needs_pks(self):
+        """
+        Items whose representation needs their primary key(or anything that
+        depends on it) are saved one by one
+        """
+        for fields in (['id', 'username'], ['username', 'groups']):
+            self.handler.template = {'fields': fields}
+            self.assertFalse(self.handler.can_serialize_bulk_created())
+        self.handler.template = {}
+        self.assertFalse(self.handler.can_serialize_bulk_created())
+        self.assertNumQueries(5, self.handler.post)
+
+    def test_default_template(self):
+        """
+        The default template includes the primary key, so the items are saved
+        one by one
+        """
+        self.handler.template = ModelHandler.template
+        self.assertNumQueries(5, self.handler.post)
+        self.assertTrue(all(user.pk for user in self.users))
+
+    def test_field_selection(self):
+        self.handler.template = {'fields': ['id', 'username']}
+        self.handler.request = RequestFactory().post('/?field=username')
+        self.handler.request.data = self.users
+        self.assertTrue(self.handler.can_serialize_bulk_created())
+        self.assertNumQueries(3, self.handler.post)
+
+    def test_model_with_signals(self):
+        # Models with ``post_save`` receivers are saved one by one
+        def receiver(sender, **kwargs):
+            pass
+        post_save.connect(receiver, sender=User)
+        try:
+            self.assertNumQueries(5, self.handler.post)
+        finally:
+            post_save.disconnect(receiver, sender=User)
+
+
+class UserBulkHandler(ModelHandler):
+    model = User
+    http_methods = ['POST']
+    post_body_fields = ['username', 'password', 'first_name']
+    bulk_post = True
+
+
+class TestModelHandlerBulkPostResponse(TestCase):
+    def setUp(self):
+        self.body = json.dumps([
+            {
+                'username': 'user%s' % i, 'password': 'pass',
+                'first_name': 'Name',
+            }
+            for i in range(3)
+        ])
+
+    def dispatch(self, template):
+        request = RequestFactory().post(
+            '/', self.body, content_type='application/json'
+        )
+        handler = init_handler(UserBulkHandler(), request)
+        handler.template = template
+        return handler.dispatch()
+
+    def test_pks(self):
+        res = self.dispatch({'fields': ['id', 'username', 'groups']})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            json.loads(res.content)['data'],
+            [
+                {'id': user.id, 'username': user.username, 'groups': []}
+                for user in User.objects.order_by('id')
+            ]
+        )
+
+    def test_no_pks(self):
+        res = self.dispatch({'fields': ['username', 'first_name']})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            json.loads(res.content)['data'],
+            [
+                {'username': 'user%s' % i, 'first_name': 'Name'}
+                for i in range(3)
+            ]
+        )
+
+
+class UserStreamHandler(ModelHandler):
+    model = User
+    http_methods = ['POST']
+    post_body_fields = ['username', 'password', 'first_name']
+    stream_post = True
+    stream_post_chunk_size = 2
+
+
+class TestModelHandlerStreamPost(TestCase):
+    def setUp(self):
+        self.items = [
+            {'username': 'user%s' % i, 'password': 'pass', 'is_staff': True}
+            for i in range(5)
+        ]
+
+    def dispatch(self, body, path='/', handler_class=UserStreamHandler,
+                 content_type='application/json'):
+        request = RequestFactory().post(path, body, content_type=content_type)
+        handler = init_handler(handler_class(), request)
+        return handler.dispatch()
+
+    def test_created(self):
+        res = self.dispatch(json.dumps(self.items))
+        self.assertEqual(res.status_code, 200)
+        # Only the number of created items is returned
+        self.assertEqual(json.loads(res.content), {'data': None, 'count': 5})
+        self.assertItemsEqual(
+            User.objects.values_list('username', flat=True),
+            [item['username'] for item in self.items],
+        )
+        # Each chunk was cleansed
+        self.assertFalse(User.objects.filter(is_staff=True).exists())
+
+    def test_ndjson(self):
+        body = '\n'.join(json.dumps(item) for item in self.items)
+        res = self.dispatch(body, content_type='application/x-ndjson')
+        self.assertEqual(json.loads(res.content)['count'], 5)
+        self.assertEqual(User.objects.count(), 5)
+
+    def test_invalid_item(self):
+        """
+        The error points to the invalid item, and nothing is created
+        """
+        self.items[3]['username'] = 'x' * 100
+        res = self.dispatch(json.dumps(self.items))
+        self.assertEqual(res.status_code, 400)
+        errors = json.loads(res.content)
+        self.assertEqual(errors['items'], [2, 3])
+        self.assertEqual(errors['item'], 3)
+        self.assertIn('username', errors['errors'])
+        self.assertEqual(User.objects.count(), 0)
+
+    def test_unknown_field(self):
+        class Handler(UserStreamHandler):
+            strict_body_fields = True
+
+        for item in self.items:
+            item.pop('is_staff')
+        self.items[3]['is_staff'] = True
+        res = self.dispatch(json.dumps(self.items), handler_class=Handler)
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(
+            json.loads(res.content),
+            {
+                'items': [2, 3], 'item': 3,
+                'errors': {'is_staff': ['Unknown field.']},
+            }
+        )
+
+    def test_invalid_body(self):
+        body = json.dumps(self.items)[:-10]
+        res = self.dispatch(body)
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(User.objects.count(), 0)
+
+    def test_single_item(self):
+        """
+        Bodies other than arrays are processed as usual
+        """
+        res = self.dispatch(json.dumps(self.items[0]))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(res.content)['data']['username'], 'user0')
+        self.assertEqual(User.objects.get().username, 'user0')
+
+    def test_bulk_create(self):
+        class Handler(UserStreamHandler):
+            bulk_post = True
+
+        # The savepoint of the transaction and its release, the 5 uniqueness
+        # checks of ``full_clean``, and one ``bulk_create`` query per chunk
+        self.assertNumQueries(
+            10, self.dispatch, json.dumps(self.items), handler_class=Handler,
+        )
+        self.assertEqual(User.objects.count(), 5)
+
+    def test_querystring_override(self):
+        res = self.dispatch(json.dumps(self.items), path='/?stream=0')
+        self.assertEqual(len(json.loads(res.content)['data']), 5)
@@ -8,7 +8,10 @@ from firestone import exceptions
 from django.test import TestCase
 from django.test import RequestFactory
 from django.contrib.auth.models import User
+from django.contrib.admin.models import LogEntry
+from django.utils import timezone
 from model_mommy import mommy
+import datetime
 
 def init_handler(handler, request, *args, **kwargs):
     # Mimicking the initialization of the handler instance
@@ -88,3 +91,66 @@ class TestModelHandlerPluralPut(TestCase):
         self.assertNumQueries(10, self.handler.put)
 
 
+class TestModelHandlerBulkPluralPut(TestCase):
+    def setUp(self):
+        request = RequestFactory().put('/')
+        handler = init_handler(ModelHandler(), request)
+        handler.model = User
+        handler.http_methods = ('PLURAL_PUT',)
+        handler.bulk_put = True
+        self.handler = handler
+
+        self.users = mommy.make(User, 10)
+        self.handler.request.data = {'first_name': 'name'}
+
+    def test_ret_value(self):
+        self.assertItemsEqual(self.handler.put(), self.users)
+
+    def test_updated(self):
+        self.handler.put()
+        self.assertEqual(User.objects.filter(first_name='name').count(), 10)
+
+    def test_num_queries(self):
+        self.assertNumQueries(1, self.handler.put)
+
+    def test_filtered_on_updated_field(self):
+        """
+        Items that the update makes no longer match the handler's filters are
+        left out of the returned dataset
+        """
+        self.handler.get_data_set = lambda: User.objects.exclude(
+            first_name='name'
+        )
+        self.assertItemsEqual(self.handler.put(), [])
+        self.assertEqual(User.objects.filter(first_name='name').count(), 10)
+
+    def test_many_items(self):
+        """
+        More items than SQLite's default limit of query parameters(999)
+        """
+        User.objects.bulk_create([
+            User(username='user%d' % i) for i in range(1200)
+        ])
+        self.handler.get_data_set = lambda: User.objects.all()
+        with self.assertNumQueries(2):
+            self.assertEqual(len(self.handler.put()), 1210)
+        self.assertEqual(
+            User.objects.filter(first_name='name').count(), 1210
+        )
+
+    def test_auto_now(self):
+        entries = mommy.make(LogEntry, 3)
+        LogEntry.objects.update(
+            action_time=datetime.datetime(2000, 1, 1)
+        )
+        handler = init_handler(ModelHandler(), RequestFactory().put('/'))
+        handler.model = LogEntry
+        handler.http_methods = ('PLURAL_PUT',)
+        handler.bulk_put = True
+        handler.request.data = {'object_repr': 'repr'}
+
+        before = timezone.now()
+        self.assertItemsEqual(handler.put(), entries)
+        for entry in LogEntry.objects.all():
+            self.assertEqual(entry.object_repr, 'repr')
+            self.assertGreaterEqual(entry.action_time, before)
@@ -0,0 +1,195 @@
+"""
+This module tests the response cache of handlers(``cache_responses``), and its
+invalidation by the ``firestone.caching`` module.
+"""
+from firestone.handlers import ModelHandler
+from firestone.authentication import SessionAuthentication
+from firestone import caching
+from django.test import TestCase
+from django.test import RequestFactory
+from django.contrib.auth.models import User, Group
+from django.contrib.admin.models import LogEntry
+from django.core.cache import caches
+from django.conf import settings
+from testproject.testapp.models import Contact
+from model_mommy import mommy
+import json
+
+
+def init_handler(handler, request, *args, **kwargs):
+    # Mimicking the initialization of the handler instance
+    handler.request = request
+    handler.args = args
+    handler.kwargs = kwargs
+    return handler
+
+
+class UserHandler(ModelHandler):
+    model = User
+    http_methods = ['GET', 'PUT']
+    cache_responses = True
+    last_modified_field = 'date_joined'
+    template = {
+        'fields': ['id', 'username', 'contact_set', 'groups'],
+        'related': {
+            'contact_set': {'fields': ['email']},
+            'groups': {'fields': ['name']},
+        },
+    }
+
+    def filter_data(self, data):
+        username = self.request.GET.get('username', None)
+        if username:
+            data = data.filter(username=username)
+        return data
+
+
+class ContactHandler(ModelHandler):
+    model = Contact
+    http_methods = ['GET']
+    authentication = SessionAuthentication
+    cache_responses = True
+    template = {'fields': ['id', 'email']}
+
+    def get_working_set(self):
+        return Contact.objects.filter(user=self.request.user)
+
+
+class TestCacheModels(TestCase):
+    def test_template_models(self):
+        self.assertEqual(
+            set(UserHandler.cache_models), set([User, Contact, Group])
+        )
+        self.assertEqual(ContactHandler.cache_models, (Contact,))
+
+    def test_not_cached(self):
+        class Handler(ModelHandler):
+            model = User
+
+        self.assertEqual(Handler.cache_models, ())
+
+
+class TestResponseCache(TestCase):
+    def setUp(self):
+        settings.DEBUG = False
+        caches['default'].clear()
+        self.users = mommy.make(User, 3)
+
+    def get(self, url='/', handler=UserHandler, user=None, **headers):
+        request = RequestFactory().get(url, **headers)
+        if user is not None:
+            request.user = user
+        return init_handler(handler(), request).dispatch()
+
+    def test_cached(self):
+        response = self.get()
+        with self.assertNumQueries(0):
+            cached = self.get()
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+    def test_querystring(self):
+        self.get('/?username=%s&field=id' % self.users[0].username)
+        with self.assertNumQueries(0):
+            self.get('/?field=id&username=%s' % self.users[0].username)
+        response = self.get('/?username=%s' % self.users[0].username)
+        self.assertEqual(len(json.loads(response.content)['data'][0]), 4)
+
+    def test_format(self):
+        json_content = self.get().content
+        response = self.get(HTTP_ACCEPT='application/vnd.ms-excel')
+        self.assertNotEqual(response.content, json_content)
+
+    def test_not_modified(self):
+        etag = self.get()['ETag']
+        with self.assertNumQueries(0):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_not_modified_since(self):
+        last_modified = self.get()['Last-Modified']
+        with self.assertNumQueries(0):
+            response = self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Last-Modified'], last_modified)
+
+    def test_modified_since(self):
+        self.get()
+        with self.assertNumQueries(0):
+            response = self.get(
+                HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 2000 00:00:00 GMT'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match_precedence(self):
+        last_modified = self.get()['Last-Modified']
+        response = self.get(
+            HTTP_IF_NONE_MATCH='W/"other"',
+            HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalidation(self):
+        self.get()
+        user = self.users[0]
+        for change in (
+                lambda: mommy.make(User),
+                lambda: user.delete(),
+                lambda: mommy.make(Contact, user=self.users[1]),
+                lambda: self.users[1].groups.add(mommy.make(Group)),
+        ):
+            change()
+            response = self.get()
+            with self.assertNumQueries(0):
+                self.assertEqual(self.get().content, response.content)
+            self.assertEqual(
+                json.loads(response.content)['data'],
+                json.loads(self.get(handler=_Uncached).content)['data'],
+            )
+
+    def test_unrelated_model(self):
+        self.get()
+        mommy.make(LogEntry, user=self.users[0])
+        with self.assertNumQueries(0):
+            self.get()
+
+    def test_bulk_put(self):
+        # ``QuerySet.update`` sends no signals, so the handler invalidates
+        generations = caching.get_generations([User])
+        request = RequestFactory().put(
+            '/', data=json.dumps({'first_name': 'name'}),
+            content_type='application/json'
+        )
+        handler = init_handler(UserHandler(), request)
+        handler.http_methods = ['PUT', 'PLURAL_PUT']
+        handler.bulk_put = True
+        handler.put_body_fields = set(['first_name'])
+        response = handler.dispatch()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(User.objects.filter(first_name='name').count(), 3)
+        self.assertNotEqual(caching.get_generations([User]), generations)
+
+    def test_user_scope(self):
+        mommy.make(Contact, user=self.users[0])
+        mommy.make(Contact, user=self.users[1])
+        first = self.get(handler=ContactHandler, user=self.users[0])
+        second = self.get(handler=ContactHandler, user=self.users[1])
+        self.assertNotEqual(first.content, second.content)
+
+    def test_not_cached(self):
+        # Errors are not cached
+        handler = init_handler(
+            UserHandler(), RequestFactory().get('/'), id=1000
+        )
+        self.assertEqual(handler.dispatch().status_code, 410)
+        self.assertIsNotNone(handler.response_cache_key)
+        self.assertIsNone(caches['default'].get(handler.response_cache_key))
+
+        # Neither are other methods
+        handler = init_handler(UserHandler(), RequestFactory().put('/'))
+        handler.dispatch()
+        self.assertIsNone(handler.response_cache_key)
+
+
+class _Uncached(UserHandler):
+    cache_responses = False
@@ -188,3 +188,40 @@ class TestModelHandlerPUT(TestCase):
             exceptions.BadRequest,
             handler.validate,
         )
+
+
+class TestModelHandlerBulkPUT(TestCase):
+    def setUp(self):
+        request = RequestFactory().put('/')
+        handler = init_handler(ModelHandler(), request)
+        handler.model = User
+        handler.http_methods = ('PLURAL_PUT',)
+        handler.bulk_put = True
+        self.handler = handler
+
+        mommy.make(User, 10)
+
+    def test_queryset(self):
+        """
+        ``request.data`` remains a dictionary of the cleaned values
+        """
+        handler = self.handler
+        handler.request.data = {
+            'first_name': 'name',
+            'last_name': 'surname',
+        }
+
+        self.assertNumQueries(0, handler.validate)
+        self.assertEqual(
+            handler.request.data,
+            {'first_name': 'name', 'last_name': 'surname'},
+        )
+
+    def test_queryset_error(self):
+        handler = self.handler
+        handler.request.data = {'username': ''}
+
+        self.assertRaises(
+            exceptions.BadRequest,
+            handler.validate,
+        )
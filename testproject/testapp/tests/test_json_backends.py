@@ -0,0 +1,167 @@
+# coding: UTF-8
+
+"""
+This module tests the ``firestone.json_backends`` module. Every installed
+backend runs against the same fixtures, and has to produce the same results
+as the standard library's ``json`` module with Django's
+``DateTimeAwareJSONEncoder``.
+"""
+from firestone import json_backends
+from django.test import TestCase
+from django.core.serializers.json import DateTimeAwareJSONEncoder
+from django.utils import timezone
+from datetime import datetime, date, time
+from decimal import Decimal
+import uuid
+import json
+
+
+ENCODE_FIXTURES = (
+    'string',
+    u'Χαράλαμπος',
+    '/path/with/slashes',
+    1,
+    -12345678901234,
+    0.1,
+    3.141592653589793,
+    True,
+    None,
+    [],
+    {},
+    [1, 'a', None, [2, [3, {'key': 'value'}]]],
+    (1, 2, 3),
+    {'key': {'nested': [1, 2, {'deeper': u'Χ'}]}},
+    datetime(2015, 3, 14, 15, 9, 26),
+    datetime(2015, 3, 14, 15, 9, 26, 535897),
+    datetime(2015, 3, 14, 15, 9, 26, tzinfo=timezone.utc),
+    date(2015, 3, 14),
+    time(15, 9, 26),
+    Decimal('3.14159'),
+    uuid.UUID('12345678123456781234567812345678'),
+    {'created': datetime(2015, 3, 14), 'amount': Decimal('10.50'),
+     'items': [{'id': uuid.UUID('12345678123456781234567812345678')}]},
+)
+
+DECODE_FIXTURES = (
+    '"string"',
+    '"\\u03a7"',
+    '1',
+    '1.5',
+    'true',
+    'null',
+    '[1, 2, 3]',
+    '{"key": "value", "list": [1, {"nested": null}]}',
+    '  {"whitespace" : [ 1 , 2 ] }  ',
+)
+
+INVALID_FIXTURES = (
+    'string',
+    '{"key": }',
+    '[1, 2',
+    '',
+)
+
+
+def expected(data):
+    # What the stdlib produces, decoded back to python data structures
+    return json.loads(json.dumps(data, cls=DateTimeAwareJSONEncoder))
+
+
+class TestBackendConformance(TestCase):
+    def backends(self):
+        for name in json_backends.available_backends():
+            yield name, json_backends.get_backend(name)
+
+    def test_stdlib_always_available(self):
+        self.assertIn('json', json_backends.available_backends())
+
+    def test_dumps(self):
+        for name, backend in self.backends():
+            for data in ENCODE_FIXTURES:
+                self.assertEqual(
+                    json.loads(backend.dumps(data)), expected(data),
+                    '%s: %r' % (name, data)
+                )
+
+    def test_dumps_indent(self):
+        for name, backend in self.backends():
+            for data in ENCODE_FIXTURES:
+                self.assertEqual(
+                    json.loads(backend.dumps(data, 4)), expected(data),
+                    '%s: %r' % (name, data)
+                )
+
+    def test_float_round_trip(self):
+        """
+        Every backend outputs the same, shortest, representation of floats,
+        which decodes to the same floats
+        """
+        floats = [0.1, 1 / 3.0, 2 ** 0.5, 1e-7, 1e22, 5e-324,
+                  1.7976931348623157e308, -0.0, 0.30000000000000004,
+                  123456789.12345679, -2.5e-300]
+        compact = json.dumps(floats, separators=(',', ':'))
+        for name, backend in self.backends():
+            self.assertEqual(backend.dumps(floats), compact, name)
+            for text in (compact, backend.dumps({'key': floats}, 4)):
+                decoded = backend.loads(text)
+                if isinstance(decoded, dict):
+                    decoded = decoded['key']
+                self.assertEqual(map(repr, decoded), map(repr, floats), name)
+
+    def test_dumps_compact(self):
+        for name, backend in self.backends():
+            text = backend.dumps({'key': [1, 2]})
+            self.assertNotIn(' ', text, name)
+            self.assertNotIn('\n', text, name)
+
+    def test_dumps_unencodable(self):
+        for name, backend in self.backends():
+            self.assertRaises(TypeError, backend.dumps, object())
+            self.assertRaises(TypeError, backend.dumps, {'key': object()})
+
+    def test_loads(self):
+        for name, backend in self.backends():
+            for text in DECODE_FIXTURES:
+                self.assertEqual(
+                    backend.loads(text), json.loads(text),
+                    '%s: %r' % (name, text)
+                )
+
+    def test_loads_invalid(self):
+        for name, backend in self.backends():
+            for text in INVALID_FIXTURES:
+                self.assertRaises(ValueError, backend.loads, text)
+
+
+class TestGetBackend(TestCase):
+    def test_default(self):
+        self.assertIsInstance(
+            json_backends.get_backend(), json_backends.StdlibBackend
+        )
+
+    def test_by_name(self):
+        self.assertIsInstance(
+            json_backends.get_backend('json'), json_backends.StdlibBackend
+        )
+
+    def test_unknown_falls_back(self):
+        self.assertIsInstance(
+            json_backends.get_backend('unknown'), json_backends.StdlibBackend
+        )
+
+    def test_not_installed_falls_back(self):
+        json_backends.register('missing', json_backends.JSONBackend,
+                               available=False)
+        self.assertIsInstance(
+            json_backends.get_backend('missing'), json_backends.StdlibBackend
+        )
+
+    def test_setting_preference(self):
+        class Backend(json_backends.StdlibBackend):
+            pass
+        json_backends.register('custom', Backend)
+
+        with self.settings(FIRESTONE_JSON_BACKEND=('missing', 'custom')):
+            self.assertIsInstance(json_backends.get_backend(), Backend)
+        with self.settings(FIRESTONE_JSON_BACKEND='custom'):
+            self.assertIsInstance(json_backends.get_backend(), Backend)
@@ -0,0 +1,133 @@
+"""
+This module tests the ``firestone.negotiation`` module, and the content
+negotiation of ``SerializerMixin.get_serialization_format``.
+"""
+from firestone import negotiation
+from firestone import serializers
+from firestone.handlers import BaseHandler
+from django.test import TestCase
+from django.test import RequestFactory
+
+
+AVAILABLE = ('application/json', 'application/vnd.ms-excel', 'text/csv')
+
+
+class TestParseAccept(TestCase):
+    def test_parse(self):
+        ranges = negotiation.parse_accept(
+            'Text/HTML;Level=1, application/json; q=0.5; indent=4, */*;q=0'
+        )
+        self.assertEqual(
+            [(r.media_type, r.params, r.quality, r.position) for r in ranges],
+            [
+                ('text/html', {'level': '1'}, 1.0, 0),
+                ('application/json', {'indent': '4'}, 0.5, 1),
+                ('*/*', {}, 0.0, 2),
+            ]
+        )
+
+    def test_malformed(self):
+        ranges = negotiation.parse_accept(
+            'json, */json, , text/csv;q=invalid, text/plain;q=2'
+        )
+        self.assertEqual(
+            [(r.media_type, r.quality) for r in ranges],
+            [('text/csv', 1.0), ('text/plain', 1.0)],
+        )
+
+    def test_cached(self):
+        header = 'application/json, text/csv;q=0.1'
+        self.assertIs(
+            negotiation.parse_accept(header),
+            negotiation.parse_accept(header),
+        )
+
+
+class TestSelect(TestCase):
+    def select(self, header):
+        return negotiation.select(header, AVAILABLE)
+
+    def test_exact(self):
+        self.assertEqual(self.select('text/csv'), 'text/csv')
+        self.assertEqual(self.select('text/html'), None)
+
+    def test_quality(self):
+        self.assertEqual(
+            self.select('application/json;q=0.5, text/csv'), 'text/csv'
+        )
+        self.assertEqual(
+            self.select('text/csv;q=0.2, application/json;q=0.9'),
+            'application/json',
+        )
+
+    def test_header_order_breaks_ties(self):
+        self.assertEqual(
+            self.select('application/vnd.ms-excel, application/json'),
+            'application/vnd.ms-excel',
+        )
+
+    def test_wildcards(self):
+        self.assertEqual(self.select('*/*'), 'application/json')
+        self.assertEqual(self.select('text/*'), 'text/csv')
+        self.assertEqual(
+            self.select('text/html, */*;q=0.1'), 'application/json'
+        )
+
+    def test_most_specific_range(self):
+        # ``application/json`` is excluded by its specific range
+        self.assertEqual(
+            self.select('application/json;q=0, */*'),
+            'application/vnd.ms-excel',
+        )
+        self.assertEqual(self.select('text/*;q=0, */*;q=0.5'),
+                         'application/json')
+        self.assertEqual(self.select('*/*;q=0'), None)
+
+    def test_cached(self):
+        negotiation._selected.clear()
+        self.select('text/csv')
+        self.assertIn(('text/csv', AVAILABLE), negotiation._selected)
+
+
+class Handler(BaseHandler):
+    pass
+
+
+class TestGetSerializationFormat(TestCase):
+    def get_format(self, header):
+        s = serializers.SerializerMixin()
+        s.request = RequestFactory().get('/', HTTP_ACCEPT=header)
+        return s.get_serialization_format()
+
+    def test_serialization_formats(self):
+        formats = Handler.__dict__['serialization_formats']
+        self.assertEqual(formats[0], 'application/json')
+        self.assertItemsEqual(formats, Handler.MAPPER)
+        self.assertEqual(list(formats[1:]), sorted(formats[1:]))
+
+    def test_browser_header(self):
+        self.assertEqual(
+            self.get_format(
+                'text/html,application/xhtml+xml,application/xml;q=0.9,'
+                '*/*;q=0.8'
+            ),
+            'application/json',
+        )
+
+    def test_quality(self):
+        self.assertEqual(
+            self.get_format('application/json;q=0.5, text/csv'), 'text/csv'
+        )
+
+    def test_not_acceptable(self):
+        # Falls back to the default format
+        self.assertEqual(self.get_format('text/html'), 'application/json')
+        self.assertEqual(self.get_format('*/*;q=0'), 'application/json')
+
+    def test_json_indent(self):
+        s = serializers.SerializerMixin()
+        s.pretty_json = False
+        s.request = RequestFactory().get(
+            '/', HTTP_ACCEPT='text/csv;indent=8, application/json;indent=2'
+        )
+        self.assertEqual(s.get_json_indent(), 2)
@@ -0,0 +1,195 @@
+"""
+This module tests the ``firestone.plans`` module, comparing the output of
+compiled templates with the output of ``django-preserialize``.
+"""
+from firestone import plans
+from firestone.handlers import ModelHandler
+from firestone.utils import LRUCache
+from preserialize import serialize as preserializer
+from django.test import TestCase
+from django.test import RequestFactory
+from django.contrib.auth.models import User
+from django.contrib.admin.models import LogEntry
+from testproject.testapp.models import Contact
+from model_mommy import mommy
+
+
+class TestSerializationPlan(TestCase):
+    def setUp(self):
+        for user in mommy.make(User, 3):
+            mommy.make(LogEntry, 2, user=user)
+            mommy.make(Contact, 2, user=user)
+
+    def assertSameOutput(self, data, template):
+        self.assertEqual(
+            plans.compile_template(template).serialize(data),
+            preserializer.serialize(data, **template),
+        )
+
+    def test_default_template(self):
+        self.assertSameOutput(User.objects.all(), {})
+        self.assertSameOutput(Contact.objects.get(id=1), {})
+
+    def test_fields_and_exclude(self):
+        template = {
+            'fields': [':pk', ':local'],
+            'exclude': ['password', 'groups'],
+        }
+        self.assertSameOutput(User.objects.all(), template)
+        self.assertSameOutput(User.objects.get(id=1), template)
+
+    def test_related(self):
+        template = {
+            'fields': ['id', 'username', 'logentry_set', 'contact_set'],
+            'related': {
+                'logentry_set': {
+                    'fields': ['action_flag', 'content_type'],
+                    'related': {
+                        'content_type': {'fields': ['id'], 'flat': False},
+                    },
+                },
+                'contact_set': {'fields': ['email']},
+            },
+        }
+        self.assertSameOutput(User.objects.all(), template)
+
+    def test_flat_and_merge(self):
+        self.assertSameOutput(
+            Contact.objects.all(),
+            {'fields': ['id', 'user'],
+             'related': {'user': {'fields': ['username']}}}
+        )
+        self.assertSameOutput(
+            Contact.objects.all(),
+            {'fields': ['id', 'user'],
+             'related': {'user': {'fields': ['username', 'email'],
+                                  'merge': True}}}
+        )
+
+    def test_aliases_prefix_camelcase(self):
+        template = {
+            'fields': ['id', 'owner', 'contact_name'],
+            'aliases': {'owner': 'user', 'contact_name': 'name'},
+            'camelcase': True,
+            'related': {
+                'user': {'fields': ['id', 'first_name'],
+                         'prefix': '%(accessor)s_', 'merge': True},
+            },
+        }
+        self.assertSameOutput(Contact.objects.all(), template)
+
+    def test_hooks(self):
+        template = {
+            'fields': ['id', 'contact_set'],
+            'prehook': lambda user: user,
+            'posthook': lambda user, attrs: dict(attrs, extra=user.pk),
+            'related': {
+                'contact_set': {
+                    'fields': ['name'],
+                    'prehook': {'id__gt': 2},
+                },
+            },
+        }
+        self.assertSameOutput(User.objects.get(id=1), template)
+        self.assertSameOutput(User.objects.all(), template)
+
+    def test_values_list(self):
+        template = {
+            'fields': ['id', 'contact_set'],
+            'related': {
+                'contact_set': {'fields': ['email'], 'values_list': True},
+            },
+        }
+        self.assertSameOutput(User.objects.all(), template)
+
+    def test_methods_and_missing(self):
+        template = {
+            'fields': ['id', 'get_full_name', 'nickname'],
+            'allow_missing': True,
+        }
+        self.assertSameOutput(User.objects.all(), template)
+
+        template['allow_missing'] = False
+        self.assertRaises(
+            ValueError,
+            plans.compile_template(template).serialize, User.objects.all()
+        )
+
+    def test_python_data(self):
+        data = [{'key': 'value', 'other': [1, 2]}, 'string', 3]
+        self.assertSameOutput(data, {})
+        self.assertSameOutput(data, {'exclude': ['other']})
+        self.assertSameOutput({'user': User.objects.get(id=1)},
+                              {'related': {'user': {'fields': ['id']}}})
+
+    def test_deferred_instances(self):
+        self.assertSameOutput(
+            User.objects.only('id', 'username'), {'fields': ['username']}
+        )
+
+
+class TestGetSerializationPlan(TestCase):
+    class UserHandler(ModelHandler):
+        model = User
+        template = {'fields': ['id', 'username']}
+
+    def setUp(self):
+        self.cache = plans.cache
+        plans.cache = LRUCache(2)
+
+    def tearDown(self):
+        plans.cache = self.cache
+
+    def get_plan(self, url='/', template=None):
+        handler = self.UserHandler()
+        handler.request = RequestFactory().get(url)
+        if template is not None:
+            handler.template = template
+        return handler.get_serialization_plan()
+
+    def test_cached(self):
+        plan = self.get_plan()
+        self.assertIs(plan, self.get_plan())
+        self.assertIsNot(plan, self.get_plan('/?field=id'))
+        self.assertEqual(self.get_plan('/?field=id').fields, set(['id']))
+
+    def test_template_replaced(self):
+        plan = self.get_plan()
+        template = {'fields': ['id']}
+        self.assertEqual(self.get_plan(template=template).fields, ['id'])
+        self.assertIsNot(plan, self.get_plan())
+
+    def test_template_modified(self):
+        template = {'fields': ['id', 'username']}
+        plan = self.get_plan(template=template)
+        self.assertIs(plan, self.get_plan(template=template))
+
+        template['fields'].append('first_name')
+        plan = self.get_plan(template=template)
+        self.assertEqual(plan.fields, ['id', 'username', 'first_name'])
+        self.assertIs(plan, self.get_plan(template=template))
+
+    def test_bounded(self):
+        self.get_plan('/?field=id')
+        self.get_plan('/?field=username')
+        self.get_plan('/?field=id&field=username')
+        self.assertEqual(len(plans.cache), 2)
+        self.assertNotIn(
+            (self.UserHandler, frozenset(['id'])), plans.cache
+        )
+
+
+class TestLRUCache(TestCase):
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.pop('c'), 3)
+        self.assertEqual(len(cache), 1)
+        cache.clear()
+        self.assertEqual(cache.get('a', 'default'), 'default')
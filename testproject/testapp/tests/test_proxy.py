@@ -3,6 +3,8 @@ This module tests the behavior of the ``proxy.Proxy`` class.
 """
 from firestone.handlers import BaseHandler
 from firestone.authentication import SessionAuthentication
+from firestone.authentication import SignatureAuthentication
+from firestone.authentication import JWTAuthentication
 from firestone.proxy import Proxy
 from django.test import TestCase
 from django.test import RequestFactory
@@ -77,9 +79,50 @@ class TestProxy(TestCase):
         request = RequestFactory().get('whatever')
         self.assertEquals(proxy(request).status_code, 403)
 
+    def test_fresh_handler_per_request(self):
+        """
+        Handler instances are never shared between requests, so no state can
+        leak from one request to the next.
+        """
+        proxy = Proxy(HandlerNoAuth)
+        request = RequestFactory().get('/')
 
+        h1 = proxy.choose_handler(request, 1, key='value')
+        h1.leftover = 'state'
+        h2 = proxy.choose_handler(request)
 
+        self.assertIsNot(h1, h2)
+        self.assertFalse(hasattr(h2, 'leftover'))
+        self.assertEqual(h2.args, ())
+        self.assertEqual(h2.kwargs, {})
 
+    def test_skips_handlers_that_cannot_authenticate(self):
+        """
+        Handlers whose authentication method needs something the request
+        doesn't carry, are never instantiated.
+        """
+        instantiated = []
 
+        class HandlerJWTAuth(BaseHandler):
+            authentication = JWTAuthentication
+            http_methods = ['get']
 
-        
+            def __init__(self):
+                instantiated.append(self.__class__)
+
+        class HandlerSignatureAuth(BaseHandler):
+            authentication = SignatureAuthentication
+            http_methods = ['get']
+
+            def __init__(self):
+                instantiated.append(self.__class__)
+
+        proxy = Proxy(HandlerSignatureAuth, HandlerJWTAuth, HandlerNoAuth)
+        request = RequestFactory().get('/')
+        self.assertIsInstance(proxy.choose_handler(request), HandlerNoAuth)
+        self.assertEqual(instantiated, [])
+
+        # The declared order is kept among the plausible handlers
+        request = RequestFactory().get('/?s=signature')
+        self.assertIsInstance(proxy.choose_handler(request), HandlerNoAuth)
+        self.assertEqual(instantiated, [HandlerSignatureAuth])
@@ -5,13 +5,19 @@ This module tests the functions in the ``firestone.serializers`` module
 """
 from firestone import serializers
 from firestone import exceptions
+from firestone import xlsx
 from firestone.handlers import BaseHandler
 from firestone.handlers import ModelHandler
 from django.test import TestCase
 from django.test import RequestFactory
 from django.core.serializers.json import DateTimeAwareJSONEncoder
 from django.http import HttpResponse
+from django.contrib.auth.models import User
+from model_mommy import mommy
 from datetime import datetime
+import StringIO
+import openpyxl
+import xlrd
 import json
 
 
@@ -102,6 +108,7 @@ class TestSerializerMixinSerializeToJson(TestCase):
         request = RequestFactory().get('/')
         s = serializers.SerializerMixin()
         s.request = request
+        s.pretty_json = True
 
         data = {'key': 'value'}
         self.assertEqual(
@@ -113,6 +120,7 @@ class TestSerializerMixinSerializeToJson(TestCase):
         request = RequestFactory().get('/')
         s = serializers.SerializerMixin()
         s.request = request
+        s.pretty_json = True
 
         data = [1, 2, 3, 'a', 'b']
         self.assertEqual(
@@ -295,6 +303,317 @@ class TestSerializerMixinSerializeToExcel(TestCase):
         )
 
 
+class TestSerializerMixinSerializeToCsv(TestCase):
+    # Methods serialize_to_csv and stream_to_csv
+
+    def setUp(self):
+        s = serializers.SerializerMixin()
+        s.request = RequestFactory().get('')
+        s.template = {'fields': ['name', 'surname', 'tags']}
+        s.csv_filename = 'file.csv'
+        self.s = s
+
+    def test_headers_order(self):
+        data = {'data': [
+            {'surname': 'b', 'name': 'a'},
+            {'surname': 'd', 'name': 'c'},
+        ]}
+        body, headers = self.s.serialize_to_csv(data)
+        self.assertEqual(body, 'name,surname\r\na,b\r\nc,d\r\n')
+        self.assertEqual(
+            headers,
+            {
+                'Content-Type': 'text/csv; charset=utf-8',
+                'Content-Disposition': 'attachment; filename=file.csv;',
+            }
+        )
+
+    def test_values(self):
+        data = {'data': {
+            'name': u'Χαράλαμπος', 'surname': 'a, "b"', 'tags': [1, 2],
+        }}
+        body, headers = self.s.serialize_to_csv(data)
+        self.assertEqual(
+            body.decode('utf-8'),
+            u'name,surname,tags\r\nΧαράλαμπος,"a, ""b""","1, 2"\r\n',
+        )
+
+    def test_empty(self):
+        body, headers = self.s.serialize_to_csv({'data': []})
+        self.assertEqual(body, '')
+
+    def test_incorrect_format(self):
+        self.assertRaises(
+            exceptions.Unprocessable, self.s.serialize_to_csv, {'key': 1}
+        )
+        self.assertRaises(
+            exceptions.NotAcceptable, self.s.serialize_to_csv, {'data': 1}
+        )
+
+    def test_stream(self):
+        mommy.make(User, 3, last_name='s')
+        data = {'data': serializers.StreamedData(
+            User.objects.order_by('id'),
+            lambda user: {'name': user.id, 'surname': user.last_name},
+        )}
+        body, headers = self.s.stream_to_csv(data)
+        chunks = list(body)
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[0], 'name,surname\r\n')
+        self.assertEqual(chunks[3], '3,s\r\n')
+
+    def test_serialization_format(self):
+        self.s.request = RequestFactory().get('/', HTTP_ACCEPT='text/csv')
+        self.assertEqual(self.s.get_serialization_format(), 'text/csv')
+        self.assertEqual(
+            self.s.get_serializer('text/csv'), self.s.serialize_to_csv
+        )
+
+
+class TestSerializerMixinSerializeToTsv(TestCase):
+    # Methods serialize_to_tsv and stream_to_tsv
+
+    def setUp(self):
+        s = serializers.SerializerMixin()
+        s.request = RequestFactory().get('')
+        s.template = {'fields': ['name', 'surname']}
+        s.tsv_filename = 'file.tsv'
+        self.s = s
+
+    def test_tsv(self):
+        data = {'data': [
+            {'surname': 'b\tc', 'name': u'Χαράλαμπος'},
+            {'surname': 'd\r\ne', 'name': 'a, "b"'},
+        ]}
+        body, headers = self.s.serialize_to_tsv(data)
+        self.assertEqual(
+            body.decode('utf-8'),
+            u'name\tsurname\nΧαράλαμπος\tb c\na, "b"\td  e\n',
+        )
+        self.assertEqual(
+            headers,
+            {
+                'Content-Type': 'text/tab-separated-values; charset=utf-8',
+                'Content-Disposition': 'attachment; filename=file.tsv;',
+            }
+        )
+
+    def test_serialization_format(self):
+        self.s.request = RequestFactory().get(
+            '/', HTTP_ACCEPT='text/tab-separated-values'
+        )
+        self.assertEqual(
+            self.s.get_serializer(self.s.get_serialization_format()),
+            self.s.serialize_to_tsv,
+        )
+
+
+class TestSerializerMixinSerializeToNDJSON(TestCase):
+    # Methods serialize_to_ndjson and stream_to_ndjson
+
+    def setUp(self):
+        s = serializers.SerializerMixin()
+        s.request = RequestFactory().get('')
+        self.s = s
+
+    def test_ndjson(self):
+        data = {
+            'data': [{'name': u'Χαράλαμπος'}, {'name': 'a\nb'}],
+            'count': 2,
+            'pagination': {'total_pages': 3, 'next': None, 'page': '2'},
+            'debug': {'query_count': 1},
+        }
+        body, headers = self.s.serialize_to_ndjson(data)
+        self.assertEqual(
+            [json.loads(line) for line in body.splitlines()],
+            data['data'],
+        )
+        self.assertEqual(
+            headers,
+            {
+                'Content-Type': 'application/x-ndjson; charset=utf-8',
+                'X-Count': '2',
+                'X-Pagination-Total-Pages': '3',
+                'X-Pagination-Page': '2',
+            }
+        )
+
+    def test_single_item(self):
+        body, headers = self.s.serialize_to_ndjson({'data': {'a': 1}})
+        self.assertEqual(body, '{"a":1}\n')
+
+    def test_count_only(self):
+        body, headers = self.s.serialize_to_ndjson(
+            {'data': None, 'count': 5}
+        )
+        self.assertEqual(body, '')
+        self.assertEqual(headers['X-Count'], '5')
+
+    def test_serialization_format(self):
+        self.s.request = RequestFactory().get(
+            '/', HTTP_ACCEPT='application/x-ndjson'
+        )
+        self.assertEqual(
+            self.s.get_serializer(self.s.get_serialization_format()),
+            self.s.serialize_to_ndjson,
+        )
+
+
+class TestSerializerMixinTabularColumns(TestCase):
+    # Methods get_tabular_rows and get_tabular_columns
+
+    def setUp(self):
+        s = serializers.SerializerMixin()
+        s.request = RequestFactory().get('')
+        s.template = {
+            'fields': ['id', 'user', 'contacts', 'groups', 'ids'],
+            'related': {
+                'user': {
+                    'fields': ['username', 'profile'],
+                    'related': {'profile': {'fields': ['city']}},
+                },
+                'contacts': {'fields': ['email']},
+                'groups': {'fields': ['name']},
+                'ids': {'fields': ['id'], 'values_list': True},
+            },
+        }
+        self.s = s
+
+    def test_dotted_columns(self):
+        data = {'data': [
+            {
+                'id': 1,
+                'user': {'username': 'a', 'profile': {'city': 'x'}},
+                'contacts': [{'email': 'a@a.com'}, {'email': 'b@b.com'}],
+                'groups': [],
+                'ids': [1, 2],
+            },
+            {
+                'id': 2,
+                'user': None,
+                'contacts': [],
+                'groups': [{'name': 'g'}],
+                'ids': [],
+            },
+        ]}
+        self.assertEqual(list(self.s.get_tabular_rows(data)), [
+            ['id', 'user.username', 'user.profile.city', 'contacts.email',
+             'groups.name', 'ids'],
+            ['1', 'a', 'x', 'a@a.com, b@b.com', '', '1, 2'],
+            ['2', 'None', 'None', '', 'g', ''],
+        ])
+
+    def test_fields_of_first_item(self):
+        data = {'data': [{'user': {'username': 'a'}, 'id': 1}]}
+        self.assertEqual(
+            list(self.s.get_tabular_rows(data))[0],
+            ['id', 'user.username'],
+        )
+
+    def test_not_dictionaries(self):
+        # Related values that aren't dictionaries, e.g. changed by hooks,
+        # take a single column
+        data = {'data': [{'user': 'a', 'contacts': ['b', 'c']}]}
+        self.assertEqual(list(self.s.get_tabular_rows(data)), [
+            ['user', 'contacts'], ['a', 'b, c'],
+        ])
+
+    def test_not_flattened(self):
+        data = {'data': [
+            {'id': 1, 'user': {'username': 'a'},
+             'contacts': [{'email': 'a@a.com'}]},
+        ]}
+        self.assertEqual(list(self.s.get_tabular_rows(data, False)), [
+            ['id', 'user', 'contacts'], ['1', 'username: a', 'email: a@a.com'],
+        ])
+
+    def test_excel_not_flattened(self):
+        """
+        The .xls format keeps a single column per field
+        """
+        self.s.excel_filename = 'file.xls'
+        data = {'data': [
+            {'id': 1, 'user': {'username': 'a'}},
+            {'id': 2, 'user': {'username': 'b'}},
+        ]}
+        body, headers = self.s.serialize_to_excel(data)
+        sheet = xlrd.open_workbook(file_contents=body).sheet_by_index(0)
+        self.assertEqual(
+            [sheet.row_values(i) for i in range(sheet.nrows)],
+            [['id', 'user'], ['1', 'username: a'], ['2', 'username: b']],
+        )
+
+
+class TestSerializerMixinSerializeToXlsx(TestCase):
+    # Methods serialize_to_xlsx and stream_to_xlsx
+
+    def setUp(self):
+        s = serializers.SerializerMixin()
+        s.request = RequestFactory().get('')
+        s.template = {'fields': ['name', 'surname']}
+        s.xlsx_filename = lambda: 'file.xlsx'
+        self.s = s
+
+    def load(self, body):
+        workbook = openpyxl.load_workbook(StringIO.StringIO(body))
+        return [
+            [cell.value for cell in row]
+            for row in workbook['Sheet'].iter_rows()
+        ]
+
+    def test_xlsx(self):
+        data = {'data': [
+            {'surname': 'b', 'name': u'Χαράλαμπος'},
+            {'surname': 'd', 'name': 'c'},
+        ]}
+        body, headers = self.s.serialize_to_xlsx(data)
+        self.assertEqual(
+            self.load(body),
+            [['name', 'surname'], [u'Χαράλαμπος', 'b'], ['c', 'd']],
+        )
+        self.assertEqual(
+            headers,
+            {
+                'Content-Type': serializers.XLSX,
+                'Content-Disposition': 'attachment; filename=file.xlsx;',
+            }
+        )
+
+    def test_stream_chunks(self):
+        self.s.file_chunk_size = 1024
+        mommy.make(User, 1000, last_name='s')
+        data = {'data': serializers.StreamedData(
+            User.objects.order_by('id'),
+            lambda user: {'name': str(user.id), 'surname': user.last_name},
+        )}
+        body, headers = self.s.stream_to_xlsx(data)
+        chunks = list(body)
+        self.assertTrue(len(chunks) > 1)
+        self.assertTrue(all(len(chunk) <= 1024 for chunk in chunks))
+        rows = self.load(''.join(chunks))
+        self.assertEqual(len(rows), 1001)
+        self.assertEqual(rows[-1], ['1000', 's'])
+
+
+class TestXlsx(TestCase):
+    # Module ``xlsx``
+
+    def test_column_letters(self):
+        self.assertEqual(
+            [xlsx.get_column_letter(i) for i in (0, 25, 26, 51, 702)],
+            ['A', 'Z', 'AA', 'AZ', 'AAA'],
+        )
+
+    def test_escaping(self):
+        f = StringIO.StringIO()
+        xlsx.write([['<a & b>', u'\x01ά', 1]], f)
+        workbook = openpyxl.load_workbook(f)
+        self.assertEqual(
+            [cell.value for cell in next(workbook['Sheet'].iter_rows())],
+            ['<a & b>', u'ά', '1'],
+        )
+
+
 class TestSerializerMixinSerialize(TestCase):
     # Method serialize
 
@@ -302,6 +621,7 @@ class TestSerializerMixinSerialize(TestCase):
         request = RequestFactory().get('/')
         s = serializers.SerializerMixin()
         s.request = request
+        s.pretty_json = True
 
         data = [1, 2, 3, 'a', 'b']
         self.assertItemsEqual(
@@ -315,6 +635,7 @@ class TestSerializerMixinSerialize(TestCase):
 
         s = serializers.SerializerMixin()
         s.request = request
+        s.pretty_json = True
 
         # But ``serialize`` is called with ``application/json``
         data = [1, 2, 3, 'a', 'b']
@@ -330,6 +651,7 @@ class TestSerializerMixinGetResponse(TestCase):
         request = RequestFactory().get('/')
         s = serializers.SerializerMixin()
         s.request = request
+        s.pretty_json = True
 
         data = [1, 2, 3, 'a', 'b']
         headers = {'Content-Type': 'application/json; charset=utf-8'}
@@ -339,6 +661,68 @@ class TestSerializerMixinGetResponse(TestCase):
         )
 
 
+class TestSerializerMixinJsonIndent(TestCase):
+    # Method get_json_indent
+
+    def test_pretty_json(self):
+        s = serializers.SerializerMixin()
+        s.request = RequestFactory().get('/')
+
+        s.pretty_json = True
+        self.assertEqual(s.get_json_indent(), 4)
+        s.pretty_json = False
+        self.assertIsNone(s.get_json_indent())
+
+    def test_settings_default(self):
+        s = serializers.SerializerMixin()
+        s.request = RequestFactory().get('/')
+
+        with self.settings(DEBUG=True):
+            self.assertEqual(s.get_json_indent(), 4)
+        with self.settings(DEBUG=False):
+            self.assertIsNone(s.get_json_indent())
+        with self.settings(DEBUG=True, FIRESTONE_PRETTY_JSON=False):
+            self.assertIsNone(s.get_json_indent())
+
+    def test_accept_parameter(self):
+        s = serializers.SerializerMixin()
+        s.pretty_json = False
+        s.request = RequestFactory().get(
+            '/', HTTP_ACCEPT='application/json; indent=2'
+        )
+        self.assertEqual(s.get_json_indent(), 2)
+        self.assertEqual(s.get_serialization_format(), 'application/json')
+
+        s.pretty_json = True
+        s.request = RequestFactory().get(
+            '/', HTTP_ACCEPT='application/json; indent=0'
+        )
+        self.assertEqual(s.get_json_indent(), 0)
+
+        s.request = RequestFactory().get(
+            '/', HTTP_ACCEPT='application/json; indent=invalid'
+        )
+        self.assertEqual(s.get_json_indent(), 4)
+
+    def test_accept_parameter_capped(self):
+        s = serializers.SerializerMixin()
+        s.request = RequestFactory().get(
+            '/', HTTP_ACCEPT='application/json; indent=1000000'
+        )
+        self.assertEqual(s.get_json_indent(), 8)
+
+        s.max_json_indent = 2
+        self.assertEqual(s.get_json_indent(), 2)
 
-    
+    def test_compact_output(self):
+        s = serializers.SerializerMixin()
+        s.pretty_json = False
+        s.request = RequestFactory().get('/')
 
+        data = {'key': [1, 2, {'nested': datetime(2015, 1, 1)}]}
+        body, headers = s.serialize_to_json(data)
+        self.assertEqual(
+            body,
+            json.dumps(data, cls=DateTimeAwareJSONEncoder,
+                       separators=(',', ':'))
+        )
@@ -0,0 +1,198 @@
+# coding: UTF-8
+"""
+This module tests the incremental parsers of ``firestone.streams``, and the
+streaming of request bodies by ``firestone.deserializers``.
+"""
+from firestone import streams
+from firestone import deserializers
+from firestone import exceptions
+from django.test import TestCase
+from django.test import RequestFactory
+from StringIO import StringIO
+import json
+
+
+def reader(data, max_size=None):
+    # ``read`` function that returns at most ``max_size`` bytes per call
+    f = StringIO(data)
+
+    def read(size):
+        return f.read(min(size, max_size or size))
+    return read
+
+
+class TestParseJSON(TestCase):
+    items = [
+        {'name': u'αβ', 'value': 12345, 'nested': [1, 2.5, None]},
+        'string, with ] and [',
+        1234567890,
+        True,
+        [],
+        {},
+    ]
+
+    def test_array(self):
+        data = json.dumps(self.items)
+        for size in (1, 2, 3, 7, 64, 1024):
+            self.assertEqual(
+                list(streams.parse_json(reader(data), size)), self.items,
+            )
+
+    def test_numbers_across_reads(self):
+        # Each read returns a single byte, so that every number is cut
+        self.assertEqual(
+            list(streams.parse_json(reader('[12345, -6.25e3]', 1), 1)),
+            [12345, -6250.0],
+        )
+
+    def test_whitespace(self):
+        data = ' \n[ 1 ,\n 2 ,3 ]\n '
+        self.assertEqual(list(streams.parse_json(reader(data), 2)), [1, 2, 3])
+
+    def test_whitespace_padding(self):
+        """
+        Whitespace is dropped as it's read, so that padding between the
+        items doesn't make the parser read more than a chunk at a time
+        """
+        padding = ' \n' * 64 * 1024
+        data = '[' + padding + '1' + padding + ',' + padding + '"a"' + \
+            padding + ']' + padding
+        sizes = []
+        read = reader(data)
+
+        def recording_read(size):
+            sizes.append(size)
+            return read(size)
+
+        self.assertEqual(
+            list(streams.parse_json(recording_read, 1024)), [1, 'a']
+        )
+        self.assertEqual(set(sizes), set([1024]))
+
+    def test_empty_array(self):
+        self.assertEqual(list(streams.parse_json(reader('[ ]'), 1)), [])
+
+    def test_object(self):
+        """
+        Documents other than arrays are decoded in full
+        """
+        data = json.dumps({'key': 'value'})
+        self.assertEqual(
+            streams.parse_json(reader(data), 2), {'key': 'value'},
+        )
+
+    def test_invalid(self):
+        for data in ('[1, 2', '[1 2]', '[1,]', '[,1]', '[1] 2', '[{"a": ]',
+                     '[1]]', ''):
+            self.assertRaises(
+                ValueError, lambda: list(streams.parse_json(reader(data), 2)),
+            )
+
+    def test_items_are_lazy(self):
+        # Items are read as they're iterated
+        items = streams.parse_json(reader('[1, 2, {"a":'), 4)
+        self.assertEqual(items.next(), 1)
+        self.assertEqual(items.next(), 2)
+        self.assertRaises(ValueError, items.next)
+
+
+class TestIterNDJSON(TestCase):
+    def test_lines(self):
+        data = '{"a": 1}\n\n[2, 3]\r\n"four"\n5'
+        for size in (1, 3, 1024):
+            self.assertEqual(
+                list(streams.iter_ndjson(reader(data), size)),
+                [{'a': 1}, [2, 3], 'four', 5],
+            )
+
+    def test_invalid(self):
+        self.assertRaises(
+            ValueError,
+            lambda: list(streams.iter_ndjson(reader('{"a": 1}\n{"a"\n'))),
+        )
+
+
+class TestStreamRequestBody(TestCase):
+    def post(self, data, content_type='application/json'):
+        # ``generic`` sends ``data`` as is, in any encoding
+        return RequestFactory().generic(
+            'POST', '/', data, content_type=content_type,
+        )
+
+    def test_json_array(self):
+        body = deserializers.stream_request_body(self.post('[1, 2, 3]'))
+        self.assertIsInstance(body, deserializers.StreamedBody)
+        self.assertEqual(list(body), [1, 2, 3])
+        self.assertEqual(body.count, 3)
+
+    def test_json_object(self):
+        self.assertEqual(
+            deserializers.stream_request_body(self.post('{"a": 1}')),
+            {'a': 1},
+        )
+
+    def test_ndjson(self):
+        body = deserializers.stream_request_body(
+            self.post('1\n2\n', 'application/x-ndjson'),
+        )
+        self.assertEqual(list(body), [1, 2])
+
+    def test_suffix(self):
+        body = deserializers.stream_request_body(
+            self.post('[1]', 'application/vnd.api+json'),
+        )
+        self.assertEqual(list(body), [1])
+
+    def test_charset(self):
+        data = json.dumps([u'αβγ'], ensure_ascii=False)
+        body = deserializers.stream_request_body(self.post(
+            data.encode('utf-16'), 'application/json; charset=utf-16',
+        ))
+        self.assertEqual(list(body), [u'αβγ'])
+
+    def test_unknown_charset(self):
+        self.assertRaises(
+            exceptions.UnsupportedMediaType,
+            deserializers.stream_request_body,
+            self.post('[1]', 'application/json; charset=unknown'),
+        )
+
+    def test_not_a_charset(self):
+        self.assertRaises(
+            exceptions.UnsupportedMediaType,
+            deserializers.stream_request_body,
+            self.post('[1]'.encode('zlib'), 'application/json; charset=zlib'),
+        )
+
+    def test_not_streamed(self):
+        """
+        Media types without incremental parsers, or whose deserializer is
+        overriden by the ``mapper``, are deserialized in full
+        """
+        self.assertEqual(
+            deserializers.stream_request_body(
+                self.post('a=1', 'application/x-www-form-urlencoded'),
+            ),
+            {'a': '1'},
+        )
+        self.assertEqual(
+            deserializers.stream_request_body(
+                self.post('[1]'), {'application/json': lambda data: 'custom'},
+            ),
+            'custom',
+        )
+
+    def test_invalid(self):
+        self.assertRaises(
+            exceptions.BadRequest,
+            deserializers.stream_request_body,
+            self.post('{"a": '),
+        )
+        body = deserializers.stream_request_body(self.post('[1, "a'))
+        self.assertRaises(exceptions.BadRequest, list, body)
+
+    def test_chunks(self):
+        body = deserializers.stream_request_body(self.post('[1, 2, 3, 4, 5]'))
+        self.assertEqual(
+            list(body.chunks(2)), [(0, [1, 2]), (2, [3, 4]), (4, [5])],
+        )
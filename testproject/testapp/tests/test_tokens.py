@@ -0,0 +1,161 @@
+"""
+This module tests the behavior of the ``firestone.tokens`` module
+"""
+from firestone.tokens import TokenCache
+from firestone.authentication import JWTAuthentication
+from firestone.handlers import BaseHandler
+from django.test import TestCase
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+from model_mommy import mommy
+from itsdangerous import TimedJSONWebSignatureSerializer
+from itsdangerous import JSONWebSignatureSerializer
+from itsdangerous import SignatureExpired
+from itsdangerous import BadSignature
+import time
+
+
+def init_handler(handler, request, *args, **kwargs):
+    handler = handler()
+    handler.request = request
+    handler.args = args
+    handler.kwargs = kwargs
+    return handler
+
+
+class CountingSigner(TimedJSONWebSignatureSerializer):
+    def __init__(self, *args, **kwargs):
+        super(CountingSigner, self).__init__(*args, **kwargs)
+        self.verifications = 0
+
+    def loads(self, *args, **kwargs):
+        self.verifications += 1
+        return super(CountingSigner, self).loads(*args, **kwargs)
+
+
+class TestTokenCache(TestCase):
+    def setUp(self):
+        self.cache = TokenCache(maxsize=2)
+        self.signer = CountingSigner('secret', expires_in=60)
+        self.token = self.signer.dumps({'iss': 1})
+
+    def test_hit(self):
+        for i in range(3):
+            self.assertEqual(
+                self.cache.loads(self.signer, self.token), {'iss': 1}
+            )
+        self.assertEqual(self.signer.verifications, 1)
+        self.assertEqual(
+            self.cache.get_stats(), {'hits': 2, 'misses': 1, 'size': 1}
+        )
+
+    def test_copies(self):
+        self.cache.loads(self.signer, self.token)['iss'] = 2
+        self.assertEqual(self.cache.loads(self.signer, self.token), {'iss': 1})
+
+    def test_no_plain_tokens(self):
+        self.cache.loads(self.signer, self.token)
+        key, = self.cache.local.data.keys()
+        self.assertEqual(len(key), 32)
+        self.assertNotIn(self.token, key)
+
+    def test_bad_signature_not_cached(self):
+        token = self.token[:-2] + 'xx'
+        for i in range(2):
+            self.assertRaises(BadSignature, self.cache.loads, self.signer, token)
+        self.assertEqual(len(self.cache.local), 0)
+        self.assertEqual(self.signer.verifications, 2)
+
+    def test_expiry(self):
+        self.cache.loads(self.signer, self.token)
+        key, = self.cache.local.data.keys()
+        payload, expires = self.cache.local.get(key)
+        self.assertLessEqual(expires, time.time() + 61)
+
+        # Expired entries are verified again, and rejected by the signer
+        signer = CountingSigner('secret', expires_in=-10)
+        token = signer.dumps({'iss': 1})
+        self.cache.local.set(
+            self.cache.get_key(signer, token), (payload, time.time() - 1)
+        )
+        self.assertRaises(SignatureExpired, self.cache.loads, signer, token)
+        self.assertEqual(signer.verifications, 1)
+
+    def test_timeout(self):
+        cache = TokenCache(timeout=5)
+        cache.loads(self.signer, self.token)
+        key, = cache.local.data.keys()
+        self.assertLessEqual(cache.local.get(key)[1], time.time() + 5)
+
+    def test_no_exp_header(self):
+        signer = JSONWebSignatureSerializer('secret')
+        cache = TokenCache(timeout=None)
+        cache.loads(signer, signer.dumps({'iss': 1}))
+        key, = cache.local.data.keys()
+        self.assertEqual(cache.local.get(key)[1], float('inf'))
+
+    def test_signer_change(self):
+        self.cache.loads(self.signer, self.token)
+        # Same token, different secret
+        signer = CountingSigner('other', expires_in=60)
+        self.assertRaises(BadSignature, self.cache.loads, signer, self.token)
+        # Different salt
+        signer = CountingSigner('secret', expires_in=60, salt='other')
+        self.assertRaises(BadSignature, self.cache.loads, signer, self.token)
+
+    def test_invalidate(self):
+        self.cache.loads(self.signer, self.token)
+        self.cache.invalidate(self.signer, self.token)
+        self.cache.loads(self.signer, self.token)
+        self.assertEqual(self.signer.verifications, 2)
+
+        self.cache.clear()
+        self.cache.loads(self.signer, self.token)
+        self.assertEqual(self.signer.verifications, 3)
+
+
+class HandlerJWTTokenCache(BaseHandler):
+    authentication = JWTAuthentication
+    jwt_signer = CountingSigner('secret', expires_in=60)
+    jwt_token_cache = TokenCache()
+
+
+class TestJWTAuthenticationTokenCache(TestCase):
+    def setUp(self):
+        self.user = mommy.make(User)
+        HandlerJWTTokenCache.jwt_token_cache.clear()
+        HandlerJWTTokenCache.jwt_token_cache.reset_stats()
+        HandlerJWTTokenCache.jwt_signer.verifications = 0
+        self.token = HandlerJWTTokenCache.jwt_signer.dumps(
+            {'iss': self.user.id}
+        )
+
+    def get_handler(self, token):
+        request = RequestFactory().get(
+            '/', HTTP_AUTHORIZATION='JWT %s' % token
+        )
+        return init_handler(HandlerJWTTokenCache, request)
+
+    def test_repeat_requests(self):
+        for i in range(3):
+            handler = self.get_handler(self.token)
+            self.assertTrue(handler.is_authenticated())
+            self.assertEqual(handler.request.user, self.user)
+        self.assertEqual(HandlerJWTTokenCache.jwt_signer.verifications, 1)
+
+    def test_invalid_token(self):
+        handler = self.get_handler(self.token + 'x')
+        self.assertFalse(handler.is_authenticated())
+
+    @override_settings(DEBUG=True)
+    def test_debug_data(self):
+        handler = self.get_handler(self.token)
+        handler.is_authenticated()
+        handler.is_authenticated()
+        stats = handler.debug_data()['token_cache']
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_debug_data_uncached(self):
+        self.assertNotIn('token_cache', BaseHandler().debug_data())
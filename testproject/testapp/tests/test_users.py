@@ -0,0 +1,174 @@
+"""
+This module tests the behavior of the ``firestone.users`` module
+"""
+from firestone.users import UserResolver
+from firestone.users import CachedUserResolver
+from firestone.authentication import JWTAuthentication
+from firestone.handlers import BaseHandler
+from django.test import TestCase
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from model_mommy import mommy
+from itsdangerous import TimedJSONWebSignatureSerializer
+import time
+
+
+def init_handler(handler, request, *args, **kwargs):
+    handler = handler()
+    handler.request = request
+    handler.args = args
+    handler.kwargs = kwargs
+    return handler
+
+
+class TestUserResolver(TestCase):
+    def setUp(self):
+        self.user = mommy.make(User)
+
+    def test_resolve(self):
+        resolver = UserResolver()
+        self.assertEqual(resolver.resolve(self.user.id), self.user)
+        self.assertIsNone(resolver.resolve(self.user.id + 1))
+        self.assertIsNone(resolver.get_stats())
+
+
+class TestCachedUserResolver(TestCase):
+    def setUp(self):
+        self.user = mommy.make(User)
+        self.resolver = CachedUserResolver(maxsize=2)
+        caches['default'].clear()
+
+    def test_hit(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.resolver.resolve(self.user.id), self.user)
+            self.assertEqual(self.resolver.resolve(self.user.id), self.user)
+            # String ids from the token payload share the entry
+            self.assertEqual(
+                self.resolver.resolve(str(self.user.id)), self.user
+            )
+
+        stats = self.resolver.get_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['size'], 1)
+
+    def test_copies(self):
+        user = self.resolver.resolve(self.user.id)
+        user.first_name = 'changed'
+        self.assertNotEqual(
+            self.resolver.resolve(self.user.id).first_name, 'changed'
+        )
+
+    def test_missing_user_not_cached(self):
+        self.assertIsNone(self.resolver.resolve(self.user.id + 1))
+        user = mommy.make(User, id=self.user.id + 1)
+        self.assertEqual(self.resolver.resolve(user.id), user)
+        self.assertEqual(self.resolver.get_stats()['misses'], 2)
+
+    def test_bounded_size(self):
+        users = mommy.make(User, 2)
+        for user in [self.user] + users:
+            self.resolver.resolve(user.id)
+        self.assertEqual(len(self.resolver.local), 2)
+        self.assertNotIn(str(self.user.id), self.resolver.local)
+
+    def test_timeout_bounded_by_max_age(self):
+        self.assertEqual(self.resolver.get_timeout(), 300)
+        self.assertEqual(self.resolver.get_timeout(60), 60)
+        self.assertEqual(self.resolver.get_timeout(3600), 300)
+
+    def test_expiry(self):
+        self.resolver.resolve(self.user.id, max_age=0)
+        with self.assertNumQueries(1):
+            self.resolver.resolve(self.user.id)
+
+    def test_invalidated_on_save(self):
+        self.resolver.resolve(self.user.id)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertFalse(self.resolver.resolve(self.user.id).is_active)
+
+    def test_invalidated_on_delete(self):
+        self.resolver.resolve(self.user.id)
+        self.user.delete()
+        self.assertIsNone(self.resolver.resolve(self.user.id))
+
+    def test_shared_tier(self):
+        resolver = CachedUserResolver(cache_alias='default')
+        resolver.resolve(self.user.id)
+
+        # Another process, with an empty per-process tier
+        other = CachedUserResolver(cache_alias='default')
+        with self.assertNumQueries(0):
+            self.assertEqual(other.resolve(self.user.id), self.user)
+        self.assertEqual(other.get_stats()['shared_hits'], 1)
+
+        # Invalidation reaches the shared tier
+        self.user.save()
+        other.clear()
+        with self.assertNumQueries(1):
+            other.resolve(self.user.id)
+
+    def test_reset_stats(self):
+        self.resolver.resolve(self.user.id)
+        self.resolver.reset_stats()
+        self.assertEqual(
+            self.resolver.get_stats(),
+            {'hits': 0, 'shared_hits': 0, 'misses': 0, 'size': 1},
+        )
+
+
+class HandlerJWTCachedUser(BaseHandler):
+    authentication = JWTAuthentication
+    jwt_signer = TimedJSONWebSignatureSerializer('secret', expires_in=60)
+    jwt_user_resolver = CachedUserResolver()
+
+
+class TestJWTAuthenticationUserResolver(TestCase):
+    def setUp(self):
+        self.user = mommy.make(User)
+        HandlerJWTCachedUser.jwt_user_resolver.clear()
+        HandlerJWTCachedUser.jwt_user_resolver.reset_stats()
+        self.token = HandlerJWTCachedUser.jwt_signer.dumps(
+            {'iss': self.user.id}
+        )
+
+    def get_handler(self, token):
+        request = RequestFactory().get(
+            '/', HTTP_AUTHORIZATION='JWT %s' % token
+        )
+        return init_handler(HandlerJWTCachedUser, request)
+
+    def test_repeat_requests(self):
+        with self.assertNumQueries(1):
+            for i in range(3):
+                handler = self.get_handler(self.token)
+                self.assertTrue(handler.is_authenticated())
+                self.assertEqual(handler.request.user, self.user)
+
+    def test_deleted_user(self):
+        self.get_handler(self.token).is_authenticated()
+        self.user.delete()
+        self.assertFalse(self.get_handler(self.token).is_authenticated())
+
+    def test_timeout_bounded_by_token_lifetime(self):
+        self.get_handler(self.token).is_authenticated()
+        key = str(self.user.id)
+        _, expires = HandlerJWTCachedUser.jwt_user_resolver.local.get(key)
+        self.assertLessEqual(expires, time.time() + 60)
+
+    @override_settings(DEBUG=True)
+    def test_debug_data(self):
+        handler = self.get_handler(self.token)
+        handler.is_authenticated()
+        handler.is_authenticated()
+        stats = handler.debug_data()['user_resolver']
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_debug_data_uncached(self):
+        handler = BaseHandler()
+        self.assertNotIn('user_resolver', handler.debug_data())